@@ -0,0 +1,276 @@
+"""
+Incremental, exactly-once ingestion of landing-zone files into the bronze table.
+
+Imported by the ingest_sales_data notebook (same folder) and by the local Spark
+tests. A small Delta manifest table records every landing file that has been
+planned into a batch and when that batch committed:
+
+1. ``plan_batch`` lists the landing zone, anti-joins it with the manifest and
+   records the new files under the next batch version (uncommitted). If the
+   previous run stopped before committing, its batch is resumed unchanged.
+2. ``write_batch`` reads only those files and appends them to bronze with
+   Delta's idempotent-write options (``txnAppId``/``txnVersion``), so a batch
+   that was already appended is skipped by Delta instead of duplicated.
+3. ``commit_batch`` marks the batch committed in the manifest.
+
+Every file is therefore appended exactly once, however often a run is retried.
+
+Run metrics come from the write itself, never from extra actions: row and
+corrupt-record counts are observed while the append runs (``Observation``),
+and rows, files and bytes written are read from the Delta commit's
+``operationMetrics``. ``log_ingestion`` appends them as one row per batch to
+an ingestion log table, so the cost of reporting does not grow with bronze.
+"""
+
+import os
+from datetime import datetime, timezone
+
+from pyspark.sql import Observation
+from pyspark.sql import functions as F
+from pyspark.sql.types import LongType, StringType, StructField, StructType, TimestampType
+
+# Delta idempotent-write application id for the bronze appends
+TXN_APP_ID = "bronze_sales_ingestion"
+
+# Delta commit userMetadata of a batch append, used to find its commit in history
+COMMIT_TAG = TXN_APP_ID + ":{}"
+
+# Commits searched for a batch's append right after writing it; only commits by
+# concurrent writers can land on top of it
+RECENT_COMMITS = 20
+
+LISTING_SCHEMA = StructType([
+    StructField("file_path", StringType(), False),
+    StructField("file_size", LongType(), False),
+    StructField("file_modification_time", TimestampType(), False),
+])
+
+
+def list_landing_files(root):
+    """
+    Lists the data files under ``root`` recursively as (path, size, mtime)
+    rows, skipping hidden and ``_``-prefixed names like Spark's file sources.
+    Works on local directories and on Unity Catalog volumes (/Volumes/...).
+    """
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(("_", ".")))
+        for name in sorted(filenames):
+            if name.startswith(("_", ".")):
+                continue
+            path = os.path.join(dirpath, name)
+            stat = os.stat(path)
+            files.append((path, stat.st_size, datetime.fromtimestamp(stat.st_mtime)))
+    return files
+
+
+def ensure_manifest(spark, manifest_table):
+    """Creates the file manifest table if it does not exist."""
+    spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {manifest_table} (
+            file_path STRING NOT NULL,
+            file_size BIGINT,
+            file_modification_time TIMESTAMP,
+            batch_version BIGINT NOT NULL,
+            planned_at TIMESTAMP,
+            committed_at TIMESTAMP
+        ) USING DELTA
+    """)
+
+
+def plan_batch(spark, manifest_table, source_path):
+    """
+    Returns (batch_version, file paths, resumed) for this run: the uncommitted
+    batch of an interrupted run if there is one (``resumed`` is True),
+    otherwise the landing files not yet in the manifest, recorded under a new
+    batch version. Empty when there is nothing to ingest.
+    """
+    manifest = spark.table(manifest_table)
+    pending = (
+        manifest.where(F.col("committed_at").isNull())
+        .groupBy("batch_version")
+        .agg(F.sort_array(F.collect_list("file_path")).alias("paths"))
+        .orderBy("batch_version")
+        .collect()
+    )
+    if pending:
+        return pending[0].batch_version, pending[0].paths, True
+
+    listed = spark.createDataFrame(list_landing_files(source_path), LISTING_SCHEMA)
+    new_files = listed.join(manifest.select("file_path"), "file_path", "left_anti")
+    paths = sorted(r.file_path for r in new_files.select("file_path").collect())
+    if not paths:
+        return None, [], False
+
+    version = (manifest.agg(F.max("batch_version")).first()[0] or 0) + 1
+    (
+        new_files
+        .withColumn("batch_version", F.lit(version).cast("bigint"))
+        .withColumn("planned_at", F.current_timestamp())
+        .withColumn("committed_at", F.lit(None).cast("timestamp"))
+        .write.format("delta").mode("append").saveAsTable(manifest_table)
+    )
+    return version, paths, False
+
+
+def read_files(spark, paths, schema, ingested_at=None):
+    """
+    Reads the given JSON files with schema enforcement and lineage columns.
+    ``_ingestion_timestamp`` is ``ingested_at`` if given, else the query time.
+    """
+    if "_corrupt_record" not in schema.fieldNames():
+        # PERMISSIVE mode only keeps malformed lines if the schema has the column
+        schema = StructType(schema.fields + [StructField("_corrupt_record", StringType(), True)])
+    return (
+        spark.read
+        .format("json")
+        .schema(schema)
+        .option("mode", "PERMISSIVE")
+        .option("columnNameOfCorruptRecord", "_corrupt_record")
+        .load(paths)
+        .withColumn(
+            "_ingestion_timestamp",
+            F.current_timestamp() if ingested_at is None else F.lit(ingested_at).cast("timestamp"),
+        )
+        .withColumn("_source_file", F.col("_metadata.file_path"))
+    )
+
+
+def write_batch(df, target_table, batch_version):
+    """Appends a planned batch to bronze; a no-op if Delta already has it."""
+    (
+        df.write
+        .format("delta")
+        .mode("append")
+        .option("mergeSchema", "true")
+        .option("txnAppId", TXN_APP_ID)
+        .option("txnVersion", batch_version)
+        .option("userMetadata", COMMIT_TAG.format(batch_version))
+        .saveAsTable(target_table)
+    )
+
+
+def find_commit(spark, target_table, batch_version, limit=None):
+    """
+    Returns the Delta history row (version, timestamp, operationMetrics) of a
+    batch's append, or None if the batch has not been appended yet (or not
+    within the ``limit`` most recent commits). Reads only the transaction log,
+    never the table data; a ``limit`` keeps that read from growing with the
+    table's history.
+    """
+    from delta.tables import DeltaTable
+
+    if not spark.catalog.tableExists(target_table):
+        return None
+    table = DeltaTable.forName(spark, target_table)
+    return (
+        (table.history(limit) if limit else table.history())
+        .where(F.col("userMetadata") == COMMIT_TAG.format(batch_version))
+        .select("version", "timestamp", "operationMetrics")
+        .first()
+    )
+
+
+def commit_batch(spark, manifest_table, batch_version):
+    """Marks a batch's files as ingested."""
+    spark.sql(f"""
+        UPDATE {manifest_table}
+        SET committed_at = current_timestamp()
+        WHERE batch_version = {int(batch_version)} AND committed_at IS NULL
+    """)
+
+
+def batch_metrics(batch_version, batch_id, paths, commit, observed, started_at, finished_at):
+    """
+    Builds the ingestion log record of a batch from its Delta commit and the
+    metrics observed during the append. ``observed`` is empty when the batch
+    had already been appended by an interrupted run; its counts are then None.
+    """
+    operation = dict(commit.operationMetrics or {}) if commit else {}
+
+    def metric(name):
+        return int(operation[name]) if name in operation else None
+
+    rows_written = metric("numOutputRows")
+    return {
+        "batch_version": batch_version,
+        "batch_id": batch_id,
+        "table_version": commit.version if commit else None,
+        "files_read": len(paths),
+        "rows_written": rows_written if rows_written is not None else observed.get("rows"),
+        "files_written": metric("numFiles"),
+        "bytes_written": metric("numOutputBytes"),
+        "corrupt_records": observed.get("corrupt_records"),
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+
+def ensure_ingestion_log(spark, log_table):
+    """Creates the ingestion log table if it does not exist."""
+    spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {log_table} (
+            batch_version BIGINT NOT NULL,
+            batch_id STRING,
+            table_version BIGINT,
+            files_read INT,
+            rows_written BIGINT,
+            files_written BIGINT,
+            bytes_written BIGINT,
+            corrupt_records BIGINT,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        ) USING DELTA
+    """)
+
+
+def log_ingestion(spark, log_table, metrics):
+    """Appends one batch's metrics to the ingestion log table."""
+    ensure_ingestion_log(spark, log_table)
+    (
+        spark.createDataFrame([metrics], spark.table(log_table).schema)
+        .write.format("delta").mode("append").saveAsTable(log_table)
+    )
+
+
+def ingest_new_files(spark, source_path, target_table, manifest_table, schema, batch_id, log_table=None):
+    """
+    Runs one incremental ingestion: plan, append, commit, and log the batch's
+    metrics to ``log_table`` if given.
+    Returns the batch's metrics with the files ingested, or a dict with an
+    empty file list when there was nothing to ingest.
+    """
+    ensure_manifest(spark, manifest_table)
+    batch_version, paths, resumed = plan_batch(spark, manifest_table, source_path)
+    if not paths:
+        return {"batch_version": None, "files": []}
+
+    started_at = datetime.now(timezone.utc)
+    observed = {}
+    # Only a resumed batch can already be in bronze. Its commit is looked up in
+    # the full history: if Delta skipped the append as already written, the
+    # observation below would never receive its metrics.
+    commit = find_commit(spark, target_table, batch_version) if resumed else None
+    if commit is None:
+        # Counted by the append's own job: the source is read only once
+        observation = Observation(f"bronze_batch_{batch_version}")
+        df = (
+            read_files(spark, paths, schema, ingested_at=started_at)
+            .withColumn("_batch_id", F.lit(batch_id))
+            .observe(
+                observation,
+                F.count(F.lit(1)).alias("rows"),
+                F.count("_corrupt_record").alias("corrupt_records"),
+            )
+        )
+        write_batch(df, target_table, batch_version)
+        observed = observation.get
+        commit = find_commit(spark, target_table, batch_version, limit=RECENT_COMMITS)
+    commit_batch(spark, manifest_table, batch_version)
+
+    metrics = batch_metrics(
+        batch_version, batch_id, paths, commit, observed, started_at, datetime.now(timezone.utc),
+    )
+    if log_table:
+        log_ingestion(spark, log_table, metrics)
+    return dict(metrics, files=paths)
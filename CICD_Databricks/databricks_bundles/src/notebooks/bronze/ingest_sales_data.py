@@ -3,6 +3,10 @@
 # MAGIC # Bronze Layer: Sales Data Ingestion
 # MAGIC 
 # MAGIC This notebook ingests raw sales data from the landing zone into the bronze layer.
+# MAGIC Ingestion is incremental and exactly-once: a file manifest table records which
+# MAGIC landing files are already in bronze, so each run reads only new files and a
+# MAGIC re-run never appends the same file twice (see `bronze_ingestion.py`).
+# MAGIC Each batch's metrics are appended to `raw_sales_ingestion_log`.
 # MAGIC 
 # MAGIC **Parameters:**
 # MAGIC - `catalog`: Target catalog name
@@ -16,9 +20,10 @@
 # COMMAND ----------
 
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import current_timestamp, input_file_name, lit
 from pyspark.sql.types import StructType, StructField, StringType, DoubleType, IntegerType, TimestampType
 
+from bronze_ingestion import ingest_new_files
+
 # Get widget parameters
 dbutils.widgets.text("catalog", "bronze")
 dbutils.widgets.text("schema", "raw_sales")
@@ -57,68 +62,41 @@ sales_schema = StructType([
 # Define source path (landing zone volume)
 source_path = f"/Volumes/{catalog}/{schema}/landing/sales/"
 
-# Read raw data with schema enforcement
-df_raw = (
-    spark.read
-    .format("json")
-    .schema(sales_schema)
-    .option("mode", "PERMISSIVE")
-    .option("columnNameOfCorruptRecord", "_corrupt_record")
-    .load(source_path)
-)
-
-# Add ingestion metadata
-df_bronze = (
-    df_raw
-    .withColumn("_ingestion_timestamp", current_timestamp())
-    .withColumn("_source_file", input_file_name())
-    .withColumn("_batch_id", lit(spark.sparkContext.applicationId))
-)
-
-print(f"Records to ingest: {df_bronze.count()}")
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## Write to Bronze Table
-
-# COMMAND ----------
-
 # Set catalog and schema
 spark.sql(f"USE CATALOG {catalog}")
 spark.sql(f"USE SCHEMA {schema}")
 
-# Write to bronze table with merge schema
-(
-    df_bronze
-    .write
-    .format("delta")
-    .mode("append")
-    .option("mergeSchema", "true")
-    .saveAsTable("raw_sales_transactions")
+# Plan the files not yet in the manifest (or resume an interrupted batch),
+# append them to bronze idempotently, then mark them ingested
+result = ingest_new_files(
+    spark,
+    source_path=source_path,
+    target_table="raw_sales_transactions",
+    manifest_table="raw_sales_ingested_files",
+    schema=sales_schema,
+    batch_id=spark.sparkContext.applicationId,
+    log_table="raw_sales_ingestion_log",
 )
 
-print(f"Successfully ingested data to {catalog}.{schema}.raw_sales_transactions")
-
 # COMMAND ----------
 
 # MAGIC %md
 # MAGIC ## Log Ingestion Metrics
+# MAGIC 
+# MAGIC Taken from the append itself and its Delta commit, and already written to
+# MAGIC `raw_sales_ingestion_log`: no query runs over the bronze table.
 
 # COMMAND ----------
 
-# Get table stats
-table_stats = spark.sql("""
-    SELECT 
-        COUNT(*) as total_records,
-        MIN(_ingestion_timestamp) as first_ingestion,
-        MAX(_ingestion_timestamp) as last_ingestion
-    FROM raw_sales_transactions
-""").collect()[0]
-
-print(f"Total records in table: {table_stats.total_records}")
-print(f"First ingestion: {table_stats.first_ingestion}")
-print(f"Last ingestion: {table_stats.last_ingestion}")
+if result["files"]:
+    print(f"Batch {result['batch_version']} -> {catalog}.{schema}.raw_sales_transactions "
+          f"(table version {result['table_version']})")
+    print(f"Files read: {result['files_read']}")
+    print(f"Records written: {result['rows_written']}")
+    print(f"Corrupt records: {result['corrupt_records']}")
+    print(f"Ingestion: {result['started_at']} - {result['finished_at']}")
+else:
+    print("No new files in the landing zone")
 
 # Return success status
 dbutils.notebook.exit("SUCCESS")
@@ -0,0 +1,395 @@
+"""
+Incremental bronze -> silver transformation of sales transactions.
+
+Imported by the transform_sales notebook (same folder) and by the local Spark
+tests. Each run processes only the bronze rows appended since the last run:
+
+1. ``read_increment`` pins the current bronze table version and reads the rows
+   inserted after the version recorded in the state table, from Delta's change
+   data feed. The first run (or a full refresh) reads the pinned snapshot and
+   enables the change data feed on bronze for the runs after it.
+2. ``clean_sales`` and ``dedup_latest`` run on that slice only. The result is
+   persisted once: ``quality_metrics`` computes every check in one aggregation
+   (which also materialises it) and the MERGE reads it from the cache.
+3. ``merge_into_silver`` MERGEs the slice's keys into silver, never letting an
+   older bronze row overwrite a newer one. The MERGE only looks at the
+   increment's date range, so files of other dates are skipped rather than
+   scanned.
+4. ``save_state`` records the pinned version once the MERGE has committed.
+5. ``optimize_silver`` clusters the files the MERGE wrote on the transaction
+   date and id (silver is liquid clustered), which keeps the date ranges of
+   silver's files narrow enough for step 3 to skip them.
+
+A run that fails before ``save_state`` is re-processed from the same version by
+the next run; the MERGE is idempotent, so silver ends up the same.
+"""
+
+from pyspark import StorageLevel
+from pyspark.sql import Window
+from pyspark.sql import functions as F
+
+# The deduplicated increment is read twice (quality checks, MERGE): cached in
+# memory, spilling to local disk rather than recomputing the window if it is large
+DEDUP_STORAGE_LEVEL = StorageLevel.MEMORY_AND_DISK
+
+SILVER_COLUMNS = [
+    "transaction_id",
+    "customer_id",
+    "product_id",
+    "store_id",
+    "transaction_date",
+    "transaction_date_only",
+    "transaction_year",
+    "transaction_month",
+    "transaction_day_of_week",
+    "quantity",
+    "unit_price",
+    "discount_amount",
+    "gross_amount",
+    "net_amount",
+    "payment_method",
+    "_ingestion_timestamp",
+    "_processed_timestamp",
+    "_source_file",
+]
+
+# Change data feed metadata columns, dropped from the increment
+CDF_COLUMNS = ["_change_type", "_commit_version", "_commit_timestamp"]
+
+# Silver layout: increments are mostly recent dates, and the MERGE joins on
+# transaction_id within the increment's date range
+CLUSTER_COLUMNS = ["transaction_date_only", "transaction_id"]
+
+
+def clean_sales(df):
+    """Applies the silver cleaning rules and derived columns to bronze rows."""
+    return (
+        df
+        # Remove corrupt records
+        .filter(F.col("_corrupt_record").isNull())
+
+        # Clean string fields
+        .withColumn("customer_id", F.trim(F.upper(F.col("customer_id"))))
+        .withColumn("product_id", F.trim(F.upper(F.col("product_id"))))
+        .withColumn("store_id", F.trim(F.upper(F.col("store_id"))))
+        .withColumn("payment_method", F.trim(F.lower(F.col("payment_method"))))
+
+        # Handle nulls with defaults
+        .withColumn("quantity", F.coalesce(F.col("quantity"), F.lit(1)))
+        .withColumn("unit_price", F.coalesce(F.col("unit_price"), F.lit(0.0)))
+        .withColumn("discount_amount", F.coalesce(F.col("discount_amount"), F.lit(0.0)))
+
+        # Calculate derived fields
+        .withColumn("gross_amount", F.round(F.col("quantity") * F.col("unit_price"), 2))
+        .withColumn("net_amount", F.round(F.col("gross_amount") - F.col("discount_amount"), 2))
+
+        # Add date dimensions
+        .withColumn("transaction_date_only", F.to_date(F.col("transaction_date")))
+        .withColumn("transaction_year", F.year(F.col("transaction_date")))
+        .withColumn("transaction_month", F.month(F.col("transaction_date")))
+        .withColumn("transaction_day_of_week", F.dayofweek(F.col("transaction_date")))
+
+        # Add processing metadata
+        .withColumn("_processed_timestamp", F.current_timestamp())
+    )
+
+
+def dedup_latest(df):
+    """
+    Keeps the latest ingested row per transaction_id. ``_row_count`` holds the
+    number of rows the key had, so input counts need no separate pass.
+    """
+    by_key = Window.partitionBy("transaction_id")
+    return (
+        df
+        .withColumn("_row_num", F.row_number().over(by_key.orderBy(F.col("_ingestion_timestamp").desc())))
+        .withColumn("_row_count", F.count(F.lit(1)).over(by_key))
+        .filter(F.col("_row_num") == 1)
+        .drop("_row_num", "_corrupt_record")
+    )
+
+
+def quality_metrics(df):
+    """
+    Computes the silver quality checks over the deduplicated increment in a
+    single aggregation (one Spark job). Returns (dict of counts, date range):
+    the increment's min and max transaction_date_only come from the same pass,
+    for the MERGE's date predicate. ``valid_input_records`` counts the bronze
+    rows before deduplication but after ``clean_sales`` dropped corrupt
+    records; those are counted by the bronze ingestion log.
+    """
+    def count_if(condition):
+        return F.sum(F.when(condition, 1).otherwise(0))
+
+    row = df.agg(
+        F.sum("_row_count").alias("valid_input_records"),
+        F.count(F.lit(1)).alias("total_records"),
+        count_if(F.col("customer_id").isNull()).alias("null_customer_ids"),
+        count_if(F.col("net_amount") < 0).alias("negative_amounts"),
+        count_if(F.col("transaction_date") > F.current_timestamp()).alias("future_dates"),
+        F.min("transaction_date_only").alias("min_transaction_date"),
+        F.max("transaction_date_only").alias("max_transaction_date"),
+    ).first().asDict()
+    date_range = (row.pop("min_transaction_date"), row.pop("max_transaction_date"))
+    # sums over an empty increment are null
+    return {name: value or 0 for name, value in row.items()}, date_range
+
+
+def ensure_quality_log(spark, metrics_table):
+    """Creates the silver quality metrics table if it does not exist."""
+    spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {metrics_table} (
+            source_table STRING NOT NULL,
+            bronze_version BIGINT NOT NULL,
+            valid_input_records BIGINT,
+            total_records BIGINT,
+            null_customer_ids BIGINT,
+            negative_amounts BIGINT,
+            future_dates BIGINT,
+            checked_at TIMESTAMP
+        ) USING DELTA
+    """)
+
+
+def log_quality(spark, metrics_table, source_table, bronze_version, metrics):
+    """Appends one run's quality metrics to the metrics table."""
+    ensure_quality_log(spark, metrics_table)
+    (
+        spark.createDataFrame([dict(metrics, source_table=source_table, bronze_version=int(bronze_version))])
+        .withColumn("checked_at", F.current_timestamp())
+        .select(*spark.table(metrics_table).columns)
+        .write.format("delta").mode("append").saveAsTable(metrics_table)
+    )
+
+
+def ensure_state(spark, state_table):
+    """Creates the silver state table if it does not exist."""
+    spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {state_table} (
+            source_table STRING NOT NULL,
+            last_version BIGINT NOT NULL,
+            updated_at TIMESTAMP
+        ) USING DELTA
+    """)
+
+
+def read_state(spark, state_table, source_table):
+    """Returns the last bronze version processed into silver, or None."""
+    row = spark.table(state_table).where(F.col("source_table") == source_table).first()
+    return row.last_version if row else None
+
+
+def save_state(spark, state_table, source_table, version):
+    """Records ``version`` as the last bronze version processed."""
+    spark.createDataFrame(
+        [(source_table, int(version))], "source_table STRING, last_version BIGINT",
+    ).createOrReplaceTempView("silver_state_update")
+    spark.sql(f"""
+        MERGE INTO {state_table} AS target
+        USING silver_state_update AS source
+        ON target.source_table = source.source_table
+        WHEN MATCHED THEN UPDATE SET last_version = source.last_version, updated_at = current_timestamp()
+        WHEN NOT MATCHED THEN INSERT (source_table, last_version, updated_at)
+            VALUES (source.source_table, source.last_version, current_timestamp())
+    """)
+
+
+def current_version(spark, table):
+    """Returns the latest Delta version of ``table``, from its transaction log."""
+    from delta.tables import DeltaTable
+
+    return DeltaTable.forName(spark, table).history(1).first().version
+
+
+def enable_change_data_feed(spark, table):
+    """Turns on the change data feed of ``table`` if it is off."""
+    properties = spark.sql(f"SHOW TBLPROPERTIES {table}").collect()
+    if not any(r.key == "delta.enableChangeDataFeed" and r.value == "true" for r in properties):
+        spark.sql(f"ALTER TABLE {table} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)")
+
+
+def read_increment(spark, source_table, last_version):
+    """
+    Returns (rows, version): the bronze rows inserted after ``last_version`` up
+    to the pinned current version, or the whole snapshot at that version when
+    ``last_version`` is None. ``rows`` is None when nothing was appended.
+    """
+    if last_version is None:
+        enable_change_data_feed(spark, source_table)
+        version = current_version(spark, source_table)
+        return spark.sql(f"SELECT * FROM {source_table} VERSION AS OF {version}"), version
+
+    version = current_version(spark, source_table)
+    if version <= last_version:
+        return None, last_version
+    rows = (
+        spark.read
+        .format("delta")
+        .option("readChangeFeed", "true")
+        .option("startingVersion", last_version + 1)
+        .option("endingVersion", version)
+        .table(source_table)
+        # bronze is append-only; updates or deletes from maintenance are ignored
+        .where(F.col("_change_type") == "insert")
+        .drop(*CDF_COLUMNS)
+    )
+    return rows, version
+
+
+def ensure_silver_table(spark, target_table, df, migrate_layout=False):
+    """
+    Creates an empty silver table with the schema of ``df``, liquid clustered
+    on CLUSTER_COLUMNS, if it does not exist. An existing table without
+    partitioning or clustering is only switched to CLUSTER_COLUMNS with
+    ``migrate_layout``: ALTER TABLE ... CLUSTER BY upgrades the table protocol,
+    so it is a one-time migration rather than part of every run. Clustering
+    only applies to files written by OPTIMIZE (``optimize_silver``), not to the
+    files a MERGE writes.
+    """
+    if not spark.catalog.tableExists(target_table):
+        df.limit(0).createOrReplaceTempView("silver_schema")
+        spark.sql(f"""
+            CREATE TABLE {target_table}
+            USING DELTA
+            CLUSTER BY ({", ".join(CLUSTER_COLUMNS)})
+            AS SELECT * FROM silver_schema
+        """)
+        return
+    if not migrate_layout:
+        return
+    detail = spark.sql(f"DESCRIBE DETAIL {target_table}").first().asDict()
+    if not detail.get("partitionColumns") and not detail.get("clusteringColumns"):
+        spark.sql(f"ALTER TABLE {target_table} CLUSTER BY ({', '.join(CLUSTER_COLUMNS)})")
+
+
+def optimize_silver(spark, target_table):
+    """
+    Clusters the files written since the last OPTIMIZE on CLUSTER_COLUMNS
+    (incremental on a liquid clustered table), so the MERGE's date predicate
+    can skip them. Returns (files removed, files added).
+    """
+    metrics = spark.sql(f"OPTIMIZE {target_table}").first().metrics
+    return metrics.numFilesRemoved, metrics.numFilesAdded
+
+
+def merge_condition(date_range):
+    """
+    The MERGE join condition. With the increment's (min, max) transaction date
+    the target side is restricted to that range, so Delta skips every file
+    whose transaction_date_only statistics fall outside it. Rows without a
+    date are always matched by key.
+    """
+    condition = "target.transaction_id = source.transaction_id"
+    if not date_range or date_range[0] is None:
+        return condition
+    low, high = date_range
+    return (
+        f"(target.transaction_date_only BETWEEN DATE'{low.isoformat()}' AND DATE'{high.isoformat()}'"
+        f" OR target.transaction_date_only IS NULL) AND {condition}"
+    )
+
+
+def merge_metrics(commit, files_in_table):
+    """
+    Builds the merge log record from the MERGE commit's operationMetrics and
+    the number of files the table had, to see how much of it was rewritten.
+    ``commit`` is None when the MERGE wrote no commit; its counts are then None.
+    """
+    operation = dict(commit.operationMetrics or {}) if commit else {}
+
+    def metric(name):
+        return int(operation[name]) if name in operation else None
+
+    return {
+        "table_version": commit.version if commit else None,
+        "files_in_table": files_in_table,
+        "files_scanned": metric("numTargetFilesAfterSkipping"),
+        "files_removed": metric("numTargetFilesRemoved"),
+        "files_added": metric("numTargetFilesAdded"),
+        "bytes_removed": metric("numTargetBytesRemoved"),
+        "bytes_added": metric("numTargetBytesAdded"),
+        "source_rows": metric("numSourceRows"),
+        "rows_inserted": metric("numTargetRowsInserted"),
+        "rows_updated": metric("numTargetRowsUpdated"),
+        "rows_copied": metric("numTargetRowsCopied"),
+        "scan_time_ms": metric("scanTimeMs"),
+        "rewrite_time_ms": metric("rewriteTimeMs"),
+    }
+
+
+def merge_into_silver(spark, df, target_table, date_range=None, migrate_layout=False):
+    """
+    MERGEs the deduplicated increment into silver by transaction_id, pruned to
+    ``date_range`` (the increment's min and max transaction_date_only), and
+    returns the merge metrics of its commit. ``migrate_layout`` is passed to
+    ``ensure_silver_table``.
+
+    A transaction's date must not change between deliveries: a re-delivery
+    under a different date outside the range would be inserted, not updated.
+    """
+    from delta.tables import DeltaTable
+
+    ensure_silver_table(spark, target_table, df, migrate_layout)
+    files_in_table = spark.sql(f"DESCRIBE DETAIL {target_table}").first().numFiles
+    before = current_version(spark, target_table)
+    df.createOrReplaceTempView("silver_updates")
+    spark.sql(f"""
+        MERGE INTO {target_table} AS target
+        USING silver_updates AS source
+        ON {merge_condition(date_range)}
+        WHEN MATCHED AND source._ingestion_timestamp >= target._ingestion_timestamp THEN UPDATE SET *
+        WHEN NOT MATCHED THEN INSERT *
+    """)
+    # another writer may commit to silver around the MERGE: take the first MERGE
+    # after the version read before it, searching only the commits since then
+    after = current_version(spark, target_table)
+    commit = None
+    if after > before:
+        commit = (
+            DeltaTable.forName(spark, target_table).history(after - before)
+            .where((F.col("operation") == "MERGE") & (F.col("version") > before))
+            .orderBy("version")
+            .select("version", "operation", "operationMetrics").first()
+        )
+    return merge_metrics(commit, files_in_table)
+
+
+def ensure_merge_log(spark, merge_log_table):
+    """Creates the silver merge log table if it does not exist."""
+    spark.sql(f"""
+        CREATE TABLE IF NOT EXISTS {merge_log_table} (
+            source_table STRING NOT NULL,
+            bronze_version BIGINT NOT NULL,
+            min_transaction_date DATE,
+            max_transaction_date DATE,
+            table_version BIGINT,
+            files_in_table BIGINT,
+            files_scanned BIGINT,
+            files_removed BIGINT,
+            files_added BIGINT,
+            bytes_removed BIGINT,
+            bytes_added BIGINT,
+            source_rows BIGINT,
+            rows_inserted BIGINT,
+            rows_updated BIGINT,
+            rows_copied BIGINT,
+            scan_time_ms BIGINT,
+            rewrite_time_ms BIGINT,
+            merged_at TIMESTAMP
+        ) USING DELTA
+    """)
+
+
+def log_merge(spark, merge_log_table, source_table, bronze_version, date_range, metrics):
+    """Appends one run's merge metrics to the merge log table."""
+    ensure_merge_log(spark, merge_log_table)
+    schema = spark.table(merge_log_table).schema
+    record = dict(
+        metrics, source_table=source_table, bronze_version=int(bronze_version),
+        min_transaction_date=date_range[0], max_transaction_date=date_range[1], merged_at=None,
+    )
+    (
+        spark.createDataFrame([record], schema)
+        .withColumn("merged_at", F.current_timestamp())
+        .write.format("delta").mode("append").saveAsTable(merge_log_table)
+    )
@@ -3,12 +3,30 @@
 # MAGIC # Silver Layer: Sales Data Transformation
 # MAGIC 
 # MAGIC This notebook transforms raw sales data from bronze to cleaned silver layer.
+# MAGIC It is incremental: only the bronze rows appended since the last run are read,
+# MAGIC from Delta's change data feed, and only their keys are merged into silver
+# MAGIC (see `silver_transform.py`). The last processed bronze version is kept in
+# MAGIC `cleaned_sales.sales_transactions_state`; each run's quality checks are
+# MAGIC appended to `cleaned_sales.sales_transactions_quality`.
+# MAGIC 
+# MAGIC Silver is liquid clustered on `transaction_date_only, transaction_id` and the
+# MAGIC MERGE carries the increment's date range, so Delta skips files of other dates;
+# MAGIC each MERGE's file and row metrics go to `cleaned_sales.sales_transactions_merge_log`.
+# MAGIC MERGE writes are not clustered, so every run ends with an `OPTIMIZE` that
+# MAGIC clusters the files written since the previous one.
 # MAGIC 
 # MAGIC **Transformations:**
 # MAGIC - Data type casting and validation
 # MAGIC - Null handling and default values
 # MAGIC - Deduplication
 # MAGIC - Business rule application
+# MAGIC 
+# MAGIC **Parameters:**
+# MAGIC - `source_catalog`: Bronze catalog name
+# MAGIC - `target_catalog`: Silver catalog name
+# MAGIC - `full_refresh`: `true` to reprocess the whole bronze table
+# MAGIC - `migrate_layout`: `true` once, to switch an existing unclustered silver table
+# MAGIC   to liquid clustering (`ALTER TABLE ... CLUSTER BY` upgrades the table protocol)
 
 # COMMAND ----------
 
@@ -18,21 +36,28 @@
 # COMMAND ----------
 
 from pyspark.sql import SparkSession
-from pyspark.sql.functions import (
-    col, when, coalesce, lit, current_timestamp,
-    trim, upper, lower, regexp_replace,
-    to_date, date_format, year, month, dayofweek,
-    round as spark_round
+
+from silver_transform import (
+    DEDUP_STORAGE_LEVEL, SILVER_COLUMNS, clean_sales, dedup_latest, quality_metrics, log_quality,
+    ensure_state, read_state, read_increment, merge_into_silver, log_merge, save_state, optimize_silver,
 )
-from pyspark.sql.window import Window
-import pyspark.sql.functions as F
 
 # Get widget parameters
 dbutils.widgets.text("source_catalog", "bronze")
 dbutils.widgets.text("target_catalog", "silver")
+dbutils.widgets.dropdown("full_refresh", "false", ["true", "false"])
+dbutils.widgets.dropdown("migrate_layout", "false", ["true", "false"])
 
 source_catalog = dbutils.widgets.get("source_catalog")
 target_catalog = dbutils.widgets.get("target_catalog")
+full_refresh = dbutils.widgets.get("full_refresh") == "true"
+migrate_layout = dbutils.widgets.get("migrate_layout") == "true"
+
+source_table = f"{source_catalog}.raw_sales.raw_sales_transactions"
+target_table = f"{target_catalog}.cleaned_sales.sales_transactions"
+state_table = f"{target_catalog}.cleaned_sales.sales_transactions_state"
+quality_table = f"{target_catalog}.cleaned_sales.sales_transactions_quality"
+merge_log_table = f"{target_catalog}.cleaned_sales.sales_transactions_merge_log"
 
 print(f"Source: {source_catalog}.raw_sales")
 print(f"Target: {target_catalog}.cleaned_sales")
@@ -40,15 +65,21 @@ print(f"Target: {target_catalog}.cleaned_sales")
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ## Read Bronze Data
+# MAGIC ## Read Bronze Increment
 
 # COMMAND ----------
 
-# Read from bronze layer
-df_bronze = spark.table(f"{source_catalog}.raw_sales.raw_sales_transactions")
+# Rows appended to bronze since the last processed version (all rows on the
+# first run or a full refresh)
+ensure_state(spark, state_table)
+last_version = None if full_refresh else read_state(spark, state_table, source_table)
+df_bronze, bronze_version = read_increment(spark, source_table, last_version)
 
-print(f"Bronze records: {df_bronze.count()}")
-display(df_bronze.limit(5))
+if df_bronze is None:
+    print(f"No new bronze data since version {last_version}")
+    dbutils.notebook.exit("SUCCESS")
+
+print(f"Bronze versions {'start' if last_version is None else last_version + 1}..{bronze_version}")
 
 # COMMAND ----------
 
@@ -57,36 +88,8 @@ display(df_bronze.limit(5))
 
 # COMMAND ----------
 
-# Define cleaning transformations
-df_cleaned = (
-    df_bronze
-    # Remove corrupt records
-    .filter(col("_corrupt_record").isNull())
-    
-    # Clean string fields
-    .withColumn("customer_id", trim(upper(col("customer_id"))))
-    .withColumn("product_id", trim(upper(col("product_id"))))
-    .withColumn("store_id", trim(upper(col("store_id"))))
-    .withColumn("payment_method", trim(lower(col("payment_method"))))
-    
-    # Handle nulls with defaults
-    .withColumn("quantity", coalesce(col("quantity"), lit(1)))
-    .withColumn("unit_price", coalesce(col("unit_price"), lit(0.0)))
-    .withColumn("discount_amount", coalesce(col("discount_amount"), lit(0.0)))
-    
-    # Calculate derived fields
-    .withColumn("gross_amount", spark_round(col("quantity") * col("unit_price"), 2))
-    .withColumn("net_amount", spark_round(col("gross_amount") - col("discount_amount"), 2))
-    
-    # Add date dimensions
-    .withColumn("transaction_date_only", to_date(col("transaction_date")))
-    .withColumn("transaction_year", year(col("transaction_date")))
-    .withColumn("transaction_month", month(col("transaction_date")))
-    .withColumn("transaction_day_of_week", dayofweek(col("transaction_date")))
-    
-    # Add processing metadata
-    .withColumn("_processed_timestamp", current_timestamp())
-)
+# Cleaning rules and derived columns, on the increment only
+df_cleaned = clean_sales(df_bronze)
 
 # COMMAND ----------
 
@@ -95,17 +98,10 @@ df_cleaned = (
 
 # COMMAND ----------
 
-# Deduplicate based on transaction_id, keeping the latest ingestion
-window_spec = Window.partitionBy("transaction_id").orderBy(col("_ingestion_timestamp").desc())
-
-df_deduped = (
-    df_cleaned
-    .withColumn("_row_num", F.row_number().over(window_spec))
-    .filter(col("_row_num") == 1)
-    .drop("_row_num", "_corrupt_record")
-)
-
-print(f"Records after deduplication: {df_deduped.count()}")
+# Deduplicate the increment on transaction_id, keeping the latest ingestion;
+# the MERGE keeps whichever of silver and the increment is newer. Persisted so
+# the quality checks and the MERGE share one read of bronze and one window.
+df_deduped = dedup_latest(df_cleaned).persist(DEDUP_STORAGE_LEVEL)
 
 # COMMAND ----------
 
@@ -114,16 +110,17 @@ print(f"Records after deduplication: {df_deduped.count()}")
 
 # COMMAND ----------
 
-# Basic quality checks
-quality_checks = {
-    "total_records": df_deduped.count(),
-    "null_customer_ids": df_deduped.filter(col("customer_id").isNull()).count(),
-    "negative_amounts": df_deduped.filter(col("net_amount") < 0).count(),
-    "future_dates": df_deduped.filter(col("transaction_date") > current_timestamp()).count(),
-}
+# All checks in one aggregation, which also materialises the persisted increment;
+# the increment's transaction date range comes from the same pass
+quality_checks, date_range = quality_metrics(df_deduped)
+log_quality(spark, quality_table, source_table, bronze_version, quality_checks)
 
+print(f"Valid bronze records (corrupt records dropped): {quality_checks['valid_input_records']}")
+print(f"Records after deduplication: {quality_checks['total_records']}")
 print("Quality Check Results:")
 for check, value in quality_checks.items():
+    if check == "valid_input_records":
+        continue
     status = "PASS" if (check == "total_records" or value == 0) else "WARNING"
     print(f"  {check}: {value} [{status}]")
 
@@ -135,42 +132,30 @@ for check, value in quality_checks.items():
 # COMMAND ----------
 
 # Select final columns
-df_silver = df_deduped.select(
-    "transaction_id",
-    "customer_id",
-    "product_id",
-    "store_id",
-    "transaction_date",
-    "transaction_date_only",
-    "transaction_year",
-    "transaction_month",
-    "transaction_day_of_week",
-    "quantity",
-    "unit_price",
-    "discount_amount",
-    "gross_amount",
-    "net_amount",
-    "payment_method",
-    "_ingestion_timestamp",
-    "_processed_timestamp",
-    "_source_file"
-)
+df_silver = df_deduped.select(*SILVER_COLUMNS)
 
-# Write to silver table using merge
-spark.sql(f"USE CATALOG {target_catalog}")
-spark.sql("USE SCHEMA cleaned_sales")
+# MERGE the increment's keys into silver, restricted to its date range so files
+# of other dates are skipped, then record the processed version
+merge_metrics = merge_into_silver(spark, df_silver, target_table, date_range, migrate_layout)
+log_merge(spark, merge_log_table, source_table, bronze_version, date_range, merge_metrics)
+save_state(spark, state_table, source_table, bronze_version)
+df_deduped.unpersist()
 
-# Create table if not exists, then merge
-df_silver.createOrReplaceTempView("silver_updates")
+print(f"Transaction dates merged: {date_range[0]} - {date_range[1]}")
+print(f"Files scanned: {merge_metrics['files_scanned']}, rewritten: {merge_metrics['files_removed']} "
+      f"of {merge_metrics['files_in_table']} ({merge_metrics['rows_copied']} unchanged rows copied)")
+
+# COMMAND ----------
 
-spark.sql("""
-    MERGE INTO sales_transactions AS target
-    USING silver_updates AS source
-    ON target.transaction_id = source.transaction_id
-    WHEN MATCHED THEN UPDATE SET *
-    WHEN NOT MATCHED THEN INSERT *
-""")
+# MAGIC %md
+# MAGIC ## Cluster Silver
+
+# COMMAND ----------
 
+# The MERGE's files are not clustered; OPTIMIZE clusters the files written since
+# the last run by transaction date, so the next MERGE's date range prunes them
+files_removed, files_added = optimize_silver(spark, target_table)
+print(f"OPTIMIZE: {files_removed} files clustered into {files_added}")
 print(f"Successfully transformed data to {target_catalog}.cleaned_sales.sales_transactions")
 
 # COMMAND ----------
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# =============================================================================
+# Profile Silver Spark Actions Script
+# =============================================================================
+"""
+Counts the Spark jobs and stages the silver notebook triggers on a local Spark
+session, for the previous action sequence (separate counts, display, one count
+per quality check) and the current one (one aggregation over a persisted
+increment). Bronze is a generated parquet table and the MERGE is replaced by a
+write to Spark's noop sink, so no Delta Lake or Databricks workspace is needed.
+With adaptive query execution each shuffle stage runs as its own job, so jobs
+count more than the notebook's actions.
+
+Usage:
+    python scripts/profile_silver_actions.py --rows 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "databricks_bundles", "src", "notebooks", "silver"))
+
+from silver_transform import (  # noqa: E402
+    DEDUP_STORAGE_LEVEL, SILVER_COLUMNS, clean_sales, dedup_latest, quality_metrics,
+)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Count Spark jobs/stages of the silver notebook")
+    parser.add_argument("--rows", type=int, default=200_000, help="Bronze rows to generate")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Fraction of re-delivered transactions")
+    parser.add_argument("--path", default="/tmp/profile_silver_bronze", help="Where to write the bronze parquet")
+    return parser.parse_args()
+
+
+def write_bronze(spark, rows, duplicates, path):
+    """Generates a bronze-shaped parquet table and returns it as a DataFrame."""
+    start = datetime(2024, 1, 1)
+    keys = max(int(rows * (1 - duplicates)), 1)
+    (
+        spark.range(rows)
+        .select(
+            F.format_string("TXN%08d", F.col("id") % keys).alias("transaction_id"),
+            F.format_string("cust%04d", F.col("id") % 1000).alias("customer_id"),
+            F.format_string("prod%04d", F.col("id") % 50).alias("product_id"),
+            (F.col("id") % 10 + 1).cast("int").alias("quantity"),
+            (F.col("id") % 500 + 0.99).alias("unit_price"),
+            (F.lit(start) + F.make_interval(mins=(F.col("id") % 100_000).cast("int"))).alias("transaction_date"),
+            F.format_string("store%02d", F.col("id") % 10).alias("store_id"),
+            F.lit("CASH").alias("payment_method"),
+            F.lit(1.0).alias("discount_amount"),
+            F.lit(None).cast("string").alias("_corrupt_record"),
+            (F.lit(start + timedelta(days=1)) + F.make_interval(secs=F.col("id").cast("int"))).alias("_ingestion_timestamp"),
+            F.lit("landing/part-0.json").alias("_source_file"),
+        )
+        .write.mode("overwrite").parquet(path)
+    )
+    return spark.read.parquet(path)
+
+
+def before(df_bronze):
+    """The action sequence of the notebook before single-pass quality checks."""
+    df_bronze.count()
+    df_bronze.limit(5).collect()  # display()
+    df_deduped = dedup_latest(clean_sales(df_bronze))
+    df_deduped.count()
+    quality = {
+        "total_records": df_deduped.count(),
+        "null_customer_ids": df_deduped.filter(F.col("customer_id").isNull()).count(),
+        "negative_amounts": df_deduped.filter(F.col("net_amount") < 0).count(),
+        "future_dates": df_deduped.filter(F.col("transaction_date") > F.current_timestamp()).count(),
+    }
+    df_deduped.select(*SILVER_COLUMNS).write.format("noop").mode("overwrite").save()  # MERGE
+    return quality
+
+
+def after(df_bronze):
+    """The current action sequence: one persisted increment, one aggregation."""
+    df_deduped = dedup_latest(clean_sales(df_bronze)).persist(DEDUP_STORAGE_LEVEL)
+    quality, _ = quality_metrics(df_deduped)
+    df_deduped.select(*SILVER_COLUMNS).write.format("noop").mode("overwrite").save()  # MERGE
+    df_deduped.unpersist()
+    return quality
+
+
+def profile(spark, name, fn, df_bronze):
+    """Runs fn under its own job group and returns (jobs, stages, skipped stages, seconds)."""
+    sc = spark.sparkContext
+    tracker = sc.statusTracker()
+    sc.setJobGroup(name, name)
+    start = time.perf_counter()
+    fn(df_bronze)
+    seconds = time.perf_counter() - start
+    sc.setLocalProperty("spark.jobGroup.id", None)
+
+    job_ids = tracker.getJobIdsForGroup(name)
+    stage_ids = {s for j in job_ids for s in tracker.getJobInfo(j).stageIds}
+    # stages whose shuffle output was reused are skipped: they complete no tasks
+    infos = [tracker.getStageInfo(s) for s in stage_ids]
+    ran = sum(1 for info in infos if info is not None and info.numCompletedTasks)
+    return len(job_ids), ran, len(stage_ids) - ran, seconds
+
+
+def main():
+    args = parse_args()
+    spark = (
+        SparkSession.builder
+        .master("local[*]")
+        .appName("profile-silver-actions")
+        .config("spark.sql.shuffle.partitions", "8")
+        .config("spark.ui.showConsoleProgress", "false")
+        .getOrCreate()
+    )
+    spark.sparkContext.setLogLevel("ERROR")
+
+    df_bronze = write_bronze(spark, args.rows, args.duplicates, args.path)
+    print(f"{'sequence':<8} {'jobs':>5} {'stages':>7} {'skipped':>8} {'seconds':>8}")
+    for name, fn in [("before", before), ("after", after)]:
+        jobs, stages, skipped, seconds = profile(spark, name, fn, df_bronze)
+        print(f"{name:<8} {jobs:>5} {stages:>7} {skipped:>8} {seconds:>8.2f}")
+
+    spark.stop()
+
+
+if __name__ == "__main__":
+    main()
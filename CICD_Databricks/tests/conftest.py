@@ -26,7 +26,7 @@ def spark_session():
     try:
         from pyspark.sql import SparkSession
         
-        spark = (
+        builder = (
             SparkSession.builder
             .master("local[2]")
             .appName("pytest-databricks-cicd")
@@ -35,9 +35,22 @@ def spark_session():
             .config("spark.sql.shuffle.partitions", "2")
             .config("spark.default.parallelism", "2")
             .config("spark.sql.execution.arrow.pyspark.enabled", "true")
-            .getOrCreate()
         )
         
+        # Delta Lake, when delta-spark is installed, for the notebook module tests
+        try:
+            from delta import configure_spark_with_delta_pip
+            
+            builder = configure_spark_with_delta_pip(
+                builder
+                .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension")
+                .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog")
+            )
+        except ImportError:
+            pass
+        
+        spark = builder.getOrCreate()
+        
         # Set log level to reduce noise
         spark.sparkContext.setLogLevel("WARN")
         
@@ -50,6 +63,42 @@ def spark_session():
         yield MagicMock()
 
 
+@pytest.fixture
+def delta_spark(spark_session):
+    """
+    The local Spark session, for tests that need Delta Lake tables.
+    Skips when PySpark or delta-spark is not available.
+    """
+    if isinstance(spark_session, MagicMock):
+        pytest.skip("PySpark is not available")
+    extensions = spark_session.conf.get("spark.sql.extensions", "")
+    if "DeltaSparkSessionExtension" not in extensions:
+        pytest.skip("delta-spark is not available")
+    return spark_session
+
+
+@pytest.fixture
+def notebook_module():
+    """
+    Imports a plain Python module that sits next to the notebooks,
+    e.g. notebook_module("bronze", "bronze_ingestion").
+    """
+    import importlib
+    import os
+    import sys
+    
+    def _import(layer, name):
+        folder = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..", "databricks_bundles", "src", "notebooks", layer,
+        )
+        if folder not in sys.path:
+            sys.path.insert(0, folder)
+        return importlib.import_module(name)
+    
+    return _import
+
+
 @pytest.fixture
 def mock_spark():
     """
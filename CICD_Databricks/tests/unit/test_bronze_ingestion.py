@@ -0,0 +1,255 @@
+# =============================================================================
+# Unit Tests - Incremental Bronze Ingestion
+# =============================================================================
+"""
+Tests for the exactly-once bronze ingestion module used by the
+ingest_sales_data notebook, against a local directory as the landing zone.
+"""
+
+import json
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def write_landing_file(folder, name, records):
+    """Writes records as JSON lines, the landing zone format."""
+    path = folder / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    return path
+
+
+@pytest.fixture
+def bronze(notebook_module):
+    return notebook_module("bronze", "bronze_ingestion")
+
+
+@pytest.fixture
+def spark(spark_session):
+    if isinstance(spark_session, MagicMock):
+        pytest.skip("PySpark is not available")
+    return spark_session
+
+
+@pytest.fixture
+def sales_schema():
+    from pyspark.sql.types import StructType, StructField, StringType, DoubleType, IntegerType
+
+    return StructType([
+        StructField("transaction_id", StringType(), False),
+        StructField("quantity", IntegerType(), True),
+        StructField("unit_price", DoubleType(), True),
+    ])
+
+
+@pytest.fixture
+def delta_db(delta_spark):
+    """A throwaway database for the bronze and manifest tables."""
+    name = f"test_bronze_{uuid.uuid4().hex[:8]}"
+    delta_spark.sql(f"CREATE DATABASE {name}")
+    yield name
+    delta_spark.sql(f"DROP DATABASE IF EXISTS {name} CASCADE")
+
+
+def records(start, count):
+    return [{"transaction_id": f"TXN{i:06d}", "quantity": 1, "unit_price": 10.0} for i in range(start, start + count)]
+
+
+# =============================================================================
+# Test: Landing Zone Listing
+# =============================================================================
+
+class TestListLandingFiles:
+    """Tests for listing the landing zone."""
+
+    @pytest.mark.unit
+    def test_lists_files_recursively_and_sorted(self, bronze, tmp_path):
+        """Verify nested files are listed with their sizes, in path order."""
+        b = write_landing_file(tmp_path, "2024/01/02/b.json", records(0, 2))
+        a = write_landing_file(tmp_path, "2024/01/01/a.json", records(2, 1))
+        listed = bronze.list_landing_files(str(tmp_path))
+        assert [f[0] for f in listed] == [str(a), str(b)]
+        assert [f[1] for f in listed] == [a.stat().st_size, b.stat().st_size]
+
+    @pytest.mark.unit
+    def test_skips_hidden_and_underscore_files(self, bronze, tmp_path):
+        """Verify files Spark would ignore are not planned for ingestion."""
+        write_landing_file(tmp_path, "a.json", records(0, 1))
+        write_landing_file(tmp_path, "_SUCCESS", [])
+        write_landing_file(tmp_path, ".a.json.crc", [])
+        write_landing_file(tmp_path, "_temporary/b.json", records(1, 1))
+        assert [f[0] for f in bronze.list_landing_files(str(tmp_path))] == [str(tmp_path / "a.json")]
+
+
+# =============================================================================
+# Test: Batch Metrics
+# =============================================================================
+
+class TestBatchMetrics:
+    """Tests for building the ingestion log record of a batch."""
+
+    @pytest.fixture
+    def commit(self):
+        from pyspark.sql import Row
+
+        return Row(version=7, timestamp=datetime(2024, 1, 1),
+                   operationMetrics={"numOutputRows": "5", "numFiles": "2", "numOutputBytes": "1024"})
+
+    @pytest.mark.unit
+    def test_counts_come_from_the_commit_and_the_observation(self, bronze, commit):
+        """Verify written counts are read from operationMetrics, corrupt records from the write."""
+        started, finished = datetime(2024, 1, 1, 0, 0), datetime(2024, 1, 1, 0, 1)
+        metrics = bronze.batch_metrics(3, "app-1", ["a.json", "b.json"], commit,
+                                       {"rows": 5, "corrupt_records": 1}, started, finished)
+        assert metrics == {
+            "batch_version": 3, "batch_id": "app-1", "table_version": 7, "files_read": 2,
+            "rows_written": 5, "files_written": 2, "bytes_written": 1024, "corrupt_records": 1,
+            "started_at": started, "finished_at": finished,
+        }
+
+    @pytest.mark.unit
+    def test_resumed_batch_has_no_observed_counts(self, bronze, commit):
+        """Verify a batch appended by an interrupted run still reports its commit's counts."""
+        metrics = bronze.batch_metrics(3, "app-2", ["a.json"], commit, {}, None, None)
+        assert (metrics["rows_written"], metrics["corrupt_records"]) == (5, None)
+
+
+# =============================================================================
+# Test: Commit Lookups
+# =============================================================================
+
+class TestCommitLookups:
+    """Tests for how often, and how far back, a run searches bronze's Delta history."""
+
+    @pytest.fixture
+    def run(self, spark, bronze, monkeypatch, tmp_path, sales_schema):
+        """Runs ingest_new_files with the Delta writes replaced; returns (lookups, writes)."""
+        from pyspark.sql import Row
+
+        lookups, writes, in_bronze = [], [], []
+        landing = write_landing_file(tmp_path, "a.json", records(0, 2))
+        commit = Row(version=3, timestamp=datetime(2024, 1, 1), operationMetrics={"numOutputRows": "2"})
+
+        def find_commit(spark, table, version, limit=None):
+            lookups.append(limit)
+            return commit if writes or in_bronze else None
+
+        def write_batch(df, table, version):
+            df.write.format("noop").mode("overwrite").save()
+            writes.append(version)
+
+        monkeypatch.setattr(bronze, "ensure_manifest", lambda *args: None)
+        monkeypatch.setattr(bronze, "commit_batch", lambda *args: None)
+        monkeypatch.setattr(bronze, "find_commit", find_commit)
+        monkeypatch.setattr(bronze, "write_batch", write_batch)
+
+        def _run(resumed, already_written=False):
+            in_bronze.extend([4] if already_written else [])
+            monkeypatch.setattr(bronze, "plan_batch", lambda *args: (4, [str(landing)], resumed))
+            result = bronze.ingest_new_files(spark, str(tmp_path), "bronze", "manifest", sales_schema, "test")
+            return result, lookups, writes
+
+        return _run
+
+    @pytest.mark.unit
+    def test_new_batch_looks_up_recent_commits_once(self, bronze, run):
+        """Verify a new batch is written without a history scan and found among recent commits."""
+        result, lookups, writes = run(resumed=False)
+        assert (lookups, writes) == ([bronze.RECENT_COMMITS], [4])
+        assert (result["table_version"], result["rows_written"]) == (3, 2)
+
+    @pytest.mark.unit
+    def test_resumed_batch_already_in_bronze_is_not_rewritten(self, run):
+        """Verify a resumed batch found in the full history is not appended again."""
+        result, lookups, writes = run(resumed=True, already_written=True)
+        assert (lookups, writes) == ([None], [])
+        assert result["table_version"] == 3
+
+
+# =============================================================================
+# Test: Exactly-Once Ingestion
+# =============================================================================
+
+@pytest.mark.integration
+class TestIncrementalIngestion:
+    """Integration tests for manifest-driven ingestion on local Spark + Delta."""
+
+    def ingest(self, spark, bronze, landing, db, schema):
+        return bronze.ingest_new_files(
+            spark, str(landing), f"{db}.raw_sales_transactions", f"{db}.ingested_files", schema, "test-batch",
+        )
+
+    def test_each_run_reads_only_new_files(self, delta_spark, bronze, tmp_path, delta_db, sales_schema):
+        """Verify a second run ingests only the files that landed since the first."""
+        write_landing_file(tmp_path, "day1/part-0.json", records(0, 3))
+        first = self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+        write_landing_file(tmp_path, "day2/part-0.json", records(3, 2))
+        second = self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+
+        assert (first["batch_version"], len(first["files"])) == (1, 1)
+        assert second["batch_version"] == 2
+        assert second["files"] == [str(tmp_path / "day2" / "part-0.json")]
+        assert delta_spark.table(f"{delta_db}.raw_sales_transactions").count() == 5
+
+    def test_rerun_without_new_files_is_a_no_op(self, delta_spark, bronze, tmp_path, delta_db, sales_schema):
+        """Verify re-running with nothing new appends nothing."""
+        write_landing_file(tmp_path, "part-0.json", records(0, 3))
+        self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+        again = self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+
+        assert again == {"batch_version": None, "files": []}
+        assert delta_spark.table(f"{delta_db}.raw_sales_transactions").count() == 3
+
+    def test_interrupted_batch_is_resumed_without_duplicates(self, delta_spark, bronze, tmp_path, delta_db,
+                                                             sales_schema):
+        """Verify a batch appended but not committed is not appended twice."""
+        table, manifest = f"{delta_db}.raw_sales_transactions", f"{delta_db}.ingested_files"
+        write_landing_file(tmp_path, "part-0.json", records(0, 4))
+
+        # a run that fails after the append, before the manifest commit
+        bronze.ensure_manifest(delta_spark, manifest)
+        version, paths, _ = bronze.plan_batch(delta_spark, manifest, str(tmp_path))
+        bronze.write_batch(bronze.read_files(delta_spark, paths, sales_schema), table, version)
+
+        # files landing meanwhile wait for the next batch
+        write_landing_file(tmp_path, "part-1.json", records(4, 1))
+        resumed = self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+        assert (resumed["batch_version"], resumed["files"]) == (version, paths)
+        assert delta_spark.table(table).count() == 4
+
+        following = self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+        assert following["files"] == [str(tmp_path / "part-1.json")]
+        assert delta_spark.table(table).count() == 5
+
+    def test_source_file_lineage(self, delta_spark, bronze, tmp_path, delta_db, sales_schema):
+        """Verify every bronze row records the landing file it came from."""
+        write_landing_file(tmp_path, "a.json", records(0, 2))
+        write_landing_file(tmp_path, "b.json", records(2, 1))
+        self.ingest(delta_spark, bronze, tmp_path, delta_db, sales_schema)
+
+        rows = delta_spark.table(f"{delta_db}.raw_sales_transactions").select("transaction_id", "_source_file")
+        by_file = {r.transaction_id: r._source_file.rsplit("/", 1)[-1] for r in rows.collect()}
+        assert by_file == {"TXN000000": "a.json", "TXN000001": "a.json", "TXN000002": "b.json"}
+
+    def test_batch_metrics_are_logged(self, delta_spark, bronze, tmp_path, delta_db, sales_schema):
+        """Verify each batch appends one ingestion log row, with corrupt records counted."""
+        landing = write_landing_file(tmp_path, "a.json", records(0, 3))
+        with open(landing, "a") as f:
+            f.write("{not json\n")
+        log_table = f"{delta_db}.ingestion_log"
+        result = bronze.ingest_new_files(
+            delta_spark, str(tmp_path), f"{delta_db}.raw_sales_transactions", f"{delta_db}.ingested_files",
+            sales_schema, "test-batch", log_table=log_table,
+        )
+
+        assert (result["files_read"], result["rows_written"], result["corrupt_records"]) == (1, 4, 1)
+        logged = delta_spark.table(log_table).collect()
+        assert len(logged) == 1
+        assert (logged[0].batch_version, logged[0].rows_written, logged[0].corrupt_records) == (1, 4, 1)
@@ -0,0 +1,305 @@
+# =============================================================================
+# Unit Tests - Incremental Silver Transformation
+# =============================================================================
+"""
+Tests for the bronze -> silver transformation module used by the
+transform_sales notebook.
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+BRONZE_SCHEMA = """
+    transaction_id STRING, customer_id STRING, product_id STRING, quantity INT,
+    unit_price DOUBLE, transaction_date TIMESTAMP, store_id STRING, payment_method STRING,
+    discount_amount DOUBLE, _corrupt_record STRING, _ingestion_timestamp TIMESTAMP,
+    _source_file STRING, _batch_id STRING
+"""
+
+
+def bronze_row(transaction_id, ingested_day, quantity=1, unit_price=10.0, corrupt=None):
+    return (
+        transaction_id, " cust01 ", "prod01", quantity, unit_price, datetime(2024, 1, 1, 12),
+        "store01", " CASH ", None, corrupt, datetime(2024, 1, ingested_day), "a.json", "test",
+    )
+
+
+@pytest.fixture
+def silver(notebook_module):
+    return notebook_module("silver", "silver_transform")
+
+
+@pytest.fixture
+def spark(spark_session):
+    if isinstance(spark_session, MagicMock):
+        pytest.skip("PySpark is not available")
+    return spark_session
+
+
+@pytest.fixture
+def delta_db(delta_spark):
+    """A throwaway database for the bronze, silver and state tables."""
+    name = f"test_silver_{uuid.uuid4().hex[:8]}"
+    delta_spark.sql(f"CREATE DATABASE {name}")
+    yield name
+    delta_spark.sql(f"DROP DATABASE IF EXISTS {name} CASCADE")
+
+
+# =============================================================================
+# Test: Cleaning and Deduplication
+# =============================================================================
+
+class TestCleanAndDedup:
+    """Tests for the silver cleaning rules and the per-key deduplication."""
+
+    @pytest.mark.unit
+    def test_clean_sales_applies_rules(self, spark, silver):
+        """Verify corrupt rows are dropped and fields are cleaned and derived."""
+        df = spark.createDataFrame(
+            [bronze_row("TXN1", 1, quantity=None, unit_price=2.5), bronze_row(None, 1, corrupt="{bad")],
+            BRONZE_SCHEMA,
+        )
+        rows = silver.clean_sales(df).collect()
+        assert len(rows) == 1
+        row = rows[0]
+        assert (row.customer_id, row.payment_method) == ("CUST01", "cash")
+        assert (row.quantity, row.discount_amount, row.net_amount) == (1, 0.0, 2.5)
+        assert str(row.transaction_date_only) == "2024-01-01"
+
+    @pytest.mark.unit
+    def test_dedup_keeps_latest_ingestion(self, spark, silver):
+        """Verify only the most recently ingested row of a transaction is kept."""
+        df = spark.createDataFrame(
+            [bronze_row("TXN1", 1, quantity=1), bronze_row("TXN1", 3, quantity=3), bronze_row("TXN2", 2)],
+            BRONZE_SCHEMA,
+        )
+        rows = silver.dedup_latest(df).collect()
+        assert sorted((r.transaction_id, r.quantity) for r in rows) == [("TXN1", 3), ("TXN2", 1)]
+        assert "_corrupt_record" not in silver.dedup_latest(df).columns
+
+
+# =============================================================================
+# Test: Quality Metrics
+# =============================================================================
+
+class TestQualityMetrics:
+    """Tests for the single-pass silver quality checks."""
+
+    @pytest.fixture
+    def deduped(self, spark, silver):
+        rows = [bronze_row("TXN1", 1), bronze_row("TXN1", 2), bronze_row("TXN2", 1, unit_price=-5.0)]
+        rows.append(("TXN3", None) + bronze_row("TXN3", 1)[2:])
+        rows.append(bronze_row(None, 1, corrupt="{bad"))
+        return silver.dedup_latest(silver.clean_sales(spark.createDataFrame(rows, BRONZE_SCHEMA)))
+
+    @pytest.mark.unit
+    def test_counts_every_check(self, silver, deduped):
+        """Verify each check is counted over the deduplicated increment, without corrupt rows."""
+        metrics, date_range = silver.quality_metrics(deduped)
+        assert metrics == {
+            "valid_input_records": 4, "total_records": 3, "null_customer_ids": 1,
+            "negative_amounts": 1, "future_dates": 0,
+        }
+        assert [str(d) for d in date_range] == ["2024-01-01", "2024-01-01"]
+
+    @pytest.mark.unit
+    def test_costs_no_more_than_one_count(self, spark, silver, deduped):
+        """Verify all checks together run the same Spark jobs as a single count()."""
+        sc = spark.sparkContext
+
+        def jobs(group, action):
+            sc.setJobGroup(group, group)
+            try:
+                action()
+            finally:
+                sc.setLocalProperty("spark.jobGroup.id", None)
+            return len(sc.statusTracker().getJobIdsForGroup(group))
+
+        # adaptive execution runs each shuffle stage as its own job
+        assert jobs("quality_metrics", lambda: silver.quality_metrics(deduped)) == jobs("count", deduped.count)
+
+    @pytest.mark.unit
+    def test_empty_increment(self, spark, silver):
+        """Verify an empty increment reports zeros rather than nulls."""
+        empty = silver.dedup_latest(silver.clean_sales(spark.createDataFrame([], BRONZE_SCHEMA)))
+        metrics, date_range = silver.quality_metrics(empty)
+        assert set(metrics.values()) == {0}
+        assert date_range == (None, None)
+
+
+# =============================================================================
+# Test: Merge Pruning
+# =============================================================================
+
+class TestMergePruning:
+    """Tests for the date-pruned silver MERGE and its metrics."""
+
+    @pytest.mark.unit
+    def test_condition_carries_the_date_range(self, silver):
+        """Verify the target is restricted to the increment's dates, keeping undated rows."""
+        from datetime import date
+
+        condition = silver.merge_condition((date(2024, 1, 1), date(2024, 1, 3)))
+        assert "BETWEEN DATE'2024-01-01' AND DATE'2024-01-03'" in condition
+        assert "target.transaction_date_only IS NULL" in condition
+        assert condition.endswith("target.transaction_id = source.transaction_id")
+
+    @pytest.mark.unit
+    def test_condition_without_dates_joins_on_key_only(self, silver):
+        """Verify an increment without dates falls back to the key join."""
+        assert silver.merge_condition((None, None)) == "target.transaction_id = source.transaction_id"
+
+    @pytest.mark.unit
+    def test_merge_metrics_from_commit(self, silver):
+        """Verify file and row counts are read from the MERGE's operationMetrics."""
+        from pyspark.sql import Row
+
+        commit = Row(version=4, operation="MERGE", operationMetrics={
+            "numTargetFilesAfterSkipping": "2", "numTargetFilesRemoved": "1", "numTargetFilesAdded": "2", "numTargetRowsCopied": "10",
+            "numTargetRowsUpdated": "3", "numTargetRowsInserted": "5", "numSourceRows": "8",
+        })
+        metrics = silver.merge_metrics(commit, files_in_table=12)
+        assert (metrics["table_version"], metrics["files_in_table"], metrics["files_scanned"]) == (4, 12, 2)
+        assert (metrics["files_removed"], metrics["files_added"], metrics["rows_copied"]) == (1, 2, 10)
+        assert metrics["scan_time_ms"] is None
+
+    @pytest.mark.unit
+    def test_merge_metrics_without_commit(self, silver):
+        """Verify a MERGE that wrote no commit is logged with empty counts."""
+        metrics = silver.merge_metrics(None, files_in_table=12)
+        assert (metrics["table_version"], metrics["files_in_table"], metrics["rows_inserted"]) == (None, 12, None)
+
+
+# =============================================================================
+# Test: Silver Layout
+# =============================================================================
+
+class TestSilverLayout:
+    """Tests for the one-time clustering migration and the OPTIMIZE step."""
+
+    def statements(self, mock_spark):
+        return [c.args[0] for c in mock_spark.sql.call_args_list]
+
+    @pytest.mark.unit
+    def test_existing_table_is_left_alone_by_default(self, silver, mock_spark):
+        """Verify a routine run never alters the layout of an existing table."""
+        mock_spark.catalog.tableExists.return_value = True
+        silver.ensure_silver_table(mock_spark, "silver.sales", MagicMock())
+        assert self.statements(mock_spark) == []
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("detail, altered", [
+        ({"partitionColumns": [], "clusteringColumns": []}, True),
+        ({"partitionColumns": [], "clusteringColumns": ["transaction_date_only"]}, False),
+        ({"partitionColumns": ["transaction_year"], "clusteringColumns": []}, False),
+    ])
+    def test_migration_clusters_only_unclustered_tables(self, silver, mock_spark, detail, altered):
+        """Verify migrate_layout adds CLUSTER BY to unpartitioned, unclustered tables only."""
+        mock_spark.catalog.tableExists.return_value = True
+        mock_spark.sql.return_value.first.return_value.asDict.return_value = detail
+        silver.ensure_silver_table(mock_spark, "silver.sales", MagicMock(), migrate_layout=True)
+        alters = [s for s in self.statements(mock_spark) if s.startswith("ALTER TABLE")]
+        assert alters == (["ALTER TABLE silver.sales CLUSTER BY (transaction_date_only, transaction_id)"]
+                          if altered else [])
+
+    @pytest.mark.unit
+    def test_optimize_returns_file_counts(self, silver, mock_spark):
+        """Verify OPTIMIZE runs on the silver table and reports the files it rewrote."""
+        metrics = mock_spark.sql.return_value.first.return_value.metrics
+        metrics.numFilesRemoved, metrics.numFilesAdded = 6, 1
+        assert silver.optimize_silver(mock_spark, "silver.sales") == (6, 1)
+        assert self.statements(mock_spark) == ["OPTIMIZE silver.sales"]
+
+
+# =============================================================================
+# Test: Incremental Processing
+# =============================================================================
+
+@pytest.mark.integration
+class TestIncrementalSilver:
+    """Integration tests for change-data-feed driven silver runs on local Spark + Delta."""
+
+    def run(self, spark, silver, db):
+        """One notebook run; returns the number of increment rows processed."""
+        source, target, state = f"{db}.bronze", f"{db}.silver", f"{db}.silver_state"
+        silver.ensure_state(spark, state)
+        df, version = silver.read_increment(spark, source, silver.read_state(spark, state, source))
+        if df is None:
+            return 0
+        processed = df.count()
+        deduped = silver.dedup_latest(silver.clean_sales(df))
+        _, date_range = silver.quality_metrics(deduped)
+        silver.merge_into_silver(spark, deduped.select(*silver.SILVER_COLUMNS), target, date_range)
+        silver.save_state(spark, state, source, version)
+        return processed
+
+    def append_bronze(self, spark, db, rows):
+        spark.createDataFrame(rows, BRONZE_SCHEMA).write.format("delta").mode("append").saveAsTable(f"{db}.bronze")
+
+    def test_each_run_reads_only_new_bronze_rows(self, delta_spark, silver, delta_db):
+        """Verify the second run processes only what was appended after the first."""
+        self.append_bronze(delta_spark, delta_db, [bronze_row("TXN1", 1), bronze_row("TXN2", 1)])
+        assert self.run(delta_spark, silver, delta_db) == 2
+        self.append_bronze(delta_spark, delta_db, [bronze_row("TXN3", 2)])
+        assert self.run(delta_spark, silver, delta_db) == 1
+        assert self.run(delta_spark, silver, delta_db) == 0
+        assert delta_spark.table(f"{delta_db}.silver").count() == 3
+
+    def test_later_ingestion_updates_silver(self, delta_spark, silver, delta_db):
+        """Verify a re-delivered transaction replaces the silver row only if newer."""
+        self.append_bronze(delta_spark, delta_db, [bronze_row("TXN1", 2, quantity=2)])
+        self.run(delta_spark, silver, delta_db)
+        self.append_bronze(delta_spark, delta_db, [bronze_row("TXN1", 1, quantity=1)])
+        self.run(delta_spark, silver, delta_db)
+        self.append_bronze(delta_spark, delta_db, [bronze_row("TXN1", 3, quantity=3)])
+        self.run(delta_spark, silver, delta_db)
+
+        rows = delta_spark.table(f"{delta_db}.silver").collect()
+        assert [(r.transaction_id, r.quantity) for r in rows] == [("TXN1", 3)]
+
+    def merge_day(self, spark, silver, target, transaction_id, day, ingested_day, quantity, pruned=True):
+        """MERGEs one transaction dated 2024-01-<day>; returns the merge metrics."""
+        from datetime import date
+
+        from pyspark.sql import functions as F
+
+        row = spark.createDataFrame([bronze_row(transaction_id, ingested_day, quantity=quantity)], BRONZE_SCHEMA)
+        row = silver.dedup_latest(silver.clean_sales(row))
+        row = row.withColumn("transaction_date_only", F.lit(date(2024, 1, day))).select(*silver.SILVER_COLUMNS)
+        date_range = (date(2024, 1, day), date(2024, 1, day)) if pruned else None
+        return silver.merge_into_silver(spark, row, target, date_range)
+
+    def file_of(self, spark, target, transaction_id):
+        rows = spark.table(target).where(f"transaction_id = '{transaction_id}'").select("_metadata.file_path")
+        return rows.first().file_path
+
+    def test_update_scans_and_rewrites_only_files_of_the_increments_dates(self, delta_spark, silver, delta_db):
+        """Verify updating a key of one date leaves another date's file unread and untouched."""
+        results = {}
+        for pruned in (True, False):
+            target = f"{delta_db}.silver_{'pruned' if pruned else 'key_only'}"
+            # one file per date: each MERGE writes its own
+            self.merge_day(delta_spark, silver, target, "TXN1", 1, ingested_day=1, quantity=1, pruned=pruned)
+            self.merge_day(delta_spark, silver, target, "TXN2", 2, ingested_day=1, quantity=1, pruned=pruned)
+            other_date_file = self.file_of(delta_spark, target, "TXN1")
+
+            metrics = self.merge_day(delta_spark, silver, target, "TXN2", 2, ingested_day=2, quantity=5,
+                                     pruned=pruned)
+            assert (metrics["rows_updated"], metrics["rows_inserted"]) == (1, 0)
+            assert (metrics["files_removed"], metrics["rows_copied"]) == (1, 0)
+            assert self.file_of(delta_spark, target, "TXN1") == other_date_file
+            rows = delta_spark.table(target).orderBy("transaction_id").collect()
+            assert [(r.transaction_id, r.quantity) for r in rows] == [("TXN1", 1), ("TXN2", 5)]
+            results[pruned] = metrics
+
+        # without the date predicate every file, the other date's included, is read to find matches
+        assert results[True]["files_scanned"] == 1
+        assert results[False]["files_scanned"] == results[False]["files_in_table"] >= 2
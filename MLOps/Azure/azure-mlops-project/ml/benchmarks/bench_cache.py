@@ -0,0 +1,42 @@
+# Benchmark: deployment/src/result_cache.ResultCache in front of a RandomForest
+# predict, for requests drawn (Zipf) from a pool of repeated feature vectors.
+#   python ml/benchmarks/bench_cache.py --requests 2000 --rows 16 --pool 5000
+import argparse, pathlib, sys, time
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "deployment" / "src"))
+from result_cache import ResultCache
+
+p = argparse.ArgumentParser()
+p.add_argument("--requests", type=int, default=2000)
+p.add_argument("--rows", type=int, default=16, help="rows per request")
+p.add_argument("--pool", type=int, default=5000, help="distinct feature vectors")
+p.add_argument("--zipf", type=float, default=1.2)
+p.add_argument("--cache-mb", type=float, nargs="+", default=[0.1, 1, 16])
+args = p.parse_args()
+
+from sklearn.ensemble import RandomForestClassifier
+rng = np.random.default_rng(0)
+pool = rng.normal(size=(args.pool, 20))
+model = RandomForestClassifier(n_estimators=100, random_state=0).fit(pool, rng.integers(0, 3, args.pool))
+picks = (rng.zipf(args.zipf, size=(args.requests, args.rows)) - 1) % args.pool
+requests = [pool[i] for i in picks]
+
+predicted = [0]
+def predict(X):
+    predicted[0] += len(X)
+    return model.predict(X)
+
+start = time.perf_counter()
+reference = [predict(X) for X in requests]
+base_s = time.perf_counter() - start
+print(f"{args.requests} requests x {args.rows} rows, pool {args.pool}, zipf {args.zipf}")
+print(f"{'cache MB':>8} {'seconds':>8} {'speedup':>8} {'hit rate':>8} {'predicted rows':>14} {'evictions':>9}  same")
+print(f"{'off':>8} {base_s:8.2f} {1.0:7.1f}x {0.0:8.2f} {predicted[0]:14d} {0:9d}  True")
+for mb in args.cache_mb:
+    cache, predicted[0] = ResultCache(max_bytes=int(mb * 2**20)), 0
+    start = time.perf_counter()
+    out = [cache.predict(predict, X, "1") for X in requests]
+    s, st = time.perf_counter() - start, cache.stats()
+    same = all(np.array_equal(a, b) for a, b in zip(out, reference))
+    print(f"{mb:8g} {s:8.2f} {base_s / s:7.1f}x {st['hit_rate']:8.2f} {predicted[0]:14d} {st['evictions']:9d}  {same}")
@@ -0,0 +1,89 @@
+# Benchmark: components/drift_check (per-feature PSI/KS, one pass over the profiled
+# numeric columns) vs the previous row-count-only implementation, which parsed every
+# column of the baseline and of every latest CSV just to compare len(). Both run as
+# separate processes on the same synthetic folder (numeric features plus string
+# and id columns, half of the features shifted).
+#   python ml/benchmarks/bench_drift_check.py --files 32 --rows 50000 --cols 20
+import argparse, json, os, pathlib, subprocess, sys, tempfile, time
+import numpy as np, pandas as pd
+
+ML = pathlib.Path(__file__).resolve().parents[1]
+DRIFT_CHECK = ML / "components" / "drift_check" / "src" / "drift_check.py"
+PATHS = [ML.parents[2] / "Local_workflow" / "src", ML / "components" / "common"]
+sys.path.insert(0, str(PATHS[0]))
+from drift import build_baseline_profile, save_baseline_profile
+
+# drift_check.py before the PSI/KS report, kept here as the reference
+ROW_COUNT_ONLY = """
+import argparse, pathlib, pandas as pd
+from ingest import find_csvs, read_partitions
+p = argparse.ArgumentParser()
+p.add_argument("--baseline"); p.add_argument("--latest-folder"); p.add_argument("--threshold", type=float)
+p.add_argument("--out"); p.add_argument("--workers", type=int)
+args = p.parse_args()
+n_baseline = len(pd.read_csv(args.baseline))
+n_latest = len(read_partitions(find_csvs(args.latest_folder), workers=args.workers))
+delta = abs(n_latest - n_baseline) / max(n_baseline, 1)
+sig = "DRIFT" if n_baseline == 0 or delta > args.threshold else "NO_DRIFT"
+pathlib.Path(args.out).write_text(sig)
+print("drift_signal=", sig)
+"""
+
+p = argparse.ArgumentParser()
+p.add_argument("--files", type=int, default=32)
+p.add_argument("--rows", type=int, default=50000)
+p.add_argument("--cols", type=int, default=20)
+p.add_argument("--text-cols", type=int, default=4, help="non-numeric columns the check does not need")
+p.add_argument("--workers", type=int, default=os.cpu_count())
+p.add_argument("--chunksize", type=int, default=100_000)
+args = p.parse_args()
+
+
+def frame(rng, rows, shift):
+    X = rng.normal(size=(rows, args.cols)) + np.where(np.arange(args.cols) % 2, shift, 0.0)
+    df = pd.DataFrame(X, columns=[f"f{i}" for i in range(args.cols)])
+    df.insert(0, "id", np.arange(rows))
+    for i in range(args.text_cols):
+        df[f"s{i}"] = rng.choice(["alpha", "beta", "gamma", "delta"], size=rows)
+    return df
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = pathlib.Path(tmp)
+    rng = np.random.default_rng(0)
+    # same row count as the latest folder: only the per-feature check sees the shift
+    baseline = frame(rng, args.rows * args.files, 0.0).drop(columns="id")
+    baseline.to_csv(tmp / "baseline.csv", index=False)
+    save_baseline_profile(build_baseline_profile(baseline), tmp / "profile.npz")
+    del baseline
+    for i in range(args.files):
+        part = tmp / "latest" / f"date=2024-01-{i % 28 + 1:02d}" / f"part-{i:04d}.csv"
+        part.parent.mkdir(parents=True, exist_ok=True)
+        frame(rng, args.rows, 0.3).to_csv(part, index=False)
+    (tmp / "row_count_only.py").write_text(ROW_COUNT_ONLY)
+    size_mb = sum(f.stat().st_size for f in (tmp / "latest").rglob("*.csv")) / 2**20
+    print(f"{args.files} files x {args.rows} rows x ({args.cols} numeric + {args.text_cols} text + id), {size_mb:.0f} MB")
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(map(str, PATHS)))
+    common = ["--latest-folder", str(tmp / "latest"), "--threshold", "0.15",
+              "--workers", str(args.workers)]
+    baseline, profile = ["--baseline", str(tmp / "baseline.csv")], ["--baseline-profile", str(tmp / "profile.npz")]
+    runs = [("row count only (before)", tmp / "row_count_only.py", baseline),
+            ("PSI/KS", DRIFT_CHECK, baseline),
+            ("PSI/KS --engine pyarrow", DRIFT_CHECK, baseline + ["--engine", "pyarrow"]),
+            (f"PSI/KS --chunksize {args.chunksize}", DRIFT_CHECK, baseline + ["--chunksize", str(args.chunksize)]),
+            ("PSI/KS, saved profile", DRIFT_CHECK, profile),
+            ("PSI/KS, profile + pyarrow", DRIFT_CHECK, profile + ["--engine", "pyarrow"])]
+    print(f"{'implementation':>28} {'seconds':>8} {'signal':>9} {'alerts':>7}")
+    for i, (label, script, extra) in enumerate(runs):
+        out = tmp / f"signal-{i}" / "signal.txt"
+        out.parent.mkdir()
+        start = time.perf_counter()
+        res = subprocess.run([sys.executable, str(script)] + common + ["--out", str(out)] + extra,
+                             env=env, capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if res.returncode != 0:
+            raise SystemExit(res.stderr[-2000:])
+        report = out.with_name("drift_report.json")
+        alerts = len(json.loads(report.read_text())["alerts"]) if report.exists() else "-"
+        print(f"{label:>28} {seconds:>8.2f} {out.read_text():>9} {alerts:>7}")
@@ -0,0 +1,35 @@
+# Benchmark: prep -> train handoff formats. Write + read time and file size of
+# a wide numeric frame as CSV (legacy), Parquet (default) and Arrow IPC (mmap read).
+#   python ml/benchmarks/bench_handoff.py --rows 200000 --cols 200
+import argparse, os, pathlib, tempfile, time
+import numpy as np, pandas as pd
+import pyarrow.feather as feather
+
+p = argparse.ArgumentParser()
+p.add_argument("--rows", type=int, default=200000)
+p.add_argument("--cols", type=int, default=200)
+args = p.parse_args()
+
+rng = np.random.default_rng(0)
+df = pd.DataFrame(rng.normal(size=(args.rows, args.cols)), columns=[f"f{i}" for i in range(args.cols)])
+df["label"] = rng.integers(0, 2, args.rows)
+
+formats = {
+    "csv": (lambda f: df.to_csv(f, index=False), pd.read_csv),
+    "parquet": (lambda f: df.to_parquet(f, index=False), pd.read_parquet),
+    "arrow-ipc": (lambda f: feather.write_feather(df, f, compression="uncompressed"),
+                  lambda f: feather.read_table(f, memory_map=True).to_pandas()),
+}
+
+with tempfile.TemporaryDirectory() as tmp:
+    print(f"{args.rows} rows x {args.cols + 1} cols")
+    print(f"{'format':<10} {'write s':>8} {'read s':>8} {'total s':>8} {'size MB':>8}")
+    for name, (write, read) in formats.items():
+        f = pathlib.Path(tmp) / f"train.{name}"
+        start = time.perf_counter()
+        write(f)
+        written = time.perf_counter()
+        back = read(f)
+        done = time.perf_counter()
+        assert back.shape == df.shape and (back.dtypes == df.dtypes).all(), name
+        print(f"{name:<10} {written - start:8.2f} {done - written:8.2f} {done - start:8.2f} {os.path.getsize(f) / 2**20:8.1f}")
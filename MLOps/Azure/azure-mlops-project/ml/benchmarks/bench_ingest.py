@@ -0,0 +1,44 @@
+# Benchmark: sequential pd.concat(pd.read_csv(...)) vs common/ingest.read_partitions
+# on a synthetic partitioned folder of many CSVs.
+#   python ml/benchmarks/bench_ingest.py --files 64 --rows 50000 --cols 20
+import argparse, os, pathlib, sys, tempfile, time
+import numpy as np, pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "components" / "common"))
+from ingest import find_csvs, read_partitions
+
+p = argparse.ArgumentParser()
+p.add_argument("--files", type=int, default=64)
+p.add_argument("--rows", type=int, default=50000)
+p.add_argument("--cols", type=int, default=20)
+p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+p.add_argument("--folder", help="reuse/create the synthetic folder here instead of a temp dir")
+args = p.parse_args()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    root = pathlib.Path(args.folder or tmp)
+    if not find_csvs(root):
+        rng = np.random.default_rng(0)
+        cols = [f"f{i}" for i in range(args.cols)]
+        for i in range(args.files):
+            part = root / f"date=2024-01-{i % 28 + 1:02d}" / f"part-{i:04d}.csv"
+            part.parent.mkdir(parents=True, exist_ok=True)
+            pd.DataFrame(rng.normal(size=(args.rows, args.cols)), columns=cols).to_csv(part, index=False)
+    csvs = find_csvs(root)
+    size_mb = sum(os.path.getsize(c) for c in csvs) / 2**20
+    print(f"{len(csvs)} files, {size_mb:.0f} MB")
+
+    base, ref = timed(lambda: pd.concat((pd.read_csv(c) for c in csvs), ignore_index=True))
+    print(f"{'sequential pd.concat':<28} {base:7.2f}s")
+    for engine in ["pandas", "pyarrow"]:
+        for w in sorted(set(args.workers)):
+            t, df = timed(lambda: read_partitions(csvs, workers=w, engine=engine))
+            assert df.shape == ref.shape
+            print(f"{engine + ' workers=' + str(w):<28} {t:7.2f}s  {base / t:5.1f}x")
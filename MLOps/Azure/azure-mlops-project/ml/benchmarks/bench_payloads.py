@@ -0,0 +1,58 @@
+# Benchmark: decode + predict time per request for each score.py input codec
+# (JSON, .npy, raw float tensor, Arrow IPC) at 1, 100 and 10,000 rows.
+#   python ml/benchmarks/bench_payloads.py --cols 4
+import argparse, io, json, pathlib, sys, tempfile, time
+import numpy as np, pyarrow as pa
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "deployment" / "src"))
+from payloads import ARROW, JSON, NPY, RAW, decode, encode_raw
+
+p = argparse.ArgumentParser()
+p.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+p.add_argument("--cols", type=int, default=4)
+p.add_argument("--repeat", type=int, default=20)
+args = p.parse_args()
+
+
+def to_npy(X):
+    f = io.BytesIO()
+    np.save(f, X)
+    return f.getvalue()
+
+
+def to_arrow(X):
+    table = pa.table({f"f{i}": X[:, i] for i in range(X.shape[1])})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+encoders = {
+    JSON: lambda X: json.dumps({"inputs": X.tolist()}),
+    NPY: to_npy,
+    RAW: encode_raw,
+    ARROW: to_arrow,
+}
+
+with tempfile.TemporaryDirectory() as tmp:
+    import mlflow.pyfunc, mlflow.sklearn
+    from sklearn.linear_model import LogisticRegression
+    rng = np.random.default_rng(0)
+    mlflow.sklearn.save_model(LogisticRegression().fit(rng.normal(size=(200, args.cols)), rng.integers(0, 2, 200)), tmp + "/m")
+    model = mlflow.pyfunc.load_model(tmp + "/m")
+
+    print(f"{'rows':>6} {'format':<36} {'bytes':>10} {'decode ms':>10} {'+predict ms':>12}")
+    for rows in args.rows:
+        X = rng.normal(size=(rows, args.cols))
+        for content_type, enc in encoders.items():
+            body = enc(X)
+            decode_s, total_s = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                Xd = decode(body, content_type)
+                mid = time.perf_counter()
+                model.predict(Xd)
+                decode_s.append(mid - start)
+                total_s.append(time.perf_counter() - start)
+            print(f"{rows:>6} {content_type:<36} {len(body):>10} {np.median(decode_s) * 1e3:>10.3f} {np.median(total_s) * 1e3:>12.3f}")
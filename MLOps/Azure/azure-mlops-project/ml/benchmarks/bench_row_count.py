@@ -0,0 +1,51 @@
+# Benchmark: counting the rows of a partitioned folder by parsing it
+# (len(read_partitions(...)), what the row-count drift check used to do) vs
+# common/ingest.count_folder_rows, which scans raw bytes for newlines (CSV) or
+# reads the row count from the footer (Parquet). The CSV case is run with plain
+# and with quoted text fields containing newlines.
+#   python ml/benchmarks/bench_row_count.py --files 32 --rows 50000 --cols 20
+import argparse, os, pathlib, sys, tempfile, time
+import numpy as np, pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "components" / "common"))
+from ingest import count_folder_rows, find_csvs, read_partitions
+
+p = argparse.ArgumentParser()
+p.add_argument("--files", type=int, default=32)
+p.add_argument("--rows", type=int, default=50000)
+p.add_argument("--cols", type=int, default=20)
+p.add_argument("--workers", type=int, default=os.cpu_count())
+args = p.parse_args()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def write_folder(root, quoted, fmt):
+    rng = np.random.default_rng(0)
+    for i in range(args.files):
+        df = pd.DataFrame(rng.normal(size=(args.rows, args.cols)), columns=[f"f{j}" for j in range(args.cols)])
+        if quoted:
+            df["note"] = rng.choice(["ok", "line one\nline two", 'said "hi"'], size=args.rows)
+        part = root / f"date=2024-01-{i % 28 + 1:02d}" / f"part-{i:04d}.{fmt}"
+        part.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(part, index=False) if fmt == "csv" else df.to_parquet(part, index=False)
+
+
+print(f"{args.files} files x {args.rows} rows x {args.cols} cols")
+print(f"{'folder':>14} {'MB':>6} {'parse s':>8} {'count s':>8} {'speedup':>8}  same count")
+for label, quoted, fmt in [("csv", False, "csv"), ("csv, quoted", True, "csv"), ("parquet", False, "parquet")]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp)
+        write_folder(root, quoted, fmt)
+        files = sorted(root.rglob(f"*.{fmt}"))
+        size_mb = sum(f.stat().st_size for f in files) / 2**20
+        if fmt == "csv":
+            parse_s, n_parsed = timed(lambda: len(read_partitions(find_csvs(root), workers=args.workers)))
+        else:
+            parse_s, n_parsed = timed(lambda: len(pd.concat(pd.read_parquet(f) for f in files)))
+        count_s, (n_counted, _) = timed(lambda: count_folder_rows(root, args.workers))
+        print(f"{label:>14} {size_mb:>6.0f} {parse_s:>8.2f} {count_s:>8.3f} {parse_s / count_s:>7.0f}x  {n_parsed == n_counted}")
@@ -0,0 +1,57 @@
+# Benchmark: components/prep and components/train run cold (cache miss) and again
+# on unchanged inputs (cache hit) with a filesystem --cache-dir, then after one
+# partition is rewritten (prep misses again). Each step is a separate process,
+# timed end to end as a pipeline would see it.
+#   python ml/benchmarks/bench_step_cache.py --files 32 --rows 50000 --cols 20
+import argparse, os, pathlib, re, subprocess, sys, tempfile, time
+import numpy as np, pandas as pd
+
+ML = pathlib.Path(__file__).resolve().parents[1]
+PREP = ML / "components" / "prep" / "src" / "prep.py"
+TRAIN = ML / "components" / "train" / "src" / "train.py"
+PATHS = [ML.parents[2] / "Local_workflow" / "src", ML / "components" / "common"]
+
+p = argparse.ArgumentParser()
+p.add_argument("--files", type=int, default=32)
+p.add_argument("--rows", type=int, default=50000)
+p.add_argument("--cols", type=int, default=20)
+p.add_argument("--fingerprint", default="stat", choices=["stat", "hash"])
+args = p.parse_args()
+
+
+def write_partition(path, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(args.rows, args.cols))
+    df = pd.DataFrame(X, columns=[f"f{i}" for i in range(args.cols)])
+    df["label"] = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path, index=False)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    tmp = pathlib.Path(tmp)
+    latest, cache = tmp / "latest", tmp / "cache"
+    for i in range(args.files):
+        write_partition(latest / f"day={i:03d}" / "part.csv", i)
+    (tmp / "signal.txt").write_text("DRIFT")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(map(str, PATHS)),
+               MLFLOW_TRACKING_URI=f"sqlite:///{tmp}/mlflow.db")
+    common = ["--cache-dir", str(cache), "--fingerprint", args.fingerprint]
+
+    def step(script, argv, tag):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, str(script)] + argv + common, env=env, capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if out.returncode != 0:
+            raise SystemExit(out.stderr[-2000:])
+        state = re.search(r"^step_cache= (\w+)", out.stdout, re.M).group(1)
+        print(f"{tag:>28} {script.stem:>6} {state:>5} {seconds:>8.2f}")
+
+    print(f"{args.files} CSVs x {args.rows} rows x {args.cols} cols, fingerprint={args.fingerprint}")
+    print(f"{'run':>28} {'step':>6} {'cache':>5} {'seconds':>8}")
+    for run, tag in enumerate(["cold", "unchanged inputs", "one partition rewritten"]):
+        if run == 2:
+            write_partition(latest / "day=000" / "part.csv", 10_000)
+        step(PREP, ["--latest-folder", str(latest), "--signal", str(tmp / "signal.txt"),
+                    "--out", str(tmp / f"prep-{run}")], tag)
+        step(TRAIN, ["--data", str(tmp / f"prep-{run}"), "--out", str(tmp / f"model-{run}")], tag)
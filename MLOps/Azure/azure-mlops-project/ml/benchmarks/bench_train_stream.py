@@ -0,0 +1,47 @@
+# Benchmark: peak memory and time of components/train in memory vs out of core
+# (--chunksize) on a synthetic train.parquet written row group by row group.
+# Each run is a separate process so ru_maxrss is per run.
+#   python ml/benchmarks/bench_train_stream.py --rows 2000000 --cols 20
+import argparse, os, pathlib, re, subprocess, sys, tempfile
+import numpy as np, pyarrow as pa, pyarrow.parquet as pq
+
+ML = pathlib.Path(__file__).resolve().parents[1]
+TRAIN = ML / "components" / "train" / "src" / "train.py"
+LOCAL_SRC = ML.parents[2] / "Local_workflow" / "src"
+
+p = argparse.ArgumentParser()
+p.add_argument("--rows", type=int, default=2_000_000)
+p.add_argument("--cols", type=int, default=20)
+p.add_argument("--partitions", type=int, default=20)
+p.add_argument("--chunksizes", type=int, nargs="+", default=[50_000, 200_000])
+args = p.parse_args()
+
+with tempfile.TemporaryDirectory() as tmp:
+    data = pathlib.Path(tmp) / "data"; data.mkdir()
+    rng = np.random.default_rng(0)
+    per_part = args.rows // args.partitions
+    writer = None
+    for part in range(args.partitions):
+        X = rng.normal(size=(per_part, args.cols))
+        cols = {f"f{i}": X[:, i] for i in range(args.cols)}
+        cols["label"] = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(np.int64)
+        cols["_partition"] = np.full(per_part, f"day={part:03d}/part.csv")
+        table = pa.table(cols)
+        writer = writer or pq.ParquetWriter(data / "train.parquet", table.schema)
+        writer.write_table(table)
+    writer.close()
+    dense_mb = args.rows * args.cols * 8 / 2**20
+    print(f"{args.rows} rows x {args.cols} features ({dense_mb:.0f} MB as dense float64), "
+          f"parquet {os.path.getsize(data / 'train.parquet') / 2**20:.0f} MB")
+
+    env = dict(os.environ, PYTHONPATH=str(LOCAL_SRC), MLFLOW_TRACKING_URI=f"sqlite:///{tmp}/mlflow.db")
+    print(f"{'mode':>22} {'peak RSS MB':>12} {'train s':>8} {'eval acc':>9}")
+    for label, extra in [("in memory", [])] + [(f"--chunksize {c}", ["--chunksize", str(c)]) for c in args.chunksizes]:
+        out = subprocess.run([sys.executable, str(TRAIN), "--data", str(data), "--out", f"{tmp}/model-{len(extra)}-{extra[-1:]}"]
+                             + extra, env=env, capture_output=True, text=True)
+        found = dict(re.findall(r"^(\w+)= *(\S+)$", out.stdout, re.M))
+        if out.returncode != 0:
+            print(out.stderr[-2000:])
+            continue
+        print(f"{label:>22} {float(found['peak_rss_mb']):>12.0f} {float(found['train_seconds']):>8.1f} "
+              f"{float(found['eval_acc']):>9.4f}")
@@ -0,0 +1,58 @@
+# Local load generator for deployment/src/score.py: N client threads call run()
+# with small JSON requests, with and without micro-batching.
+#   python ml/benchmarks/load_score.py --clients 16 --rows 1 --seconds 5
+import argparse, importlib, json, os, pathlib, sys, tempfile, threading, time
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "deployment" / "src"))
+
+p = argparse.ArgumentParser()
+p.add_argument("--clients", type=int, default=16)
+p.add_argument("--rows", type=int, default=1, help="rows per request")
+p.add_argument("--seconds", type=float, default=5.0)
+p.add_argument("--windows-ms", type=float, nargs="+", default=[0, 2, 5])
+args = p.parse_args()
+
+
+def save_model(path):
+    import mlflow.sklearn
+    from sklearn.datasets import load_iris
+    from sklearn.linear_model import LogisticRegression
+    X, y = load_iris(return_X_y=True)
+    mlflow.sklearn.save_model(LogisticRegression(max_iter=500).fit(X, y), path)
+
+
+def load(score, payload):
+    latencies, stop = [], time.monotonic() + args.seconds
+
+    def client():
+        mine = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            score.run(payload)
+            mine.append(time.perf_counter() - start)
+        latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.array(latencies)
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    save_model(os.path.join(tmp, "model"))
+    os.environ["AZUREML_MODEL_DIR"] = os.path.join(tmp, "model")
+    payload = json.dumps({"inputs": np.random.default_rng(0).normal(size=(args.rows, 4)).tolist()})
+    print(f"{args.clients} clients, {args.rows} rows/request, {args.seconds:.0f}s per run")
+    print(f"{'window ms':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'rows/batch':>10}")
+    for window in args.windows_ms:
+        os.environ["SCORE_BATCH_WINDOW_MS"] = str(window)
+        score = importlib.reload(importlib.import_module("score"))
+        score.init()
+        lat = load(score, payload)
+        b = score.batcher
+        per_batch = f"{b.rows / max(b.batches, 1):10.1f}" if b is not None else f"{args.rows:10d}"
+        print(f"{window:9.1f} {len(lat) / args.seconds:8.0f} {np.percentile(lat, 50) * 1e3:8.2f} "
+              f"{np.percentile(lat, 99) * 1e3:8.2f} {per_batch}")
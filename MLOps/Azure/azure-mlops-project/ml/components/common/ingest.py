@@ -0,0 +1,139 @@
+# Shared CSV ingestion for the prep and drift_check components
+# (pulled into each component's code snapshot through additional_includes).
+import os, pathlib, re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from glob import escape as glob_escape, glob
+from itertools import repeat
+
+import numpy as np, pandas as pd
+
+
+def find_csvs(root):
+    return sorted(glob(str(pathlib.Path(root) / "**/*.csv"), recursive=True))
+
+
+def _read_pandas(path, usecols=None, dtype=None, source_column=None):
+    df = pd.read_csv(path, usecols=usecols, dtype=dtype)
+    if source_column:
+        df[source_column] = path
+    return df
+
+
+def _read_arrow(path, usecols=None, dtype=None, source_column=None):
+    import pyarrow as pa
+    from pyarrow import csv
+    column_types = {c: pa.from_numpy_dtype(np.dtype(t)) for c, t in (dtype or {}).items()}
+    table = csv.read_csv(path, convert_options=csv.ConvertOptions(column_types=column_types, include_columns=usecols))
+    if source_column:
+        # dictionary-encoded: one copy of the path per file, not per row
+        indices = pa.array(np.zeros(table.num_rows, dtype=np.int32))
+        table = table.append_column(source_column, pa.DictionaryArray.from_arrays(indices, [path]))
+    return table
+
+
+# Read CSV partitions in parallel into one DataFrame.
+#  engine="pandas":  process pool of pd.read_csv (the C parser holds the GIL)
+#  engine="pyarrow": thread pool of pyarrow.csv readers (they release the GIL);
+#                    the Arrow tables are concatenated without copying and
+#                    converted to pandas once, freeing Arrow buffers as it goes
+# source_column, if given, is added holding each row's source path.
+def read_partitions(paths, workers=None, engine="pandas", usecols=None, dtype=None, source_column=None):
+    workers = workers or os.cpu_count()
+    if engine == "pyarrow":
+        import pyarrow as pa
+        with ThreadPoolExecutor(workers) as pool:
+            tables = list(pool.map(_read_arrow, paths, repeat(usecols), repeat(dtype), repeat(source_column)))
+        table = pa.concat_tables(tables, promote_options="permissive")
+        del tables
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    if engine != "pandas":
+        raise ValueError(f"unknown engine: {engine}")
+    if workers == 1 or len(paths) == 1:
+        frames = [_read_pandas(p, usecols, dtype, source_column) for p in paths]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            frames = list(pool.map(_read_pandas, paths, repeat(usecols), repeat(dtype), repeat(source_column), chunksize=max(len(paths) // (4 * workers), 1)))
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- row counts without parsing values ---
+# CSVs: count record-ending newlines in the raw bytes, read in large blocks.
+# Blocks without a quote are counted with bytes.count; blocks with quotes track
+# the open/closed state (a doubled "" toggles twice) so newlines inside quoted
+# fields are skipped. Parquet: num_rows from the footer. A folder with an MLTable
+# file is counted over the files its paths: entries select.
+COUNT_BLOCK = 8 << 20
+
+
+def count_csv_rows(path, header=True):
+    # data rows as pd.read_csv counts them (assuming no blank lines)
+    records, in_quotes, last = 0, False, b"\n"
+    with open(path, "rb", buffering=0) as f:
+        while block := f.read(COUNT_BLOCK):
+            last = block[-1:]
+            if not in_quotes and b'"' not in block:
+                records += block.count(b"\n")
+                continue
+            data = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.flatnonzero(data == ord('"'))
+            newlines = np.flatnonzero(data == ord("\n"))
+            # a newline ends a record when an even number of quotes precede it
+            # (counting those still open from earlier blocks)
+            before = np.searchsorted(quotes, newlines) + in_quotes
+            records += int(np.count_nonzero(before % 2 == 0))
+            in_quotes = (len(quotes) + in_quotes) % 2 == 1
+    if last != b"\n":
+        records += 1  # last record without a trailing newline
+    return max(records - int(header), 0)
+
+
+def mltable_files(root):
+    # data files selected by root/MLTable (file:, folder:, pattern: entries), or None.
+    # Relative entries are resolved against root, as MLTable does; remote URIs
+    # (azureml://, https://, abfss://, ...) cannot be counted locally and raise, and
+    # so does an entry that selects no file, rather than counting zero rows.
+    import yaml
+    spec = pathlib.Path(root) / "MLTable"
+    if not spec.exists():
+        return None
+    files = []
+    for entry in yaml.safe_load(spec.read_text()).get("paths", []):
+        kind = next((k for k in ("file", "folder", "pattern") if k in entry), None)
+        if kind is None:
+            raise ValueError(f"MLTable path entry without file, folder or pattern: {entry}")
+        value = str(entry[kind])
+        if value.startswith("file://"):
+            value = value[len("file://"):]
+        elif re.match(r"[A-Za-z][A-Za-z0-9+.-]*://", value):
+            raise ValueError(f"MLTable {kind} {value!r} is not a local path; mount or download it first")
+        if kind == "file":
+            found = [str(pathlib.Path(root) / value)] if (pathlib.Path(root) / value).is_file() else []
+        elif kind == "folder":
+            found = sorted(f for ext in ("csv", "parquet")
+                           for f in glob(f"{glob_escape(str(pathlib.Path(root) / value))}/**/*.{ext}", recursive=True))
+        else:
+            # the pattern is matched under root (absolute patterns are taken as-is)
+            found = sorted(str(pathlib.Path(root) / f) for f in glob(value, root_dir=root, recursive=True))
+        if not found:
+            raise FileNotFoundError(f"MLTable {kind} {value!r} matches no files under {root}")
+        files += found
+    return files
+
+
+def count_rows(path):
+    if str(path).endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    return count_csv_rows(path)
+
+
+def count_folder_rows(root, workers=None):
+    # total data rows of a CSV/Parquet folder (MLTable-aware) and the files counted
+    files = mltable_files(root)
+    if files is None:
+        files = find_csvs(root) + sorted(glob(str(pathlib.Path(root) / "**/*.parquet"), recursive=True))
+    if len(files) <= 1 or workers == 1:
+        return sum(map(count_rows, files)), files
+    # the byte scans release the GIL in read() and bytes.count
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        return sum(pool.map(count_rows, files)), files
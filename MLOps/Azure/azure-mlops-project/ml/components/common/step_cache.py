@@ -0,0 +1,100 @@
+# Content-addressed cache of component outputs, shared by prep and train
+# (pulled into each component's code snapshot through additional_includes).
+# The key hashes the step name, its arguments, the step's source files and every
+# input file (relative path + size + mtime, or the file contents with
+# how="hash"); a hit copies the cached output folder instead of recomputing it.
+# Every output that goes through the cache carries the key that produced it in
+# KEY_FILE, and a folder input that has one is identified by that key alone: AML
+# writes a step's output to a new path on every job, so the next step's key would
+# otherwise never repeat.
+# The cache is a plain folder: a local directory, or a blob container mounted
+# read-write by AML.
+import hashlib, json, os, pathlib, shutil, uuid
+
+CHUNK = 1 << 20
+KEY_FILE = "_step_key"
+
+
+def _files(path):
+    # a file, a folder (walked recursively) or an explicit {relative name: path}
+    if isinstance(path, dict):
+        return sorted((rel, pathlib.Path(f)) for rel, f in path.items())
+    path = pathlib.Path(path)
+    if path.is_file():
+        return [(path.name, path)]
+    return sorted((f.relative_to(path).as_posix(), f) for f in path.rglob("*") if f.is_file())
+
+
+def _file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _step_key(path):
+    if isinstance(path, dict):
+        return None
+    key_file = pathlib.Path(path) / KEY_FILE
+    return key_file.read_text().strip() if key_file.is_file() else None
+
+
+def fingerprint(step, inputs, args, how="stat", code=(), content=()):
+    # inputs: {name: file, folder or {relative name: path}, or None}; args: a
+    # JSON-serialisable dict; code: source files, always hashed by content since
+    # snapshot uploads do not keep mtimes; content: names of inputs hashed by
+    # content whatever how is (e.g. downloaded copies, which get fresh mtimes)
+    if how not in ("stat", "hash"):
+        raise ValueError(f"unknown fingerprint method: {how}")
+    h = hashlib.sha256()
+    h.update(json.dumps({"step": step, "args": args, "how": how}, sort_keys=True, default=str).encode())
+    for f in code:
+        h.update(f"\0code {pathlib.Path(f).name}\0{_file_digest(f)}\0".encode())
+    for name in sorted(inputs):
+        h.update(f"\0input {name}\0".encode())
+        if inputs[name] is None:
+            continue
+        step_key = _step_key(inputs[name])
+        if step_key:
+            h.update(f"{KEY_FILE}\0{step_key}\0".encode())
+            continue
+        for rel, f in _files(inputs[name]):
+            if how == "hash" or name in content:
+                h.update(f"{rel}\0{_file_digest(f)}\0".encode())
+            else:
+                st = f.stat()
+                h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+    return h.hexdigest()
+
+
+class StepCache:
+    def __init__(self, root):
+        self.root = pathlib.Path(root)
+
+    def _entry(self, key):
+        return self.root / key[:2] / key
+
+    def restore(self, key, out_dir):
+        # copy a cached output into out_dir; False on a miss
+        entry = self._entry(key)
+        if not (entry / "_SUCCESS").exists():
+            return False
+        shutil.copytree(entry / "output", out_dir, dirs_exist_ok=True)
+        (pathlib.Path(out_dir) / KEY_FILE).write_text(key)
+        return True
+
+    def store(self, key, out_dir, meta=None):
+        # copy to a temporary name, then rename: readers never see a partial entry
+        (pathlib.Path(out_dir) / KEY_FILE).write_text(key)
+        entry = self._entry(key)
+        if (entry / "_SUCCESS").exists():
+            return
+        tmp = entry.parent / f".{key}.{uuid.uuid4().hex}"
+        shutil.copytree(out_dir, tmp / "output")
+        (tmp / "meta.json").write_text(json.dumps(meta or {}, indent=2, default=str))
+        (tmp / "_SUCCESS").touch()
+        try:
+            os.rename(tmp, entry)
+        except OSError:  # another run stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -1,31 +1,124 @@
-import argparse, pathlib, pandas as pd
-from glob import glob
+import argparse, json, pathlib, time, pandas as pd
+from ingest import count_csv_rows, count_folder_rows, find_csvs, read_partitions
+from drift import build_baseline_profile, load_baseline_profile
+from drift_stream import StreamingDrift, summarise_partitions
+
+# Per-feature PSI/KS of the latest folder against the baseline (Local_workflow
+# drift.py). The baseline is reduced to a profile once (or a precomputed profile is
+# loaded); the latest folder is read in a single pass, parsing only the profiled
+# numeric columns as float64, and the row count for the volume check comes from
+# the same pass. Both paths accumulate exact PSI/KS counts (drift_stream), which
+# is also cheaper than sorting the whole folder per column. DRIFT if any feature
+# drifts, a profiled column is missing, or the row count moved by more than
+# --threshold. --rows-only keeps just the volume check and counts rows without
+# parsing: newlines in the raw CSV bytes, Parquet footers, MLTable paths.
+
+# rows per StreamingDrift.update on the in-memory path: bounds the sort buffers
+UPDATE_ROWS = 100_000
+
+
+def read_numeric_baseline(path):
+    # the numeric columns are picked from a sample, then only those are parsed, as
+    # float64; a column that turns non-numeric past the sample is skipped instead of
+    # failing the read -> (DataFrame, skipped columns)
+    numeric = pd.read_csv(path, nrows=1000).select_dtypes("number").columns.tolist()
+    try:
+        return pd.read_csv(path, usecols=numeric, dtype=dict.fromkeys(numeric, "float64")), []
+    except ValueError:
+        df = pd.read_csv(path, usecols=numeric, low_memory=False).select_dtypes("number")
+        return df.astype("float64"), [c for c in numeric if c not in df.columns]
+
 
 p = argparse.ArgumentParser()
-p.add_argument("--baseline", required=True)
+p.add_argument("--baseline")
+p.add_argument("--baseline-profile", help="profile .npz from drift.build_baseline_profile; replaces --baseline")
 p.add_argument("--latest-folder", required=True)
-p.add_argument("--threshold", type=float, required=True)
+p.add_argument("--threshold", type=float, required=True, help="max relative change in row count")
+p.add_argument("--psi-threshold", type=float, default=0.1)
+p.add_argument("--ks-pvalue", type=float, default=0.05, help="KS p-value below which a feature drifts")
 p.add_argument("--out", required=True)
+p.add_argument("--report", help="JSON report (default: drift_report.json next to --out)")
+p.add_argument("--chunksize", type=int, help="stream the latest CSVs in chunks of this many rows")
+p.add_argument("--workers", type=int, help="parallel CSV readers (default: all cores)")
+p.add_argument("--engine", default="pandas", choices=["pandas", "pyarrow"])
+p.add_argument("--rows-only", nargs="?", const=True, default=False, type=lambda v: v.lower() == "true",
+               help="only compare row counts, counted without parsing values")
 args = p.parse_args()
+if not args.baseline and not args.baseline_profile:
+    p.error("one of --baseline or --baseline-profile is required")
+
+start = time.perf_counter()
+features, alerts, missing, skipped = {}, [], [], []
+if args.rows_only:
+    # Fast path: no values are parsed on either side
+    n_baseline = load_baseline_profile(args.baseline_profile)["n_rows"] if args.baseline_profile else count_csv_rows(args.baseline)
+    n_latest, files = count_folder_rows(args.latest_folder, args.workers)
+    if not files:
+        raise SystemExit("No CSV or Parquet files found under latest folder.")
+else:
+    if args.baseline_profile:
+        # Precomputed profile: the raw baseline is never loaded
+        profile = load_baseline_profile(args.baseline_profile)
+    else:
+        # Single file data asset
+        baseline, skipped = read_numeric_baseline(args.baseline)
+        if skipped:
+            print("non-numeric baseline columns skipped:", skipped)
+        profile = build_baseline_profile(baseline)
+        del baseline
+    n_baseline = profile["n_rows"]
 
-# Read baseline (single file data asset)
-b = pd.read_csv(args.baseline)
+    # Read latest: support MLTable/partitioned folders with multiple CSVs
+    csvs = find_csvs(args.latest_folder)
+    if not csvs:
+        raise SystemExit("No CSVs found under latest folder.")
+    header = set(pd.read_csv(csvs[0], nrows=0).columns)
+    columns = [c for c in profile["columns"] if c in header]
+    missing = [c for c in profile["columns"] if c not in header]
+    if not columns:
+        raise SystemExit("None of the baseline's numeric columns are in the latest data.")
+    dtype = dict.fromkeys(columns, "float64")
 
-# Read latest: support MLTable/partitioned folders with multiple CSVs
-latest_root = pathlib.Path(args.latest_folder)
-csvs = sorted(glob(str(latest_root / "**/*.csv"), recursive=True))
-if not csvs:
-    raise SystemExit("No CSVs found under latest folder.")
-l = pd.concat((pd.read_csv(p) for p in csvs), ignore_index=True)
+    if args.chunksize:
+        # Streaming: memory is bounded by the chunk size, not by the folder size;
+        # one accumulator per file in a process pool, merged exactly at the end
+        acc = summarise_partitions([[p] for p in csvs], lambda: StreamingDrift(profile, columns), args.chunksize, args.workers)
+        n_latest = acc.rows
+    else:
+        l = read_partitions(csvs, workers=args.workers, engine=args.engine, usecols=columns, dtype=dtype)
+        acc = StreamingDrift(profile, columns)
+        for i in range(0, len(l), UPDATE_ROWS):
+            acc.update(l.iloc[i:i + UPDATE_ROWS])
+        n_latest = len(l)
+        del l
+    features, alerts = acc.report(args.psi_threshold, args.ks_pvalue)
+    files = csvs
 
-# Toy drift metric: size delta ratio
-if len(b) == 0:
-    sig = "DRIFT"
-else:
-    delta = abs(len(l) - len(b)) / max(len(b), 1)
-    sig = "DRIFT" if delta > args.threshold else "NO_DRIFT"
+delta = abs(n_latest - n_baseline) / max(n_baseline, 1)
+reasons = [f"feature drift: {', '.join(alerts)}"] if alerts else []
+if missing:
+    reasons.append(f"missing columns: {', '.join(missing)}")
+if n_baseline == 0 or delta > args.threshold:
+    reasons.append(f"row count changed by {delta:.1%}")
+sig = "DRIFT" if reasons else "NO_DRIFT"
+print("feature_drift_alerts=", alerts)
 
 out = pathlib.Path(args.out)
 out.parent.mkdir(parents=True, exist_ok=True)
 out.write_text(sig)
+report_path = pathlib.Path(args.report) if args.report else out.with_name("drift_report.json")
+report_path.parent.mkdir(parents=True, exist_ok=True)
+report_path.write_text(json.dumps({
+    "signal": sig,
+    "reasons": reasons,
+    "rows_only": args.rows_only,
+    "rows": {"baseline": n_baseline, "latest": n_latest, "delta": delta},
+    "thresholds": {"rows": args.threshold, "psi": args.psi_threshold, "ks_pvalue": args.ks_pvalue},
+    "alerts": alerts,
+    "missing_columns": missing,
+    "skipped_columns": skipped,
+    "features": features,
+    "files": len(files),
+    "seconds": time.perf_counter() - start,
+}, indent=2))
 print("drift_signal=", sig)
@@ -1,10 +1,31 @@
 import argparse, sys, pathlib, pandas as pd
-from glob import glob
+from ingest import find_csvs, read_partitions
+
+# In the parquet handoff every row keeps the CSV partition it came from (path
+# relative to the latest folder, size and mtime), so train --incremental can skip
+# partitions it has already seen; a file rewritten at the same path is a new
+# partition. The csv handoff is for older train components, which would read the
+# extra column as a feature, so it keeps the input columns only.
+PARTITION_COLUMN = "_partition"
+
+
+def partition_id(path, rel):
+    st = pathlib.Path(path).stat()
+    return f"{rel}@{st.st_size}-{st.st_mtime_ns}"
+
 
 p = argparse.ArgumentParser()
 p.add_argument("--latest-folder", required=True)
 p.add_argument("--signal", required=True)
 p.add_argument("--out", required=True)
+p.add_argument("--chunksize", type=int, help="stream the CSVs in chunks of this many rows")
+p.add_argument("--workers", type=int, help="parallel CSV readers (default: all cores)")
+p.add_argument("--engine", default="pandas", choices=["pandas", "pyarrow"])
+p.add_argument("--format", default="parquet", choices=["parquet", "csv"],
+               help="handoff to train: parquet (keeps dtypes and partitions) or csv for older train components")
+p.add_argument("--cache-dir", help="step cache folder; reuse the output of an identical earlier run")
+p.add_argument("--fingerprint", default="stat", choices=["stat", "hash"],
+               help="identify input CSVs by size+mtime (stat) or by content (hash)")
 args = p.parse_args()
 
 sig = pathlib.Path(args.signal).read_text().strip() if pathlib.Path(args.signal).exists() else "NO_DRIFT"
@@ -13,13 +34,57 @@ if sig != "DRIFT":
     print("No drift detected; stopping retrain path.", file=sys.stderr)
     sys.exit(2)
 
-root = pathlib.Path(args.latest_folder)
-csvs = sorted(glob(str(root / "**/*.csv"), recursive=True))
+csvs = find_csvs(args.latest_folder)
 if not csvs:
     raise SystemExit("No CSVs found for prep.")
-df = pd.concat((pd.read_csv(p) for p in csvs), ignore_index=True).dropna()
-
+rel = {p: pathlib.Path(p).relative_to(args.latest_folder).as_posix() for p in csvs}
+partition = {p: partition_id(p, rel[p]) for p in csvs}
 out = pathlib.Path(args.out)
+tag_partitions = args.format == "parquet"
+
+if args.cache_dir:
+    # same CSVs, same output-affecting arguments and same code: reuse the output
+    from step_cache import StepCache, fingerprint
+    cache = StepCache(args.cache_dir)
+    key_args = {k: v for k, v in vars(args).items() if k not in ("latest_folder", "signal", "out", "cache_dir", "workers")}
+    key = fingerprint("prep", {"latest_folder": {rel[p]: p for p in csvs}}, key_args,
+                      args.fingerprint, code=[__file__, sys.modules["ingest"].__file__])
+    if cache.restore(key, out):
+        print("step_cache= hit", key)
+        sys.exit(0)
+    print("step_cache= miss", key)
 out.mkdir(parents=True, exist_ok=True)
-df.to_csv(out / "train.csv", index=False)
-print("Prepared rows:", len(df))
+
+if args.chunksize:
+    # Streaming: append chunk by chunk so the folder never has to fit in memory
+    # (partitions must share one column layout)
+    rows, writer = 0, None
+    if args.format == "parquet":
+        import pyarrow as pa, pyarrow.parquet as pq
+    chunks = ((path, c) for path in csvs for c in pd.read_csv(path, chunksize=args.chunksize))
+    for i, (path, chunk) in enumerate(chunks):
+        chunk = chunk.dropna()
+        if tag_partitions:
+            chunk[PARTITION_COLUMN] = partition[path]
+        if args.format == "csv":
+            chunk.to_csv(out / "train.csv", mode="w" if i == 0 else "a", header=i == 0, index=False)
+        else:
+            table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+            writer = writer or pq.ParquetWriter(out / "train.parquet", table.schema)
+            writer.write_table(table)
+        rows += len(chunk)
+    if writer is not None:
+        writer.close()
+else:
+    df = read_partitions(csvs, workers=args.workers, engine=args.engine,
+                         source_column=PARTITION_COLUMN if tag_partitions else None).dropna()
+    if tag_partitions:
+        df[PARTITION_COLUMN] = df[PARTITION_COLUMN].map(partition).astype(str)
+    if args.format == "csv":
+        df.to_csv(out / "train.csv", index=False)
+    else:
+        df.to_parquet(out / "train.parquet", index=False)
+    rows = len(df)
+print("Prepared rows:", rows)
+if args.cache_dir:
+    cache.store(key, out, {"step": "prep", "rows": rows, "csvs": len(csvs)})
@@ -0,0 +1,99 @@
+# Out-of-core training for train.py --chunksize: every pass re-reads the prepared
+# data chunk by chunk (Parquet record batches or CSV chunks), so memory is bounded
+# by the chunk size rather than by the dataset. The evaluation rows are picked by
+# hashing each row's ordinal in the file, so the split is the same on every pass
+# without ever holding the row ids in memory.
+import pathlib
+
+import numpy as np, pandas as pd
+
+HASH_BUCKETS = 10_000
+
+
+def iter_chunks(data_dir, chunksize):
+    # yields (offset, DataFrame) with offset the file ordinal of the chunk's first row
+    p_in = pathlib.Path(data_dir) / "train.parquet"
+    if p_in.exists():
+        import pyarrow.parquet as pq
+        # pre-buffering and threaded reads fetch whole row groups of every column
+        # ahead, several times the chunk in memory; read one batch at a time
+        pf = pq.ParquetFile(p_in, pre_buffer=False)
+        batches = (b.to_pandas() for b in pf.iter_batches(batch_size=chunksize, use_threads=False))
+    else:
+        batches = pd.read_csv(p_in.with_suffix(".csv"), chunksize=chunksize)
+    offset = 0
+    for chunk in batches:
+        yield offset, chunk
+        offset += len(chunk)
+
+
+def eval_mask(row_ids, test_size):
+    buckets = pd.util.hash_array(np.asarray(row_ids, dtype=np.uint64)) % HASH_BUCKETS
+    return buckets < int(test_size * HASH_BUCKETS)
+
+
+class ChunkReader:
+    # Turns each chunk into (X, y, is_eval) with the same feature columns as the
+    # first chunk (or the given ones), skipping partitions the model has already
+    # incorporated.
+    def __init__(self, data_dir, chunksize, test_size=0.25, skip_partitions=(), features=None,
+                 partition_column="_partition"):
+        self.data_dir = data_dir
+        self.chunksize = chunksize
+        self.test_size = test_size
+        self.skip = set(skip_partitions)
+        self.features = features
+        self.partition_column = partition_column
+        self.partitions = set()
+
+    def __iter__(self):
+        for offset, df in iter_chunks(self.data_dir, self.chunksize):
+            row_ids = offset + np.arange(len(df))
+            if self.partition_column in df.columns:
+                parts = df[self.partition_column].astype(str)
+                keep = ~parts.isin(self.skip).to_numpy()
+                self.partitions.update(parts[keep].unique())
+                df, row_ids = df[keep], row_ids[keep]
+            if len(df) == 0:
+                continue
+            found = [c for c in df.select_dtypes(include=[np.number]).columns if c != "label"]
+            if self.features is None:
+                self.features = found
+            elif found != self.features:
+                raise SystemExit(f"Feature columns changed: {self.features} -> {found}")
+            X = df[self.features].fillna(0).to_numpy(dtype=float)
+            # same fallback labels as the in-memory path when there is no label column
+            y = df["label"].to_numpy() if "label" in df.columns else (row_ids % 2).astype(int)
+            yield X, y, eval_mask(row_ids, self.test_size)
+
+
+def fit_streaming(clf, reader, epochs=5, seed=42):
+    # clf: Pipeline(scale=StandardScaler, sgd=<partial_fit estimator>), fresh or
+    # continued. Pass 1 updates the scaler and collects the labels, then epochs
+    # partial_fit passes, then one pass to score the held-out rows.
+    scaler, sgd = clf.named_steps["scale"], clf.named_steps["sgd"]
+    labels, n_train = set(), 0
+    for X, y, is_eval in reader:
+        if (~is_eval).any():
+            scaler.partial_fit(X[~is_eval])
+        labels.update(np.unique(y[~is_eval]).tolist())
+        n_train += int((~is_eval).sum())
+    if n_train == 0:
+        return 0, 0, float("nan")
+    if hasattr(sgd, "classes_") and not labels <= set(sgd.classes_.tolist()):
+        raise SystemExit("New labels appeared since the previous model; retrain without --incremental.")
+    classes = None if hasattr(sgd, "classes_") else np.array(sorted(labels))
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        for X, y, is_eval in reader:
+            X, y = X[~is_eval], y[~is_eval]
+            if len(X):
+                order = rng.permutation(len(X))
+                sgd.partial_fit(scaler.transform(X[order]), y[order], classes=classes)
+                classes = None
+    correct = n_eval = 0
+    for X, y, is_eval in reader:
+        if is_eval.any():
+            correct += int((clf.predict(X[is_eval]) == y[is_eval]).sum())
+            n_eval += int(is_eval.sum())
+    return n_train, n_eval, correct / n_eval if n_eval else float("nan")
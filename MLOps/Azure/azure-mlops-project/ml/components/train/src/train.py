@@ -1,32 +1,170 @@
-import argparse, pathlib, os
+import argparse, json, pathlib, os, resource, sys, time
 import numpy as np, pandas as pd
 import mlflow, mlflow.sklearn
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from batch_logging import BatchLogger
+
+# prep tags every row with its source partition; incremental state is kept next
+# to the saved model so the next run knows which partitions it already learned
+PARTITION_COLUMN = "_partition"
+STATE_FILE = "partitions.json"
 
 p = argparse.ArgumentParser()
 p.add_argument("--data", required=True)
 p.add_argument("--out", required=True)
+p.add_argument("--incremental", nargs="?", const=True, default=False, type=lambda v: v.lower() == "true",
+               help="continue the previous SGD model on partitions it has not seen yet")
+p.add_argument("--previous-model", help="previous model_dir (folder) or models:/<name>/<version|latest> URI")
+p.add_argument("--epochs", type=int, default=5, help="partial_fit passes over the new partitions")
+p.add_argument("--chunksize", type=int, help="out-of-core: stream the data in chunks of this many rows (SGD)")
+p.add_argument("--cache-dir", help="step cache folder; reuse the model of an identical earlier run")
+p.add_argument("--fingerprint", default="stat", choices=["stat", "hash"],
+               help="identify input files by size+mtime (stat) or by content (hash)")
 args = p.parse_args()
 
-p_in = pathlib.Path(args.data) / "train.csv"
-df = pd.read_csv(p_in)
 
-if "label" in df.columns:
-    y = df["label"].values
-    X = df.drop(columns=["label"]).select_dtypes(include=[np.number]).fillna(0).values
+def resolve_previous(ref):
+    # models:/ URIs are downloaded, so the cache key covers the model they point at
+    if not ref:
+        return None
+    return pathlib.Path(mlflow.artifacts.download_artifacts(ref) if ref.startswith("models:/") else ref)
+
+
+def load_previous(path):
+    # -> (sklearn model, state dict) or (None, None) when there is nothing to continue
+    if path is None:
+        return None, None
+    state_path = path / STATE_FILE
+    if not state_path.exists():
+        print(f"No {STATE_FILE} in previous model; starting from scratch.")
+        return None, None
+    state = json.loads(state_path.read_text())
+    if not state.get("incremental"):
+        print("Previous model was not trained incrementally; starting from scratch.")
+        return None, None
+    return mlflow.sklearn.load_model(str(path)), state
+
+
+def new_sgd_model():
+    return Pipeline([("scale", StandardScaler()), ("sgd", SGDClassifier(loss="log_loss", random_state=42))])
+
+
+def features_and_labels(df):
+    df = df.drop(columns=[PARTITION_COLUMN], errors="ignore")
+    if "label" in df.columns:
+        y = df["label"].values
+        X = df.drop(columns=["label"]).select_dtypes(include=[np.number]).fillna(0)
+    else:
+        X = df.select_dtypes(include=[np.number]).fillna(0)
+        y = (np.arange(len(X)) % 2).astype(int)
+    return X, y
+
+
+previous = resolve_previous(args.previous_model) if args.incremental else None
+out_dir = pathlib.Path(args.out)
+
+if args.cache_dir:
+    # same data, previous model, arguments and code: reuse the saved model, no new run
+    from step_cache import StepCache, fingerprint
+    cache = StepCache(args.cache_dir)
+    key_args = {k: v for k, v in vars(args).items() if k not in ("data", "out", "previous_model", "cache_dir")}
+    # prep's output is identified by its own step key; a downloaded models:/ copy
+    # has fresh mtimes, so it is hashed by content unless train stored it with a key
+    key = fingerprint("train", {"data": args.data, "previous_model": previous}, key_args, args.fingerprint,
+                      code=[__file__, sys.modules["batch_logging"].__file__,
+                            pathlib.Path(__file__).with_name("stream_train.py")],
+                      content=["previous_model"] if str(args.previous_model).startswith("models:/") else [])
+    if cache.restore(key, out_dir):
+        print("step_cache= hit", key)
+        sys.exit(0)
+    print("step_cache= miss", key)
+
+clf = state = None
+if args.incremental:
+    clf, state = load_previous(previous)
+seen = sorted(state["partitions"]) if state else []
+
+start = time.perf_counter()  # read + fit, excluding loading the previous model
+if args.chunksize:
+    # Out-of-core: the data is streamed for every pass and never held in memory
+    from stream_train import ChunkReader, fit_streaming
+    reader = ChunkReader(args.data, args.chunksize, skip_partitions=seen, features=state["features"] if state else None)
+    clf = clf or new_sgd_model()
+    n_train, n_eval, acc = fit_streaming(clf, reader, args.epochs)
+    if n_train == 0 and state is None:
+        raise SystemExit("No rows to train on.")
+    new = sorted(reader.partitions)
+    print(f"streaming: {len(new)} new partitions ({len(seen)} already incorporated), {n_train} train rows")
+    new_state = {"incremental": True, "features": reader.features or state["features"],
+                 "partitions": sorted(set(seen) | set(new))}
 else:
-    X = df.select_dtypes(include=[np.number]).fillna(0).values
-    y = (np.arange(len(X)) % 2).astype(int)
+    # prep hands over train.parquet (train.csv with prep --format csv); partitions the
+    # previous model already learned are filtered out while reading
+    p_in = pathlib.Path(args.data) / "train.parquet"
+    if p_in.exists():
+        df = pd.read_parquet(p_in, filters=[(PARTITION_COLUMN, "not in", seen)] if seen else None)
+    else:
+        df = pd.read_csv(p_in.with_suffix(".csv"))
+        if seen and PARTITION_COLUMN in df.columns:
+            df = df[~df[PARTITION_COLUMN].isin(seen)]
+    new = sorted(df[PARTITION_COLUMN].unique()) if PARTITION_COLUMN in df.columns else []
 
-Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.25, random_state=42)
-clf = LogisticRegression(max_iter=500).fit(Xtr, ytr)
-acc = float(accuracy_score(yte, clf.predict(Xte)))
+    if args.incremental:
+        if PARTITION_COLUMN not in df.columns:
+            raise SystemExit(f"--incremental needs the {PARTITION_COLUMN} column written by prep --format parquet.")
+        X, y = features_and_labels(df)
+        if clf is not None and list(X.columns) != state["features"]:
+            raise SystemExit(f"Feature columns changed since the previous model: {state['features']} -> {list(X.columns)}")
+        if clf is None and len(X) == 0:
+            raise SystemExit("No rows to train on.")
+        if clf is None:
+            clf = new_sgd_model()
+        elif not set(np.unique(y)) <= set(clf.classes_):
+            raise SystemExit("New labels appeared since the previous model; retrain without --incremental.")
+        print(f"incremental: {len(new)} new partitions ({len(seen)} already incorporated), {len(X)} rows")
+        if len(X) == 0:
+            Xtr = Xte = X.values
+            ytr = yte = y
+        else:
+            Xtr, Xte, ytr, yte = train_test_split(X.values, y, test_size=0.25, random_state=42)
+            # Pipeline has no partial_fit; update the scaler statistics, then the model
+            scaler, sgd = clf.named_steps["scale"], clf.named_steps["sgd"]
+            scaler.partial_fit(Xtr)
+            Xtr_scaled, rng = scaler.transform(Xtr), np.random.default_rng(42)
+            classes = None if hasattr(sgd, "classes_") else np.unique(y)
+            for _ in range(args.epochs):
+                order = rng.permutation(len(Xtr_scaled))
+                sgd.partial_fit(Xtr_scaled[order], ytr[order], classes=classes)
+                classes = None
+        new_state = {"incremental": True, "features": list(X.columns), "partitions": sorted(set(seen) | set(new))}
+    else:
+        X, y = features_and_labels(df)
+        Xtr, Xte, ytr, yte = train_test_split(X.values, y, test_size=0.25, random_state=42)
+        clf = LogisticRegression(max_iter=500).fit(Xtr, ytr)
+        new_state = {"incremental": False, "features": list(X.columns), "partitions": new}
+    n_train, n_eval = len(Xtr), len(Xte)
+    acc = float(accuracy_score(yte, clf.predict(Xte))) if len(yte) else float("nan")
+train_s = time.perf_counter() - start
+# ru_maxrss is in KiB on Linux: the figure to size the compute instance by
+peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
 print("eval_acc=", acc)
+print(f"train_seconds= {train_s:.3f}")
+print(f"peak_rss_mb= {peak_rss_mb:.0f}")
 
 mlflow.set_tracking_uri(os.environ.get("MLFLOW_TRACKING_URI", ""))
-with mlflow.start_run():
-    mlflow.log_metric("eval_acc", acc)
-    out_dir = pathlib.Path(args.out); out_dir.mkdir(parents=True, exist_ok=True)
+# metrics are sent by BatchLogger in background log_batch calls, flushed on exit
+with mlflow.start_run() as run, BatchLogger(run.info.run_id) as log:
+    log.log_params({"model_type": "SGDClassifier" if args.incremental or args.chunksize else "LogisticRegression",
+                    "incremental": args.incremental, "chunksize": args.chunksize})
+    log.log_metrics({"eval_acc": acc, "train_rows": n_train, "eval_rows": n_eval, "train_seconds": train_s,
+                     "peak_rss_mb": peak_rss_mb, "new_partitions": len(new),
+                     "total_partitions": len(new_state["partitions"])})
+    out_dir.mkdir(parents=True, exist_ok=True)
     mlflow.sklearn.save_model(clf, path=str(out_dir))
+    (out_dir / STATE_FILE).write_text(json.dumps(new_state, indent=2))
+if args.cache_dir:
+    cache.store(key, out_dir, {"step": "train", "run_id": run.info.run_id, "eval_acc": acc})
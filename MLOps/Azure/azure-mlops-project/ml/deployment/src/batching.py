@@ -0,0 +1,81 @@
+import queue, threading, time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    # Collects concurrent predict calls for up to window_ms (or until max_rows rows
+    # are queued), runs one vectorized predict and hands every caller its slice.
+    def __init__(self, predict, max_rows=1024, window_ms=5.0):
+        self.predict_fn = predict
+        self.max_rows = max_rows
+        self.window = window_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, X):
+        # a malformed payload fails here, in its own request, before it can join a batch
+        X = np.asarray(X)
+        if X.ndim != 2 or X.dtype.kind not in "biuf":
+            raise ValueError(f"expected a 2-D numeric array, got shape {X.shape} and dtype {X.dtype}")
+        fut = Future()
+        self._queue.put((X, fut))
+        return fut.result()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._run(batch)
+
+    def _run(self, batch):
+        # one vectorized predict per feature width, so a request with a different
+        # width cannot break the concatenation for the others
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[0].shape[1], []).append(item)
+        for group in groups.values():
+            self._run_group(group)
+
+    def _run_group(self, group):
+        if len(group) == 1:
+            self._run_one(*group[0])
+            return
+        try:
+            preds = np.asarray(self.predict_fn(np.concatenate([x for x, _ in group])))
+        except Exception:
+            # predict each request alone: only the one the model rejects fails
+            for item in group:
+                self._run_one(*item)
+            return
+        self.batches += 1
+        self.rows += len(preds)
+        start = 0
+        for x, fut in group:
+            fut.set_result(preds[start:start + len(x)])
+            start += len(x)
+
+    def _run_one(self, X, fut):
+        try:
+            preds = np.asarray(self.predict_fn(X))
+        except Exception as e:
+            fut.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(preds)
+        fut.set_result(preds)
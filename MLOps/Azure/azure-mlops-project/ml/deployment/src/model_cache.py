@@ -0,0 +1,51 @@
+import os, time
+
+import numpy as np
+import pandas as pd
+import mlflow.pyfunc
+
+# In-process cache of loaded pyfunc models keyed by (path, version), so calling
+# init() again for a version that is already loaded (hot-swap back, several
+# deployments served from one process) does not deserialize it again.
+_models = {}
+
+
+def model_version(path):
+    # AZUREML_MODEL_DIR ends in .../<model name>/<version>; otherwise use the
+    # MLmodel file's mtime so a model overwritten in place is reloaded
+    name = os.path.basename(os.path.normpath(path))
+    if name.isdigit():
+        return name
+    mlmodel = os.path.join(path, "MLmodel")
+    return str(os.stat(mlmodel).st_mtime_ns) if os.path.exists(mlmodel) else "unversioned"
+
+
+def load(path):
+    # returns (model, version, seconds spent loading; 0.0 on a cache hit)
+    key = (os.path.abspath(path), model_version(path))
+    if key in _models:
+        return _models[key], key[1], 0.0
+    start = time.perf_counter()
+    _models[key] = mlflow.pyfunc.load_model(path)
+    return _models[key], key[1], time.perf_counter() - start
+
+
+def warmup_batch(model, rows=1):
+    # zero-filled batch shaped like the model's input signature, None without one
+    schema = model.metadata.get_input_schema()
+    if schema is None:
+        return None
+    if schema.is_tensor_spec():
+        spec = schema.inputs[0]
+        return np.zeros((rows,) + tuple(max(d, 1) for d in spec.shape[1:]), dtype=spec.type)
+    return pd.DataFrame({name: np.zeros(rows, dtype=t) for name, t in zip(schema.input_names(), schema.numpy_types())})
+
+
+def warm_up(predict, model, rows=1):
+    # first predict pays lazy imports, allocations and any JIT; do it before traffic
+    X = warmup_batch(model, rows)
+    if X is None:
+        return 0.0
+    start = time.perf_counter()
+    predict(X)
+    return time.perf_counter() - start
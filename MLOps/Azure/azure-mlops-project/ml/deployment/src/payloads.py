@@ -0,0 +1,73 @@
+import io, json, struct
+import numpy as np
+
+# Content types accepted / produced by score.run; JSON stays the default.
+JSON = "application/json"
+NPY = "application/x-npy"
+RAW = "application/octet-stream"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# RAW body: 24-byte little-endian header b"RAWT", itemsize (4 or 8), 3 pad bytes,
+# uint64 rows, uint64 cols; then rows*cols little-endian float32/float64 values.
+RAW_HEADER = struct.Struct("<4sB3xQQ")
+RAW_DTYPES = {4: np.dtype("<f4"), 8: np.dtype("<f8")}
+
+
+def media_type(header, default=JSON):
+    # "application/x-npy; charset=..." -> "application/x-npy"; unknown/any -> default
+    for part in (header or "").split(","):
+        mt = part.split(";")[0].strip().lower()
+        if mt in (JSON, NPY, RAW, ARROW):
+            return mt
+    return default
+
+
+def encode_raw(X):
+    X = np.ascontiguousarray(X, dtype=X.dtype if X.dtype in RAW_DTYPES.values() else "<f8")
+    X = X.reshape(len(X), -1)
+    return RAW_HEADER.pack(b"RAWT", X.dtype.itemsize, *X.shape) + X.tobytes()
+
+
+def decode(body, content_type=JSON):
+    # binary formats are decoded zero-copy: the array is a view on the request body
+    if content_type == JSON:
+        return np.array(json.loads(body)["inputs"])
+    body = memoryview(body if isinstance(body, bytes) else bytes(body))
+    if content_type == RAW:
+        magic, itemsize, rows, cols = RAW_HEADER.unpack_from(body)
+        if magic != b"RAWT" or itemsize not in RAW_DTYPES:
+            raise ValueError("bad raw tensor header")
+        return np.frombuffer(body, RAW_DTYPES[itemsize], rows * cols, RAW_HEADER.size).reshape(rows, cols)
+    if content_type == NPY:
+        f = io.BytesIO(body)
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran, dtype = read_header(f)
+        X = np.frombuffer(body, dtype, int(np.prod(shape)), f.tell())
+        return X.reshape(shape, order="F" if fortran else "C")
+    if content_type == ARROW:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(body).read_all()
+        # columns come out as views; stacking them row-major is the one copy
+        return np.column_stack([c.to_numpy() for c in table.combine_chunks().columns])
+    raise ValueError(f"unsupported content type: {content_type}")
+
+
+def encode(preds, accept=JSON):
+    # returns (body, content_type); JSON bodies are the usual {"predictions": [...]} dict
+    preds = np.asarray(preds)
+    if accept == RAW:
+        return encode_raw(preds), RAW
+    if accept == NPY:
+        f = io.BytesIO()
+        np.save(f, preds, allow_pickle=False)
+        return f.getvalue(), NPY
+    if accept == ARROW:
+        import pyarrow as pa
+        columns = {"predictions": preds} if preds.ndim == 1 else {f"p{i}": preds[:, i] for i in range(preds.shape[1])}
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW
+    return {"predictions": preds.tolist()}, JSON
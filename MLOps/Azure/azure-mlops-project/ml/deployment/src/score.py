@@ -1,19 +1,76 @@
-import json, numpy as np
-import mlflow.pyfunc
+import time
+
+import model_cache
+from payloads import JSON, decode, encode, media_type
+
+try:
+    # raw HTTP access (headers, binary bodies) inside the AML inference server
+    from azureml.contrib.services.aml_request import rawhttp
+    from azureml.contrib.services.aml_response import AMLResponse
+except ImportError:  # local runs and benchmarks call run() with a JSON string
+    rawhttp = AMLResponse = None
 
 # AML will set this env var; fallback for local
 import os
 MODEL_PATH = os.getenv("AZUREML_MODEL_DIR", ".")
 
-model = mlflow.pyfunc.load_model(MODEL_PATH)
+# Opt-in micro-batching of concurrent requests: SCORE_BATCH_WINDOW_MS > 0 enables it
+BATCH_WINDOW_MS = float(os.getenv("SCORE_BATCH_WINDOW_MS", "0"))
+BATCH_MAX_ROWS = int(os.getenv("SCORE_BATCH_MAX_ROWS", "1024"))
+
+# Rows in the synthetic warm-up batch predicted during init(); 0 disables it
+WARMUP_ROWS = int(os.getenv("SCORE_WARMUP_ROWS", "1"))
+
+# Opt-in per-row result cache: SCORE_CACHE_MB > 0 enables it, SCORE_CACHE_TTL_S > 0
+# also expires entries after that many seconds
+CACHE_MB = float(os.getenv("SCORE_CACHE_MB", "0"))
+CACHE_TTL_S = float(os.getenv("SCORE_CACHE_TTL_S", "0"))
+
+model = None
+model_version = None
+batcher = None
+cache = None
+cold_start = {}
 
 def init():
-    pass  # model already loaded
-
-def run(raw_data):
-    data = json.loads(raw_data)
-    X = np.array(data["inputs"])
-    preds = model.predict(X)
-    if isinstance(preds, np.ndarray):
-        preds = preds.tolist()
-    return {"predictions": preds}
+    # Load (or reuse from the in-process cache), warm up, then start the batcher,
+    # so none of it lands on the first request.
+    global model, model_version, batcher, cache
+    start = time.perf_counter()
+    model, model_version, load_s = model_cache.load(os.getenv("AZUREML_MODEL_DIR", MODEL_PATH))
+    warmup_s = 0.0
+    if WARMUP_ROWS > 0:
+        try:
+            warmup_s = model_cache.warm_up(model.predict, model, WARMUP_ROWS)
+        except Exception as e:  # a synthetic batch the model rejects must not fail the deployment
+            print(f"warm-up skipped: {e}")
+    if batcher is None and BATCH_WINDOW_MS > 0:
+        from batching import MicroBatcher
+        batcher = MicroBatcher(lambda X: model.predict(X), max_rows=BATCH_MAX_ROWS, window_ms=BATCH_WINDOW_MS)
+    if cache is None and CACHE_MB > 0:
+        from result_cache import ResultCache
+        cache = ResultCache(max_bytes=int(CACHE_MB * 2**20), ttl_s=CACHE_TTL_S)
+    cold_start.update(model_version=model_version, cached=load_s == 0.0, load_s=load_s, warmup_s=warmup_s,
+                      total_s=time.perf_counter() - start)
+    # picked up from the container log by App Insights / `az ml online-deployment get-logs`
+    print("cold_start " + " ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in cold_start.items()))
+
+def run(request):
+    # Content-Type picks the input codec (JSON {"inputs": [[...]]}, .npy, raw
+    # float tensor, Arrow IPC); Accept picks the output one. JSON is the default.
+    if isinstance(request, (str, bytes)):
+        body, content_type, accept = request, JSON, JSON
+    else:
+        body = request.get_data(cache=False)
+        content_type = media_type(request.headers.get("Content-Type"))
+        accept = media_type(request.headers.get("Accept"))
+    X = decode(body, content_type)
+    predict = batcher.predict if batcher is not None else model.predict
+    preds = cache.predict(predict, X, model_version) if cache is not None else predict(X)
+    out, out_type = encode(preds, accept)
+    if out_type == JSON or AMLResponse is None:
+        return out
+    return AMLResponse(out, 200, {"Content-Type": out_type}, json_str=False)
+
+if rawhttp is not None:
+    run = rawhttp(run)
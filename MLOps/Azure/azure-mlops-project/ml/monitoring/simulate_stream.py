@@ -1,32 +1,169 @@
+import os
 import time
 import argparse
-from azure.storage.blob import BlobServiceClient
+import pathlib
+
+import numpy as np
+import pandas as pd
 from sklearn.datasets import load_iris
 
+# Writes a batch of "latest" data every --period seconds, drifting after
+# --drift_after cycles. Batches are generated and written --chunk-rows at a time,
+# so their size is bounded by the sink, not by memory. Sinks:
+#   dir:  files under --out (point drift_check/prep at it for local load tests)
+#   blob: Azure Blob or a local Azurite (--conn UseDevelopmentStorage=true),
+#         needs azure-storage-blob; each chunk is staged as a block
+# Every cycle and partition has its own seed, so reruns write the same data.
+
 p = argparse.ArgumentParser()
-p.add_argument('--conn', required=True)
+p.add_argument('--sink', choices=['dir', 'blob'], help='default: blob with --conn, dir otherwise')
+p.add_argument('--out', default='simulated', help='dir sink root')
+p.add_argument('--conn', help='blob sink connection string')
 p.add_argument('--container', default='data')
-p.add_argument('--path', default='incoming/latest.csv')
+p.add_argument('--path', default='incoming/latest.csv',
+               help='batch path; with --partitions > 1 a folder of part-NNNN.csv named after it')
+p.add_argument('--history', action='store_true', help='keep every cycle in a cycle=NNNNN/ folder instead of overwriting')
+p.add_argument('--source', choices=['iris', 'synthetic'], default='iris')
+p.add_argument('--rows', type=int, default=150, help='rows per cycle (iris is resampled beyond its 150 rows)')
+p.add_argument('--cols', type=int, default=4, help='synthetic features')
+p.add_argument('--partitions', type=int, default=1, help='files per cycle')
+p.add_argument('--chunk-rows', type=int, default=100_000)
 p.add_argument('--period', type=int, default=300)
-p.add_argument('--drift_after', type=int, default=3, help='cycles before drift')
+p.add_argument('--cycles', type=int, default=0, help='stop after this many cycles (0: run forever)')
+p.add_argument('--drift_after', '--drift-after', type=int, default=3, help='cycles before drift')
+p.add_argument('--drift-magnitude', type=float, default=1.0,
+               help='1.0: first feature +2.0, second feature x1.5; scales both')
+p.add_argument('--drift-ramp', type=int, default=0, help='cycles to reach full magnitude after drift starts')
+p.add_argument('--seed', type=int, default=0)
 args = p.parse_args()
 
-svc = BlobServiceClient.from_connection_string(args.conn)
-container = svc.get_container_client(args.container)
-container.create_container(exist_ok=True)
 
-X, y = load_iris(return_X_y=True, as_frame=True)
+class FileWriter:
+    # writes to a hidden temporary name and renames it into place on close, so a
+    # reader never sees a partial file (the *.csv glob skips the temporary one)
+    def __init__(self, target):
+        self.target = target
+        self.tmp = target.with_name(f'.{target.name}.tmp')
+        self.file = open(self.tmp, 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()
+        if exc[0] is None:
+            os.replace(self.tmp, self.target)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+class DirSink:
+    def __init__(self, root):
+        self.root = pathlib.Path(root)
+
+    def open(self, path):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return FileWriter(target)
+
+
+class BlobWriter:
+    # uploads each write as a staged block and commits them on close
+    def __init__(self, blob):
+        self.blob = blob
+        self.blocks = []
+
+    def write(self, data):
+        from azure.storage.blob import BlobBlock
+        block_id = f'{len(self.blocks):08d}'
+        self.blob.stage_block(block_id, data)
+        self.blocks.append(BlobBlock(block_id))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.blob.commit_block_list(self.blocks)
+
+
+class BlobSink:
+    def __init__(self, conn, container):
+        from azure.core.exceptions import ResourceExistsError
+        from azure.storage.blob import BlobServiceClient
+        self.container = BlobServiceClient.from_connection_string(conn).get_container_client(container)
+        try:
+            self.container.create_container()
+        except ResourceExistsError:
+            pass
+
+    def open(self, path):
+        return BlobWriter(self.container.get_blob_client(path))
+
+
+def magnitude(cycle):
+    if cycle < args.drift_after:
+        return 0.0
+    if args.drift_ramp <= 0:
+        return args.drift_magnitude
+    return args.drift_magnitude * min((cycle - args.drift_after + 1) / args.drift_ramp, 1.0)
+
+
+def chunks(rng, rows, m):
+    # DataFrames of at most --chunk-rows rows, drifted by magnitude m
+    for start in range(0, rows, args.chunk_rows):
+        n = min(args.chunk_rows, rows - start)
+        if args.source == 'iris':
+            # the iris rows as is when one chunk is exactly the dataset, resampled otherwise
+            df = X if start == 0 and n == len(X) else X.iloc[rng.integers(0, len(X), n)].reset_index(drop=True)
+        else:
+            df = pd.DataFrame(rng.normal(size=(n, args.cols)), columns=[f'f{i}' for i in range(args.cols)])
+        if m:
+            # induce drift: add offset to a feature and scale variance
+            df = df.copy()
+            df[df.columns[0]] = df[df.columns[0]] + 2.0 * m
+            df[df.columns[1]] = df[df.columns[1]] * (1 + 0.5 * m)
+        yield df
+
+
+def batch_paths(cycle):
+    # <path>, or <path without .csv>/part-NNNN.csv; --history adds a cycle=NNNNN/ folder
+    base = pathlib.PurePosixPath(args.path)
+    folder = base.parent / base.stem
+    if args.history:
+        folder = folder / f'cycle={cycle:05d}'
+    if args.partitions == 1:
+        return [str(folder / base.name if args.history else base)]
+    return [str(folder / f'part-{i:04d}.csv') for i in range(args.partitions)]
+
+
+sink_name = args.sink or ('blob' if args.conn else 'dir')
+if sink_name == 'blob' and not args.conn:
+    p.error('--sink blob needs --conn')
+if not 1 <= args.partitions <= args.rows:
+    # every file needs at least one row to carry the CSV header
+    p.error('--partitions must be between 1 and --rows')
+sink = BlobSink(args.conn, args.container) if sink_name == 'blob' else DirSink(args.out)
+X = load_iris(as_frame=True).data
 
 cycle = 0
-while True:
-    df = X.copy()
-    if cycle >= args.drift_after:
-        # induce drift: add offset to a feature and scale variance
-        df[df.columns[0]] = df[df.columns[0]] + 2.0
-        df[df.columns[1]] = df[df.columns[1]] * 1.5
-    # write to blob
-    csv = df.to_csv(index=False).encode()
-    container.upload_blob(args.path, csv, overwrite=True)
-    print(f"Uploaded latest.csv (cycle {cycle})")
+while not args.cycles or cycle < args.cycles:
+    m, start, written = magnitude(cycle), time.perf_counter(), 0
+    paths = batch_paths(cycle)
+    for part, path in enumerate(paths):
+        rows = args.rows // len(paths) + (part < args.rows % len(paths))
+        rng = np.random.default_rng([args.seed, cycle, part])
+        with sink.open(path) as f:
+            for i, df in enumerate(chunks(rng, rows, m)):
+                data = df.to_csv(index=False, header=i == 0).encode()
+                f.write(data)
+                written += len(data)
+    seconds = time.perf_counter() - start
+    print(f"Wrote {args.rows} rows in {len(paths)} file(s) to {sink_name}:{paths[0]}{' ...' if len(paths) > 1 else ''} "
+          f"(cycle {cycle}, drift {m:.2f}, {written / 2**20:.1f} MB, {seconds:.1f}s)")
     cycle += 1
-    time.sleep(args.period)
\ No newline at end of file
+    if not args.cycles or cycle < args.cycles:
+        time.sleep(args.period)
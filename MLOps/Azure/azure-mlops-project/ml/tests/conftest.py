@@ -0,0 +1,7 @@
+import os, sys
+
+# components and the scoring script import their helpers as top-level modules
+# (the AML code snapshot is flat), so the tests put the same folders on sys.path
+ML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for folder in ["deployment/src", "components/common", "components/train/src"]:
+    sys.path.insert(0, os.path.join(ML, folder))
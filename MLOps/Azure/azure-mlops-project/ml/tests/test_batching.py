@@ -0,0 +1,69 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batching import MicroBatcher
+
+
+def predict_sum(X):
+    if np.isnan(X).any():
+        raise ValueError("model rejects NaN")
+    return X.sum(axis=1)
+
+
+def submit_together(batcher, inputs):
+    # every request is queued before the window closes, so they share a batch
+    results = [None] * len(inputs)
+
+    def call(i):
+        try:
+            results[i] = batcher.predict(inputs[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_requests_get_their_own_slice():
+    batcher = MicroBatcher(predict_sum, window_ms=200)
+    inputs = [np.full((i + 1, 3), float(i)) for i in range(5)]
+    results = submit_together(batcher, inputs)
+    for X, preds in zip(inputs, results):
+        np.testing.assert_array_equal(preds, X.sum(axis=1))
+    assert batcher.rows == sum(len(X) for X in inputs)
+    assert batcher.batches < len(inputs)
+
+
+def test_malformed_payload_is_rejected_before_batching():
+    batcher = MicroBatcher(predict_sum, window_ms=1)
+    with pytest.raises(ValueError, match="2-D numeric"):
+        batcher.predict(np.array(["a", "b"]))
+    with pytest.raises(ValueError, match="2-D numeric"):
+        batcher.predict(np.ones(3))
+    assert batcher.batches == 0
+
+
+def test_a_different_feature_width_does_not_fail_the_others():
+    batcher = MicroBatcher(predict_sum, window_ms=200)
+    results = submit_together(batcher, [np.ones((2, 3)), np.ones((1, 5)), np.ones((3, 3))])
+    np.testing.assert_array_equal(results[0], [3.0, 3.0])
+    np.testing.assert_array_equal(results[1], [5.0])
+    np.testing.assert_array_equal(results[2], [3.0, 3.0, 3.0])
+
+
+def test_only_the_request_the_model_rejects_fails():
+    batcher = MicroBatcher(predict_sum, window_ms=200)
+    bad = np.ones((2, 3))
+    bad[1, 0] = np.nan
+    results = submit_together(batcher, [np.ones((2, 3)), bad, np.ones((1, 3))])
+    np.testing.assert_array_equal(results[0], [3.0, 3.0])
+    assert isinstance(results[1], ValueError)
+    np.testing.assert_array_equal(results[2], [3.0])
+    # the batcher thread survives a failed batch
+    np.testing.assert_array_equal(batcher.predict(np.ones((1, 2))), [2.0])
@@ -0,0 +1,35 @@
+import json, os, subprocess, sys
+
+import numpy as np, pandas as pd
+
+ML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DRIFT_CHECK = os.path.join(ML, "components", "drift_check", "src", "drift_check.py")
+LOCAL_SRC = os.path.join(ML, "..", "..", "..", "Local_workflow", "src")
+
+
+def run_drift_check(tmp_path, baseline):
+    latest = tmp_path / "latest"
+    latest.mkdir()
+    baseline.iloc[:500].to_csv(latest / "part.csv", index=False)
+    baseline.to_csv(tmp_path / "baseline.csv", index=False)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(ML, "components", "common"), LOCAL_SRC]))
+    subprocess.run([sys.executable, DRIFT_CHECK, "--baseline", str(tmp_path / "baseline.csv"),
+                    "--latest-folder", str(latest), "--threshold", "1", "--out", str(tmp_path / "signal.txt"),
+                    "--workers", "1"], check=True, env=env, capture_output=True)
+    return json.loads((tmp_path / "drift_report.json").read_text())
+
+
+def test_baseline_column_turning_non_numeric_after_the_sample_is_skipped(tmp_path):
+    rng = np.random.default_rng(0)
+    baseline = pd.DataFrame({"a": rng.normal(size=1500), "b": rng.normal(size=1500).astype(object)})
+    baseline.loc[1200, "b"] = "n/a (sensor offline)"
+    report = run_drift_check(tmp_path, baseline)
+    assert report["skipped_columns"] == ["b"]
+    assert list(report["features"]) == ["a"]
+
+
+def test_numeric_baseline_keeps_every_column(tmp_path):
+    rng = np.random.default_rng(0)
+    report = run_drift_check(tmp_path, pd.DataFrame({"a": rng.normal(size=1500), "b": rng.normal(size=1500)}))
+    assert report["skipped_columns"] == []
+    assert list(report["features"]) == ["a", "b"]
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from ingest import count_folder_rows, mltable_files
+
+
+def write_mltable(root, paths):
+    root.mkdir(parents=True, exist_ok=True)
+    lines = ["paths:"] + [f"  - {kind}: {value}" for kind, value in paths]
+    (root / "MLTable").write_text("\n".join(lines) + "\n")
+
+
+def write_csv(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"x": range(rows)}).to_csv(path, index=False)
+
+
+def test_entries_resolve_against_the_mltable_folder(tmp_path):
+    root = tmp_path / "data [v1]"  # glob metacharacters in the folder name
+    write_csv(root / "a.csv", 2)
+    write_csv(root / "day=1" / "b.csv", 3)
+    write_csv(root / "extra" / "c.csv", 4)
+    write_mltable(root, [("file", "./a.csv"), ("pattern", "./day=*/*.csv"), ("folder", "extra")])
+    assert mltable_files(root) == [str(root / "a.csv"), str(root / "day=1" / "b.csv"), str(root / "extra" / "c.csv")]
+    assert count_folder_rows(root, workers=1)[0] == 9
+
+
+def test_absolute_and_file_uri_entries_are_local_paths(tmp_path):
+    write_csv(tmp_path / "shared" / "a.csv", 2)
+    root = tmp_path / "asset"
+    write_mltable(root, [("file", f"file://{tmp_path / 'shared' / 'a.csv'}"), ("pattern", f"{tmp_path}/shared/*.csv")])
+    assert mltable_files(root) == [str(tmp_path / "shared" / "a.csv")] * 2
+
+
+@pytest.mark.parametrize("uri", ["azureml://datastores/raw/paths/a.csv", "https://host/a.csv",
+                                 "abfss://c@account.dfs.core.windows.net/a.csv"])
+def test_remote_entries_raise(tmp_path, uri):
+    write_mltable(tmp_path, [("file", uri)])
+    with pytest.raises(ValueError, match="not a local path"):
+        mltable_files(tmp_path)
+
+
+@pytest.mark.parametrize("kind, value", [("pattern", "./*.parquet"), ("file", "missing.csv"), ("folder", "empty")])
+def test_entries_matching_nothing_raise(tmp_path, kind, value):
+    (tmp_path / "empty").mkdir()
+    write_csv(tmp_path / "a.csv", 2)
+    write_mltable(tmp_path, [(kind, value)])
+    with pytest.raises(FileNotFoundError, match="matches no files"):
+        mltable_files(tmp_path)
+
+
+def test_folder_without_mltable(tmp_path):
+    assert mltable_files(tmp_path) is None
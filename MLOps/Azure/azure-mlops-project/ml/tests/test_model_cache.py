@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pytest
+
+mlflow = pytest.importorskip("mlflow")
+
+import model_cache
+from mlflow.models import infer_signature
+from sklearn.linear_model import LogisticRegression
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    X, y = np.random.default_rng(0).normal(size=(20, 3)), np.arange(20) % 2
+    clf = LogisticRegression().fit(X, y)
+    path = tmp_path / "sales-model" / "3"
+    mlflow.sklearn.save_model(clf, str(path), signature=infer_signature(X, clf.predict(X)))
+    return path
+
+
+def test_version_from_the_model_dir_or_the_mlmodel_mtime(model_dir, tmp_path):
+    assert model_cache.model_version(str(model_dir)) == "3"
+    renamed = model_dir.rename(tmp_path / "local")
+    assert model_cache.model_version(str(renamed)) == str(os.stat(renamed / "MLmodel").st_mtime_ns)
+    assert model_cache.model_version(str(tmp_path / "empty")) == "unversioned"
+
+
+def test_load_reuses_an_already_loaded_version(model_dir, monkeypatch):
+    monkeypatch.setattr(model_cache, "_models", {})
+    model, version, load_s = model_cache.load(str(model_dir))
+    again, version_again, load_again = model_cache.load(str(model_dir))
+    assert again is model and version == version_again == "3"
+    assert load_s > 0 and load_again == 0.0
+
+
+def test_warm_up_predicts_a_batch_shaped_like_the_signature(model_dir):
+    model, _, _ = model_cache.load(str(model_dir))
+    assert model_cache.warmup_batch(model, rows=4).shape == (4, 3)
+    seen = []
+    assert model_cache.warm_up(lambda X: seen.append(X.shape), model, rows=2) >= 0
+    assert seen == [(2, 3)]
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pytest
+
+from payloads import ARROW, JSON, NPY, RAW, RAW_HEADER, decode, encode, encode_raw, media_type
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, JSON), ("", JSON), ("text/plain", JSON), ("Application/X-NPY; charset=binary", NPY),
+    ("text/html, application/vnd.apache.arrow.stream", ARROW), ("application/octet-stream", RAW),
+])
+def test_media_type(header, expected):
+    assert media_type(header) == expected
+
+
+def test_json_round_trip():
+    X = np.arange(6, dtype=float).reshape(2, 3)
+    assert np.array_equal(decode(json.dumps({"inputs": X.tolist()})), X)
+    body, content_type = encode(np.array([0, 1]))
+    assert (body, content_type) == ({"predictions": [0, 1]}, JSON)
+
+
+@pytest.mark.parametrize("dtype", ["<f4", "<f8"])
+def test_raw_round_trip_is_zero_copy(dtype):
+    X = np.random.default_rng(0).normal(size=(5, 3)).astype(dtype)
+    body = encode_raw(X)
+    decoded = decode(body, RAW)
+    assert decoded.dtype == np.dtype(dtype) and np.array_equal(decoded, X)
+    assert not decoded.flags.owndata
+
+
+def test_raw_rejects_a_bad_header():
+    body = bytearray(encode_raw(np.ones((2, 2))))
+    body[:4] = b"NOPE"
+    with pytest.raises(ValueError, match="bad raw tensor header"):
+        decode(bytes(body), RAW)
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_npy_round_trip(order):
+    X = np.asarray(np.arange(12, dtype=np.float32).reshape(3, 4), order=order)
+    body, content_type = encode(X, NPY)
+    assert content_type == NPY
+    assert np.array_equal(decode(body, NPY), X)
+
+
+@pytest.mark.parametrize("preds", [np.array([0.5, 1.5]), np.array([[0.1, 0.9], [0.7, 0.3]])])
+def test_arrow_round_trip(preds):
+    body, content_type = encode(preds, ARROW)
+    assert content_type == ARROW
+    decoded = decode(body, ARROW)
+    assert np.array_equal(decoded.reshape(preds.shape), preds)
+
+
+def test_raw_predictions_of_integer_labels_are_float64():
+    body, content_type = encode(np.array([0, 2, 1]), RAW)
+    assert content_type == RAW
+    assert decode(body, RAW).tolist() == [[0.0], [2.0], [1.0]]
+    assert len(body) == RAW_HEADER.size + 3 * 8
+
+
+def test_unsupported_content_type():
+    with pytest.raises(ValueError, match="unsupported content type"):
+        decode(b"x,y\n1,2\n", "text/csv")
@@ -0,0 +1,43 @@
+import os, subprocess, sys
+
+import pandas as pd
+import pytest
+
+ML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PREP = os.path.join(ML, "components", "prep", "src", "prep.py")
+
+
+def run_prep(tmp_path, *extra):
+    latest = tmp_path / "latest"
+    for day in range(2):
+        (latest / f"day={day}").mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"x": [1.0, 2.0, None], "label": [0, 1, 1]}).to_csv(latest / f"day={day}" / "part.csv", index=False)
+    signal = tmp_path / "signal.txt"
+    signal.write_text("DRIFT")
+    out = tmp_path / "out"
+    env = dict(os.environ, PYTHONPATH=os.path.join(ML, "components", "common"))
+    subprocess.run([sys.executable, PREP, "--latest-folder", str(latest), "--signal", str(signal), "--out", str(out),
+                    "--workers", "1", *extra], check=True, env=env, capture_output=True)
+    return out
+
+
+@pytest.mark.parametrize("chunked", [[], ["--chunksize", "1"]])
+def test_csv_handoff_keeps_only_the_input_columns(tmp_path, chunked):
+    df = pd.read_csv(run_prep(tmp_path, "--format", "csv", *chunked) / "train.csv")
+    assert list(df.columns) == ["x", "label"]
+    assert len(df) == 4
+
+
+@pytest.mark.parametrize("chunked", [[], ["--chunksize", "1"]])
+def test_parquet_handoff_tags_each_row_with_its_partition(tmp_path, chunked):
+    df = pd.read_parquet(run_prep(tmp_path, *chunked) / "train.parquet")
+    assert list(df.columns) == ["x", "label", "_partition"]
+    assert sorted(df["_partition"].str.split("@").str[0]) == ["day=0/part.csv"] * 2 + ["day=1/part.csv"] * 2
+
+
+def test_a_file_rewritten_at_the_same_path_is_a_new_partition(tmp_path):
+    before = set(pd.read_parquet(run_prep(tmp_path) / "train.parquet")["_partition"])
+    (tmp_path / "out" / "train.parquet").unlink()
+    after = set(pd.read_parquet(run_prep(tmp_path) / "train.parquet")["_partition"])
+    assert {p.split("@")[0] for p in after} == {p.split("@")[0] for p in before}
+    assert not after & before
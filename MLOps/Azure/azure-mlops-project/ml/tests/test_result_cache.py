@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from result_cache import ENTRY_OVERHEAD, ResultCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = []
+
+    def predict(self, X):
+        self.rows.append(len(X))
+        return X.sum(axis=1)
+
+
+def test_only_missing_rows_reach_the_model():
+    cache, model = ResultCache(), CountingModel()
+    X = np.array([[1.0, 2.0], [3.0, 4.0], [1.0, 2.0]])
+    assert cache.predict(model.predict, X, "1").tolist() == [3.0, 7.0, 3.0]
+    assert model.rows == [2]  # the repeated row is predicted once
+    assert cache.predict(model.predict, np.array([[3.0, 4.0], [5.0, 6.0]]), "1").tolist() == [7.0, 11.0]
+    assert model.rows == [2, 1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 3
+
+
+def test_keys_cover_model_version_dtype_and_shape():
+    cache, model = ResultCache(), CountingModel()
+    X = np.array([[1.0, 2.0]])
+    cache.predict(model.predict, X, "1")
+    cache.predict(model.predict, X, "2")
+    cache.predict(model.predict, X.astype(np.float32), "2")
+    assert model.rows == [1, 1, 1]
+
+
+def test_lru_eviction_bounds_bytes():
+    per_entry = np.array(0.0).nbytes + ENTRY_OVERHEAD
+    cache, model = ResultCache(max_bytes=2 * per_entry), CountingModel()
+    for value in [1.0, 2.0, 1.0, 3.0]:
+        cache.predict(model.predict, np.array([[value]]), "1")
+    assert cache.stats()["entries"] == 2 and cache.bytes <= cache.max_bytes
+    assert cache.evictions == 1
+    cache.predict(model.predict, np.array([[1.0]]), "1")  # most recently used survives
+    assert model.rows == [1, 1, 1]
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("result_cache.time.monotonic", lambda: now[0])
+    cache, model = ResultCache(ttl_s=5), CountingModel()
+    X = np.array([[1.0]])
+    cache.predict(model.predict, X, "1")
+    now[0] += 4
+    cache.predict(model.predict, X, "1")
+    now[0] += 2
+    cache.predict(model.predict, X, "1")
+    assert model.rows == [1, 1]
+
+
+def test_model_errors_do_not_poison_the_cache():
+    cache = ResultCache()
+
+    def fail(X):
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        cache.predict(fail, np.array([[1.0]]), "1")
+    assert cache.stats()["entries"] == 0
+    assert cache.predict(CountingModel().predict, np.array([[1.0]]), "1").tolist() == [1.0]
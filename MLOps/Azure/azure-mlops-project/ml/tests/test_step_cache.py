@@ -0,0 +1,143 @@
+import os, threading
+
+import pytest
+
+from step_cache import KEY_FILE, StepCache, fingerprint
+
+
+@pytest.fixture
+def step(tmp_path):
+    data = tmp_path / "data"
+    (data / "day=1").mkdir(parents=True)
+    (data / "day=1" / "part.csv").write_text("x\n1\n")
+    (data / "day=2.csv").write_text("x\n2\n")
+    code = tmp_path / "prep.py"
+    code.write_text("print('prep')\n")
+    return data, code
+
+
+def key(data, code, args=None, how="stat"):
+    return fingerprint("prep", {"latest_folder": data}, args or {"chunksize": None, "format": "parquet"}, how, [code])
+
+
+@pytest.mark.parametrize("how", ["stat", "hash"])
+def test_key_is_stable(step, how):
+    data, code = step
+    assert key(data, code, how=how) == key(data, code, how=how)
+    assert key(data, code, {"format": "parquet", "chunksize": None}, how) == key(data, code, how=how)
+
+
+@pytest.mark.parametrize("how", ["stat", "hash"])
+def test_key_changes_with_inputs_code_and_args(step, how):
+    data, code = step
+    before = key(data, code, how=how)
+    assert key(data, code, {"chunksize": 10, "format": "parquet"}, how) != before
+    assert fingerprint("train", {"latest_folder": data}, {"chunksize": None, "format": "parquet"}, how, [code]) != before
+
+    code.write_text("print('prep v2')\n")
+    assert key(data, code, how=how) != before
+    code.write_text("print('prep')\n")
+    assert key(data, code, how=how) == before
+
+    (data / "day=2.csv").write_text("x\n3\n")
+    changed = key(data, code, how=how)
+    assert changed != before
+    (data / "day=2.csv").rename(data / "day=3.csv")
+    assert key(data, code, how=how) not in (before, changed)
+
+
+def test_stat_key_follows_mtime_and_hash_key_follows_content(step):
+    data, code = step
+    stat, content = key(data, code), key(data, code, how="hash")
+    part = data / "day=1" / "part.csv"
+    st = part.stat()
+    os.utime(part, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert key(data, code) != stat
+    assert key(data, code, how="hash") == content
+
+
+def test_explicit_file_mapping_ignores_the_folder_location(step, tmp_path):
+    data, code = step
+    moved = tmp_path / "moved"
+    data.rename(moved)
+    files = {"day=1/part.csv": moved / "day=1" / "part.csv", "day=2.csv": moved / "day=2.csv"}
+    assert (fingerprint("prep", {"latest_folder": files}, {}, "hash", [code])
+            == fingerprint("prep", {"latest_folder": dict(reversed(files.items()))}, {}, "hash", [code]))
+
+
+def test_content_inputs_ignore_mtime_with_stat(step):
+    data, code = step
+    before = fingerprint("train", {"data": data}, {}, "stat", [code], content=["data"])
+    part = data / "day=1" / "part.csv"
+    st = part.stat()
+    os.utime(part, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert fingerprint("train", {"data": data}, {}, "stat", [code], content=["data"]) == before
+    part.write_text("x\n5\n")
+    assert fingerprint("train", {"data": data}, {}, "stat", [code], content=["data"]) != before
+
+
+def test_cached_output_is_identified_by_its_step_key(step, tmp_path):
+    # AML writes prep's output to a new path every job: the copy must give train the same key
+    data, code = step
+    cache = StepCache(tmp_path / "cache")
+    prep_key = key(data, code)
+    cache.store(prep_key, data)
+    assert (data / KEY_FILE).read_text() == prep_key
+    train_key = fingerprint("train", {"data": data}, {}, "stat", [code])
+
+    rerun = tmp_path / "rerun"
+    assert cache.restore(prep_key, rerun)
+    assert fingerprint("train", {"data": rerun}, {}, "stat", [code]) == train_key
+
+    (rerun / KEY_FILE).write_text(key(data, code, {"chunksize": 10}))
+    assert fingerprint("train", {"data": rerun}, {}, "stat", [code]) != train_key
+
+
+def test_unknown_fingerprint_method(step):
+    data, code = step
+    with pytest.raises(ValueError, match="unknown fingerprint method"):
+        key(data, code, how="mtime")
+
+
+def test_store_then_restore(tmp_path):
+    out = tmp_path / "out"
+    (out / "nested").mkdir(parents=True)
+    (out / "nested" / "train.parquet").write_bytes(b"rows")
+    cache = StepCache(tmp_path / "cache")
+    assert not cache.restore("ab" * 32, tmp_path / "restored")
+    cache.store("ab" * 32, out, {"rows": 1})
+    assert cache.restore("ab" * 32, tmp_path / "restored")
+    assert (tmp_path / "restored" / "nested" / "train.parquet").read_bytes() == b"rows"
+
+
+def test_partial_entry_is_a_miss(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    entry = tmp_path / "cache" / "cd" / ("cd" * 32)
+    (entry / "output").mkdir(parents=True)
+    (entry / "output" / "train.parquet").write_bytes(b"half")
+    assert not cache.restore("cd" * 32, tmp_path / "restored")
+    assert not (tmp_path / "restored").exists()
+
+
+def test_concurrent_stores_leave_one_complete_entry(tmp_path):
+    outs = []
+    for i in range(8):
+        out = tmp_path / f"out{i}"
+        out.mkdir()
+        (out / "model.pkl").write_text("model")
+        outs.append(out)
+    cache = StepCache(tmp_path / "cache")
+    barrier = threading.Barrier(len(outs))
+
+    def store(out):
+        barrier.wait()
+        cache.store("ef" * 32, out)
+
+    threads = [threading.Thread(target=store, args=(out,)) for out in outs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(os.listdir(tmp_path / "cache" / "ef")) == ["ef" * 32]
+    assert cache.restore("ef" * 32, tmp_path / "restored")
+    assert (tmp_path / "restored" / "model.pkl").read_text() == "model"
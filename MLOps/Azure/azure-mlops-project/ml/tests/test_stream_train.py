@@ -0,0 +1,86 @@
+import numpy as np, pandas as pd
+import pytest
+
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from stream_train import ChunkReader, eval_mask, fit_streaming
+
+
+def write(folder, parts, rows=100, features=("a", "b"), fmt="parquet"):
+    frames = []
+    for i, part in enumerate(parts):
+        rng = np.random.default_rng(i)
+        df = pd.DataFrame({f: rng.normal(size=rows) for f in features})
+        df["label"] = (df[features[0]] > 0).astype(int)
+        df["_partition"] = part
+        frames.append(df)
+    folder.mkdir(parents=True, exist_ok=True)
+    df = pd.concat(frames, ignore_index=True)
+    if fmt == "parquet":
+        df.to_parquet(folder / "train.parquet", index=False)
+    else:
+        df.to_csv(folder / "train.csv", index=False)
+    return folder
+
+
+def model():
+    return Pipeline([("scale", StandardScaler()), ("sgd", SGDClassifier(loss="log_loss", random_state=42))])
+
+
+def test_eval_mask_depends_only_on_the_row_id():
+    ids = np.arange(20_000)
+    mask = eval_mask(ids, 0.25)
+    assert abs(mask.mean() - 0.25) < 0.02
+    assert (eval_mask(ids[5_000:6_000], 0.25) == mask[5_000:6_000]).all()
+    assert not eval_mask(ids, 0).any() and eval_mask(ids, 1).all()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_every_pass_yields_the_same_split(tmp_path, fmt):
+    reader = ChunkReader(write(tmp_path, ["p1", "p2"], fmt=fmt), chunksize=30)
+    passes = [[(X.copy(), is_eval.copy()) for X, _, is_eval in reader] for _ in range(2)]
+    first = np.concatenate([X[is_eval] for X, is_eval in passes[0]])
+    assert len(first) and all(len(X) <= 30 for X, _ in passes[0])
+    assert np.array_equal(first, np.concatenate([X[is_eval] for X, is_eval in passes[1]]))
+    # the split follows the row's position in the file, not the chunk size
+    whole = np.concatenate([is_eval for _, _, is_eval in ChunkReader(tmp_path, chunksize=1000)])
+    assert np.array_equal(whole, np.concatenate([is_eval for _, is_eval in passes[0]]))
+
+
+def test_incorporated_partitions_are_skipped(tmp_path):
+    reader = ChunkReader(write(tmp_path, ["p1", "p2", "p3"]), chunksize=40, skip_partitions=["p1", "p3"])
+    rows = sum(len(X) for X, _, _ in reader)
+    assert rows == 100
+    assert reader.partitions == {"p2"}
+    assert reader.features == ["a", "b"]
+
+
+def test_changed_feature_set_raises(tmp_path):
+    reader = ChunkReader(write(tmp_path, ["p1"], features=("a", "b", "c")), chunksize=40, features=["a", "b"])
+    with pytest.raises(SystemExit, match="Feature columns changed"):
+        list(reader)
+
+
+def test_fit_streaming_counts_train_and_eval_rows(tmp_path):
+    reader = ChunkReader(write(tmp_path, ["p1", "p2"]), chunksize=30)
+    n_eval = int(eval_mask(np.arange(200), 0.25).sum())
+    n_train, got_eval, acc = fit_streaming(model(), reader, epochs=3)
+    assert (n_train, got_eval) == (200 - n_eval, n_eval)
+    assert acc > 0.8
+
+
+def test_fit_streaming_continues_a_model_on_new_partitions_only(tmp_path):
+    clf = model()
+    fit_streaming(clf, ChunkReader(write(tmp_path / "d1", ["p1"]), chunksize=30), epochs=3)
+    reader = ChunkReader(write(tmp_path / "d2", ["p1", "p2"]), chunksize=30, skip_partitions=["p1"],
+                         features=["a", "b"])
+    n_train, n_eval, _ = fit_streaming(clf, reader, epochs=3)
+    assert n_train + n_eval == 100
+    assert reader.partitions == {"p2"}
+
+
+def test_fit_streaming_with_nothing_new(tmp_path):
+    reader = ChunkReader(write(tmp_path, ["p1"]), chunksize=30, skip_partitions=["p1"])
+    n_train, n_eval, acc = fit_streaming(model(), reader)
+    assert (n_train, n_eval) == (0, 0) and np.isnan(acc)
@@ -0,0 +1,107 @@
+import json, os, subprocess, sys
+
+import numpy as np, pandas as pd
+import pytest
+
+pytest.importorskip("mlflow")
+
+ML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TRAIN = os.path.join(ML, "components", "train", "src", "train.py")
+# train.py imports BatchLogger from the local workflow, as in its additional_includes
+BATCH_LOGGING = os.path.join(ML, "..", "..", "..", "Local_workflow", "src")
+
+
+# one tracking database for the module: creating its schema takes seconds
+@pytest.fixture(scope="module")
+def tracking(tmp_path_factory):
+    return f"sqlite:///{tmp_path_factory.mktemp('mlruns') / 'mlflow.db'}"
+
+
+def write_data(folder, partitions, features=("a", "b"), labels=(0, 1)):
+    # prep's parquet handoff: numeric features, label and the _partition tag
+    frames = []
+    for i, part in enumerate(partitions):
+        rng = np.random.default_rng(i)
+        df = pd.DataFrame({f: rng.normal(size=120) for f in features})
+        df["label"] = np.resize(labels, 120)
+        df["_partition"] = part
+        frames.append(df)
+    folder.mkdir(parents=True, exist_ok=True)
+    pd.concat(frames, ignore_index=True).to_parquet(folder / "train.parquet", index=False)
+    return folder
+
+
+def run_train(tracking, data, out, *extra, check=True):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.join(ML, "components", "common"), BATCH_LOGGING]),
+               MLFLOW_TRACKING_URI=tracking)
+    result = subprocess.run([sys.executable, TRAIN, "--data", str(data), "--out", str(out), *extra],
+                            env=env, capture_output=True, text=True)
+    if check:
+        assert result.returncode == 0, result.stderr
+    return result
+
+
+def state(out):
+    return json.loads((out / "partitions.json").read_text())
+
+
+@pytest.fixture(scope="module", params=[[], ["--chunksize", "50"]], ids=["in-memory", "streaming"])
+def previous(request, tracking, tmp_path_factory):
+    # (model trained incrementally on day=1 and day=2, train mode flags)
+    tmp = tmp_path_factory.mktemp("previous")
+    data = write_data(tmp / "data", ["day=1/part.csv@10-1", "day=2/part.csv@10-1"])
+    run_train(tracking, data, tmp / "model", "--incremental", *request.param)
+    return tmp / "model", request.param
+
+
+def test_first_incremental_run_records_its_partitions(previous):
+    model, _ = previous
+    assert state(model) == {"incremental": True, "features": ["a", "b"],
+                            "partitions": ["day=1/part.csv@10-1", "day=2/part.csv@10-1"]}
+
+
+def test_incremental_resumes_and_skips_incorporated_partitions(previous, tracking, tmp_path):
+    # day=2 was rewritten in place (new size and mtime), day=3 is new
+    model, mode = previous
+    data = write_data(tmp_path / "data", ["day=1/part.csv@10-1", "day=2/part.csv@12-2", "day=3/part.csv@10-1"])
+    out = run_train(tracking, data, tmp_path / "model", "--incremental", "--previous-model", str(model), *mode).stdout
+    assert "2 new partitions (2 already incorporated)" in out
+    assert state(tmp_path / "model")["partitions"] == ["day=1/part.csv@10-1", "day=2/part.csv@10-1",
+                                                       "day=2/part.csv@12-2", "day=3/part.csv@10-1"]
+
+
+def test_nothing_new_keeps_the_previous_state(previous, tracking, tmp_path):
+    model, mode = previous
+    if mode:
+        pytest.skip("the in-memory run covers it")
+    data = write_data(tmp_path / "data", ["day=1/part.csv@10-1", "day=2/part.csv@10-1"])
+    out = run_train(tracking, data, tmp_path / "model", "--incremental", "--previous-model", str(model)).stdout
+    assert "0 new partitions (2 already incorporated), 0 rows" in out
+    assert state(tmp_path / "model") == state(model)
+
+
+def test_changed_features_are_rejected(previous, tracking, tmp_path):
+    model, mode = previous
+    data = write_data(tmp_path / "data", ["day=3/part.csv@10-1"], features=("a", "b", "c"))
+    result = run_train(tracking, data, tmp_path / "model", "--incremental", "--previous-model", str(model), *mode,
+                       check=False)
+    assert result.returncode != 0
+    assert "Feature columns changed" in result.stderr
+    assert not (tmp_path / "model").exists()
+
+
+def test_new_labels_are_rejected(previous, tracking, tmp_path):
+    model, mode = previous
+    data = write_data(tmp_path / "data", ["day=3/part.csv@10-1"], labels=(0, 1, 2))
+    result = run_train(tracking, data, tmp_path / "model", "--incremental", "--previous-model", str(model), *mode,
+                       check=False)
+    assert result.returncode != 0
+    assert "New labels appeared" in result.stderr
+
+
+def test_incremental_needs_the_partition_column(tracking, tmp_path):
+    data = write_data(tmp_path / "data", ["day=1/part.csv@10-1"])
+    pd.read_parquet(data / "train.parquet").drop(columns="_partition").to_parquet(data / "train.parquet")
+    result = run_train(tracking, data, tmp_path / "model", "--incremental", check=False)
+    assert result.returncode != 0
+    assert "--incremental needs the _partition column" in result.stderr
@@ -0,0 +1,44 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from drift import check_drift, check_drift_batch
+
+
+def make_frames(n_rows, n_cols, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = [f'f{i}' for i in range(n_cols)]
+    baseline = pd.DataFrame(rng.normal(size=(n_rows, n_cols)), columns=cols)
+    # shift every other column so roughly half the features drift
+    shift = np.where(np.arange(n_cols) % 2 == 0, 0.0, 0.3)
+    current = pd.DataFrame(rng.normal(size=(n_rows, n_cols)) + shift, columns=cols)
+    return baseline, current
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--rows', type=int, default=2000)
+    p.add_argument('--cols', type=int, nargs='+', default=[10, 100, 1000])
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    print(f"{'columns':>8} {'check_drift s':>14} {'batch s':>10} {'speedup':>8}  same report")
+    for n_cols in args.cols:
+        baseline, current = make_frames(args.rows, n_cols)
+        loop_s, loop_res = best_of(lambda: check_drift(baseline, current), args.repeat)
+        batch_s, batch_res = best_of(lambda: check_drift_batch(baseline, current), args.repeat)
+        print(f"{n_cols:>8} {loop_s:>14.3f} {batch_s:>10.3f} {loop_s / batch_s:>7.1f}x  {loop_res == batch_res}")
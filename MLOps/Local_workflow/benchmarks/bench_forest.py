@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from forest import FlatForest, njit
+from model import build_model
+
+
+def make_data(n_rows, n_cols, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_cols))
+    y = (X[:, 0] + X[:, 1] ** 2 - X[:, 2] + rng.normal(size=n_rows) > 1).astype(int) + (X[:, 3] > 1)
+    return X, y
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--train-rows', type=int, default=5000)
+    p.add_argument('--cols', type=int, default=20)
+    p.add_argument('--rows', type=int, default=100_000)
+    p.add_argument('--single', type=int, default=200, help='single-row predict calls to time')
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    X, y = make_data(args.train_rows, args.cols)
+    clf = build_model().fit(X, y)
+    flat = FlatForest.from_sklearn(clf)
+    X_new, _ = make_data(args.rows, args.cols, seed=1)
+    print(f"{len(clf.estimators_)} trees, {len(flat.feature)} nodes, max depth {flat.depth}")
+
+    single = X_new[:args.single]
+    backends = [('clf.predict', clf.predict), ('flat numpy', flat.predict)]
+    if njit is not None:
+        flat_numba = FlatForest(flat.arrays, backend='numba')
+        flat_numba.predict(X[:1])  # compile the kernel outside the timings
+        backends.append(('flat numba', flat_numba.predict))
+    for name, predict in backends:
+        lat = []
+        for row in single:
+            start = time.perf_counter()
+            predict(row[None, :])
+            lat.append(time.perf_counter() - start)
+        print(f"{name:>12} single row  p50 {np.percentile(lat, 50) * 1e3:8.3f} ms  p99 {np.percentile(lat, 99) * 1e3:8.3f} ms")
+
+    sk_s, sk_pred = best_of(lambda: clf.predict(X_new), args.repeat)
+    print(f"{'clf.predict':>12} {args.rows} rows  {sk_s:8.3f} s  {args.rows / sk_s:>10.0f} rows/s")
+    for name, predict in backends[1:]:
+        flat_s, flat_pred = best_of(lambda: predict(X_new), args.repeat)
+        print(f"{name:>12} {args.rows} rows  {flat_s:8.3f} s  {args.rows / flat_s:>10.0f} rows/s"
+              f"  identical: {np.array_equal(sk_pred, flat_pred)}")
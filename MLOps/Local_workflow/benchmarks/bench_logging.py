@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from batch_logging import BatchLogger
+from mlflow.tracking import MlflowClient
+
+
+def mock_tracking_server(latency_s):
+    # accepts the run logging endpoints (log-metric, log-parameter, set-tag,
+    # log-batch), sleeps latency_s per request like a remote server would and
+    # counts requests and logged entities
+    stats = {'requests': 0, 'entities': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])) or b'{}')
+            time.sleep(latency_s)
+            with lock:
+                stats['requests'] += 1
+                stats['entities'] += sum(len(body.get(k, [])) for k in ('metrics', 'params', 'tags')) or 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def train_loop(log_param, log_metric, epochs, metrics_per_epoch, step_s):
+    for i in range(10):
+        log_param(f'param_{i}', i)
+    for epoch in range(epochs):
+        time.sleep(step_s)  # stands in for one epoch of training
+        for m in range(metrics_per_epoch):
+            log_metric(f'metric_{m}', epoch * 0.1 + m, epoch)
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--epochs', type=int, default=50)
+    p.add_argument('--metrics', type=int, default=4, help='metrics logged per epoch')
+    p.add_argument('--step-ms', type=float, default=10.0, help='simulated training time per epoch')
+    p.add_argument('--latency-ms', type=float, nargs='+', default=[5, 20, 50])
+    args = p.parse_args()
+
+    print(f"{args.epochs} epochs x {args.metrics} metrics + 10 params, {args.step_ms:.0f} ms training per epoch")
+    print(f"{'latency ms':>10} {'sync s':>8} {'requests':>8} {'batched s':>9} {'requests':>8} {'speedup':>8}")
+    for latency in args.latency_ms:
+        server, stats = mock_tracking_server(latency / 1000)
+        client = MlflowClient(tracking_uri=f'http://127.0.0.1:{server.server_port}')
+        run_id = 'bench'
+
+        start = time.perf_counter()
+        train_loop(lambda k, v: client.log_param(run_id, k, v),
+                   lambda k, v, step: client.log_metric(run_id, k, v, step=step),
+                   args.epochs, args.metrics, args.step_ms / 1000)
+        sync_s, sync_requests = time.perf_counter() - start, stats['requests']
+
+        stats['requests'] = 0
+        start = time.perf_counter()
+        with BatchLogger(run_id, flush_interval=0.5, client=client) as log:
+            train_loop(log.log_param, log.log_metric, args.epochs, args.metrics, args.step_ms / 1000)
+        batch_s = time.perf_counter() - start
+        server.shutdown()
+        print(f"{latency:>10.0f} {sync_s:>8.2f} {sync_requests:>8d} {batch_s:>9.2f} {stats['requests']:>8d} "
+              f"{sync_s / batch_s:>7.1f}x")
@@ -0,0 +1,48 @@
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# pytest-benchmark suite for the drift, train and score hot paths (the bench_*.py
+# scripts next to it are standalone comparisons). Run from Local_workflow:
+#   pytest benchmarks                      # results saved under .benchmarks/
+#   pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15%
+# BENCH_SCALE multiplies every row count (e.g. 0.1 for a quick pass).
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'src'))
+SCORE_SRC = os.path.join(HERE, '..', '..', 'Azure', 'azure-mlops-project', 'ml', 'deployment', 'src')
+
+SCALE = float(os.getenv('BENCH_SCALE', '1'))
+
+# (rows, columns): few wide rows, many narrow rows, and a small frame for overheads
+SHAPES = {
+    'small': (1_000, 10),
+    'wide': (2_000, 500),
+    'tall': (200_000, 10),
+}
+
+
+def shape(name):
+    rows, cols = SHAPES[name]
+    return max(int(rows * SCALE), 20), cols
+
+
+@lru_cache(maxsize=None)
+def make_frames(rows, cols, seed=0):
+    # baseline and current batch; every other column of current is shifted
+    rng = np.random.default_rng(seed)
+    names = [f'f{i}' for i in range(cols)]
+    baseline = pd.DataFrame(rng.normal(size=(rows, cols)), columns=names)
+    shift = np.where(np.arange(cols) % 2 == 0, 0.0, 0.3)
+    current = pd.DataFrame(rng.normal(size=(rows, cols)) + shift, columns=names)
+    return baseline, current
+
+
+@lru_cache(maxsize=None)
+def make_classification(rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, cols)), columns=[f'f{i}' for i in range(cols)])
+    y = (X['f0'] + 0.5 * X['f1'] + rng.normal(scale=0.5, size=rows) > 0).astype(int)
+    return X, y
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from conftest import make_frames, shape
+from drift import build_baseline_profile, check_drift, check_drift_batch, population_stability_index
+
+
+@pytest.mark.parametrize('n', [1_000, 100_000, 1_000_000])
+def test_population_stability_index(benchmark, n):
+    rng = np.random.default_rng(n)
+    expected, actual = rng.normal(size=n), rng.normal(0.1, 1.1, size=n)
+    psi = benchmark(population_stability_index, expected, actual)
+    assert psi > 0
+
+
+@pytest.mark.parametrize('name', ['small', 'wide', 'tall'])
+def test_check_drift(benchmark, name):
+    baseline, current = make_frames(*shape(name))
+    report, alerts = benchmark(check_drift, baseline, current)
+    assert len(report) == baseline.shape[1] and alerts
+
+
+@pytest.mark.parametrize('name', ['small', 'wide', 'tall'])
+def test_check_drift_batch(benchmark, name):
+    baseline, current = make_frames(*shape(name))
+    report, alerts = benchmark(check_drift_batch, baseline, current)
+    assert len(report) == baseline.shape[1] and alerts
+
+
+@pytest.mark.parametrize('name', ['small', 'wide', 'tall'])
+def test_check_drift_profile(benchmark, name):
+    baseline, current = make_frames(*shape(name))
+    profile = build_baseline_profile(baseline)
+    report, alerts = benchmark(check_drift, profile, current)
+    assert len(report) == baseline.shape[1] and alerts
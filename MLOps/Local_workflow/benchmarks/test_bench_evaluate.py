@@ -0,0 +1,11 @@
+import pytest
+
+from conftest import make_frames, shape
+from evaluate import compute_feature_stats
+
+
+@pytest.mark.parametrize('name', ['small', 'wide', 'tall'])
+def test_compute_feature_stats(benchmark, name):
+    baseline, _ = make_frames(*shape(name))
+    stats = benchmark(compute_feature_stats, baseline)
+    assert list(stats.index) == list(baseline.columns)
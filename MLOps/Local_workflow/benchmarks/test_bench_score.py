@@ -0,0 +1,37 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+from conftest import SCORE_SRC, make_classification, shape
+
+
+@pytest.fixture(scope='module')
+def score(tmp_path_factory):
+    # the AML scoring script against an MLflow model of the RandomForest
+    import mlflow.sklearn
+    from mlflow.models import infer_signature
+    from model import build_model
+    from train import SKOPS_KWARGS
+    X, y = make_classification(*shape('small'))
+    clf = build_model().fit(X.to_numpy(), y)
+    model_dir = tmp_path_factory.mktemp('score') / 'model'
+    mlflow.sklearn.save_model(clf, str(model_dir), signature=infer_signature(X.to_numpy(), clf.predict(X.to_numpy())),
+                              **SKOPS_KWARGS)
+    mp = pytest.MonkeyPatch()
+    mp.setenv('AZUREML_MODEL_DIR', str(model_dir))
+    mp.syspath_prepend(SCORE_SRC)
+    module = importlib.import_module('score')
+    module.init()
+    yield module
+    mp.undo()
+    sys.modules.pop('score', None)
+
+
+@pytest.mark.parametrize('rows', [1, 100, 10_000])
+def test_score_run(benchmark, score, rows):
+    X, _ = make_classification(rows, shape('small')[1], seed=1)
+    body = json.dumps({'inputs': X.to_numpy().tolist()})
+    out = benchmark(score.run, body)
+    assert len(out['predictions']) == rows
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from conftest import make_classification, shape
+from model import build_model
+
+
+@pytest.mark.parametrize('name', ['small', 'wide', 'tall'])
+def test_fit(benchmark, name):
+    # the fit inside train_and_log, on synthetic data instead of iris
+    X, y = make_classification(*shape(name))
+    clf = benchmark.pedantic(lambda: build_model().fit(X, y), rounds=3, iterations=1)
+    assert clf.score(X, y) > 0.8
+
+
+def test_train_and_log(benchmark, tmp_path, monkeypatch):
+    # end to end on iris: fit, MLflow logging (SQLite store) and the local model copy
+    import train
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(train, 'MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    benchmark.pedantic(train.train_and_log, rounds=3, iterations=1)
+    assert os.path.exists(tmp_path / 'artifacts' / 'model.joblib')
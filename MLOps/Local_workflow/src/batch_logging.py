@@ -0,0 +1,118 @@
+import threading
+import time
+
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+
+# Buffers params, metrics and tags and sends them with MlflowClient.log_batch from
+# a background thread, so training never waits on a tracking-server round trip.
+# Use it inside the run; leaving the with block (or close()) flushes everything:
+#
+#   with mlflow.start_run() as run, BatchLogger(run.info.run_id) as log:
+#       log.log_metric('loss', loss, step=epoch)
+
+# log_batch limits per request
+MAX_ENTITIES = 1000
+MAX_PARAMS = 100
+MAX_TAGS = 100
+
+
+class BatchLogger:
+    def __init__(self, run_id, flush_interval=1.0, client=None):
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self.client = client or MlflowClient()
+        self.requests = 0
+        self._metrics, self._params, self._tags = [], [], []
+        self._queued = 0
+        self._sent = 0
+        self._flush_target = 0
+        self._error = None
+        self._closed = False
+        self._lock = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, name='mlflow-batch-logger', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _add(self, buffer, items):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('BatchLogger is closed')
+            buffer.extend(items)
+            self._queued += len(items)
+            if self._urgent():
+                self._lock.notify_all()
+
+    def log_param(self, key, value):
+        self._add(self._params, [Param(key, str(value))])
+
+    def log_params(self, params):
+        self._add(self._params, [Param(k, str(v)) for k, v in params.items()])
+
+    def log_metric(self, key, value, step=0):
+        self._add(self._metrics, [Metric(key, float(value), int(time.time() * 1000), step)])
+
+    def log_metrics(self, metrics, step=0):
+        now = int(time.time() * 1000)
+        self._add(self._metrics, [Metric(k, float(v), now, step) for k, v in metrics.items()])
+
+    def set_tag(self, key, value):
+        self._add(self._tags, [RunTag(key, str(value))])
+
+    def _urgent(self):
+        # send now instead of waiting for the interval: closing, a flush() is
+        # waiting, or a full request is already buffered
+        return (self._closed or self._sent < self._flush_target or len(self._params) >= MAX_PARAMS
+                or len(self._tags) >= MAX_TAGS or len(self._metrics) + len(self._params) + len(self._tags) >= MAX_ENTITIES)
+
+    def _take(self):
+        # trim the buffers in place: log_* calls pass them to _add before taking the lock
+        params, tags = self._params[:MAX_PARAMS], self._tags[:MAX_TAGS]
+        metrics = self._metrics[:MAX_ENTITIES - len(params) - len(tags)]
+        del self._params[:len(params)], self._tags[:len(tags)], self._metrics[:len(metrics)]
+        return metrics, params, tags
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._urgent():
+                    self._lock.wait(self.flush_interval)
+                metrics, params, tags = self._take()
+                if not (metrics or params or tags):
+                    if self._closed:
+                        return
+                    continue
+            try:
+                self.client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+            except Exception as e:  # surfaced to the training script on flush/close
+                with self._lock:
+                    self._error = self._error or e
+            with self._lock:
+                self.requests += 1
+                self._sent += len(metrics) + len(params) + len(tags)
+                self._lock.notify_all()
+
+    def flush(self):
+        # blocks until everything logged so far has been sent
+        with self._lock:
+            self._flush_target = self._queued
+            self._lock.notify_all()
+            while self._sent < self._flush_target and self._thread.is_alive():
+                self._lock.wait(0.1)
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._thread.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
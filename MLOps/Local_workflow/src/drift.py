@@ -1,7 +1,21 @@
+import math
+import warnings
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+try:
+    # private scipy helper behind ks_2samp(method='exact'): the exact p-value from
+    # the statistic and sample sizes alone, without the samples. Where the samples
+    # are at hand the public ks_2samp is the fallback; without them (baseline
+    # profiles, streaming) the fallback is the asymptotic kstwo, with a warning.
+    from scipy.stats._stats_py import _attempt_exact_2kssamp
+except ImportError:
+    _attempt_exact_2kssamp = None
+
+# ks_2samp(method='auto') is exact up to this sample size, asymptotic above it
+KS_MAX_EXACT_N = 10000
+
 def population_stability_index(expected, actual, buckets=10):
     expected = np.array(expected).astype(float)
     actual = np.array(actual).astype(float)
@@ -27,6 +41,9 @@ def ks_test(expected, actual):
     return stats.ks_2samp(expected, actual)
 
 def check_drift(baseline_df, current_df, numeric_features=None, psi_threshold=0.1, ks_pvalue_threshold=0.05):
+    if isinstance(baseline_df, dict):
+        # a precomputed baseline profile (build_baseline_profile / load_baseline_profile)
+        return check_drift_profile(baseline_df, current_df, numeric_features, psi_threshold, ks_pvalue_threshold)
     numeric_features = numeric_features or baseline_df.select_dtypes(include=[np.number]).columns.tolist()
     drift_report = {}
     alerts = []
@@ -38,17 +55,259 @@ def check_drift(baseline_df, current_df, numeric_features=None, psi_threshold=0.
             continue
         psi = population_stability_index(b, c, buckets=10)
         ks_res = ks_test(b, c)
-        drifted = (not np.isnan(psi) and psi > psi_threshold) or (ks_res.pvalue < ks_pvalue_threshold)
-        drift_report[col] = {
-            'psi': float(psi) if not np.isnan(psi) else None,
-            'ks_stat': float(ks_res.statistic),
-            'ks_pvalue': float(ks_res.pvalue),
-            'drift': bool(drifted)
-        }
-        if drifted:
+        drift_report[col] = _report_entry(psi, ks_res.statistic, ks_res.pvalue, psi_threshold, ks_pvalue_threshold)
+        if drift_report[col]['drift']:
+            alerts.append(col)
+    return drift_report, alerts
+
+def _report_entry(psi, ks_stat, ks_pvalue, psi_threshold, ks_pvalue_threshold):
+    drifted = (not np.isnan(psi) and psi > psi_threshold) or (ks_pvalue < ks_pvalue_threshold)
+    return {
+        'psi': float(psi) if not np.isnan(psi) else None,
+        'ks_stat': float(ks_stat),
+        'ks_pvalue': float(ks_pvalue),
+        'drift': bool(drifted)
+    }
+
+# --- batched engine: all columns at once ---
+# Internally every matrix is feature-major (one row per column of the frame) so
+# that sorts and reductions run over contiguous memory.
+
+def _feature_major(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=float).T)
+
+def _sorted_percentiles(sorted_values, counts, q):
+    # np.percentile(method='linear') of every row of a NaN-last sorted matrix,
+    # where row j holds counts[j] valid values
+    rows = np.arange(sorted_values.shape[0])[:, None]
+    last = (counts - 1)[:, None]
+    virtual = last * (np.asarray(q, dtype=float) / 100)[None, :]
+    prev = np.floor(virtual)
+    gamma = virtual - prev
+    prev = prev.astype(np.intp)
+    above = virtual >= last
+    nxt = np.where(above, last, prev + 1)
+    prev = np.where(above, last, prev)
+    a = sorted_values[rows, prev]
+    b = sorted_values[rows, nxt]
+    diff = b - a
+    return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+def _batch_histogram(values, edges):
+    # np.histogram(values[j], bins=edges[j]) for every row; NaNs are never counted
+    below = [(values < edges[:, [i]]).sum(axis=1) for i in range(edges.shape[1] - 1)]
+    below.append((values <= edges[:, [-1]]).sum(axis=1))
+    return np.diff(np.stack(below, axis=1), axis=1)
+
+def _psi_from_counts(expected_counts, actual_counts):
+    # counts are (features x buckets); returns one PSI per feature
+    eps = 1e-8
+    expected_perc = expected_counts.astype(float) / (expected_counts.sum(axis=1, keepdims=True) + eps)
+    actual_perc = actual_counts.astype(float) / (actual_counts.sum(axis=1, keepdims=True) + eps)
+    return np.sum((expected_perc - actual_perc) * np.log((expected_perc + eps) / (actual_perc + eps)), axis=1)
+
+def _exact_ks_pvalue(n1, n2, d):
+    # (success, d on the 1/lcm grid, p-value) from the scipy helper; None when the
+    # helper is missing or its signature changed
+    if _attempt_exact_2kssamp is None:
+        return None
+    try:
+        return _attempt_exact_2kssamp(n1, n2, math.gcd(n1, n2), d, 'two-sided')
+    except TypeError:
+        return None
+
+def _ks_pvalues(d, n1, n2, samples=None):
+    # p-values of ks_2samp(method='auto', alternative='two-sided') given the statistics;
+    # like scipy, the exact method also snaps d onto the 1/lcm(n1, n2) grid.
+    # samples(j) -> (data1, data2) lets the public ks_2samp stand in for the helper.
+    d = np.asarray(d, dtype=float).copy()
+    n1 = np.asarray(n1, dtype=np.int64)
+    n2 = np.asarray(n2, dtype=np.int64)
+    pvalues = np.full(d.shape, np.nan)
+    cache = {}
+    missing = []
+    for j in np.flatnonzero(np.maximum(n1, n2) <= KS_MAX_EXACT_N):
+        a, b = int(n1[j]), int(n2[j])
+        h = int(np.round(d[j] * (a // math.gcd(a, b)) * b))
+        if (a, b, h) not in cache:
+            cache[(a, b, h)] = _exact_ks_pvalue(a, b, d[j])
+        if cache[(a, b, h)] is None:
+            missing.append(j)
+            continue
+        success, d_exact, prob = cache[(a, b, h)]
+        if success:
+            d[j], pvalues[j] = d_exact, prob
+    if missing and samples is not None:
+        for j in missing:
+            res = stats.ks_2samp(*samples(j))
+            d[j], pvalues[j] = res.statistic, res.pvalue
+    elif missing:
+        warnings.warn(
+            'scipy.stats._stats_py._attempt_exact_2kssamp is unavailable in this SciPy version: KS p-values for '
+            f'{len(missing)} feature(s) with at most {KS_MAX_EXACT_N} rows are asymptotic and will differ from '
+            'ks_2samp', RuntimeWarning, stacklevel=2)
+    asymp = np.isnan(pvalues)
+    if asymp.any():
+        m = np.maximum(n1[asymp], n2[asymp]).astype(float)
+        n = np.minimum(n1[asymp], n2[asymp]).astype(float)
+        pvalues[asymp] = stats.kstwo.sf(d[asymp], np.round(m * n / (m + n)))
+    return d, np.clip(pvalues, 0, 1)
+
+def _psi_rows(expected, actual, buckets):
+    sorted_expected = np.sort(expected, axis=1)
+    counts = (~np.isnan(expected)).sum(axis=1)
+    edges = _sorted_percentiles(sorted_expected, counts, np.linspace(0, 100, buckets + 1))
+    return _psi_from_counts(_batch_histogram(sorted_expected, edges), _batch_histogram(actual, edges))
+
+def _ks_rows(data1, data2):
+    n1 = (~np.isnan(data1)).sum(axis=1)
+    n2 = (~np.isnan(data2)).sum(axis=1)
+    combined = np.concatenate([data1, data2], axis=1)
+    # tie order does not matter: the ECDFs are only read at the last of a run of ties
+    from_first = np.argsort(combined, axis=1) < data1.shape[1]
+    values = np.sort(combined, axis=1)
+    cdf1 = np.cumsum(from_first, axis=1) / n1[:, None]
+    cdf2 = np.cumsum(~from_first, axis=1) / n2[:, None]
+    keep = ~np.isnan(values)
+    keep[:, :-1] &= values[:, :-1] != values[:, 1:]
+    cddiffs = np.where(keep, cdf1 - cdf2, 0.0)
+    d = np.maximum(cddiffs.max(axis=1), np.clip(-cddiffs.min(axis=1), 0, 1))
+
+    def samples(j):
+        return data1[j][~np.isnan(data1[j])], data2[j][~np.isnan(data2[j])]
+    return _ks_pvalues(d, n1, n2, samples)
+
+def batch_psi(expected, actual, buckets=10):
+    # population_stability_index for every column of two (rows x columns) arrays
+    return _psi_rows(_feature_major(expected), _feature_major(actual), buckets)
+
+def batch_ks_2samp(data1, data2):
+    # two-sided ks_2samp (statistic, pvalue) for every column pair; NaNs are ignored per column
+    return _ks_rows(_feature_major(data1), _feature_major(data2))
+
+def check_drift_batch(baseline_df, current_df, numeric_features=None, psi_threshold=0.1, ks_pvalue_threshold=0.05,
+                      block_size=256):
+    # same report as check_drift, computed block_size columns at a time
+    numeric_features = numeric_features or baseline_df.select_dtypes(include=[np.number]).columns.tolist()
+    baseline = baseline_df[numeric_features].to_numpy(dtype=float).T
+    current = current_df[numeric_features].to_numpy(dtype=float).T
+    enough = ((~np.isnan(baseline)).sum(axis=1) >= 10) & ((~np.isnan(current)).sum(axis=1) >= 10)
+    psi = np.full(len(numeric_features), np.nan)
+    ks_stat = np.full(len(numeric_features), np.nan)
+    ks_pvalue = np.full(len(numeric_features), np.nan)
+    eligible = np.flatnonzero(enough)
+    for start in range(0, len(eligible), block_size):
+        idx = eligible[start:start + block_size]
+        b = np.ascontiguousarray(baseline[idx])
+        c = np.ascontiguousarray(current[idx])
+        psi[idx] = _psi_rows(b, c, buckets=10)
+        ks_stat[idx], ks_pvalue[idx] = _ks_rows(b, c)
+
+    return _assemble_report(numeric_features, enough, psi, ks_stat, ks_pvalue, psi_threshold, ks_pvalue_threshold)
+
+def _assemble_report(columns, enough, psi, ks_stat, ks_pvalue, psi_threshold, ks_pvalue_threshold):
+    drift_report = {}
+    alerts = []
+    for j, col in enumerate(columns):
+        if not enough[j]:
+            drift_report[col] = {'reason': 'not enough data'}
+            continue
+        drift_report[col] = _report_entry(psi[j], ks_stat[j], ks_pvalue[j], psi_threshold, ks_pvalue_threshold)
+        if drift_report[col]['drift']:
             alerts.append(col)
     return drift_report, alerts
 
+# --- baseline profiles: the baseline half of the batched engine, computed once ---
+# A profile holds, per column, the PSI quantile edges and bucket counts plus an
+# ECDF sketch of at most sketch_size distinct knots (value, fraction of baseline <= value).
+# Baselines no longer than sketch_size are kept whole, so PSI and KS match
+# check_drift exactly; longer ones bound the KS statistic error by ~1/sketch_size.
+
+def _ecdf_sketch(sorted_values, counts, sketch_size):
+    n_cols, n_rows = sorted_values.shape
+    # index of the last element of each run of tied values
+    run_end = np.where(np.concatenate([sorted_values[:, :-1] != sorted_values[:, 1:],
+                                       np.ones((n_cols, 1), dtype=bool)], axis=1), np.arange(n_rows), n_rows)
+    run_end = np.minimum.accumulate(run_end[:, ::-1], axis=1)[:, ::-1]
+    knots = np.minimum(counts, sketch_size)
+    width = max(int(knots.max(initial=0)), 1)
+    i = np.arange(width)[None, :]
+    safe_knots = np.maximum(knots, 1)[:, None]
+    ranks = np.minimum(((i + 1) * counts[:, None] + safe_knots - 1) // safe_knots - 1, n_rows - 1)
+    rows = np.arange(n_cols)[:, None]
+    padding = i >= knots[:, None]
+    values = np.where(padding, np.nan, sorted_values[rows, ranks])
+    cdf = np.where(padding, np.nan, (run_end[rows, ranks] + 1) / np.maximum(counts, 1)[:, None])
+    # keep one knot per distinct value, compacted to the left
+    values[:, :-1][values[:, :-1] == values[:, 1:]] = np.nan
+    order = np.argsort(values, axis=1, kind='stable')
+    values = np.take_along_axis(values, order, axis=1)
+    cdf = np.where(np.isnan(values), np.nan, np.take_along_axis(cdf, order, axis=1))
+    width = max(int((~np.isnan(values)).sum(axis=1).max(initial=0)), 1)
+    return values[:, :width], cdf[:, :width]
+
+def build_baseline_profile(baseline_df, numeric_features=None, buckets=10, sketch_size=1000):
+    numeric_features = numeric_features or baseline_df.select_dtypes(include=[np.number]).columns.tolist()
+    values = np.sort(_feature_major(baseline_df[numeric_features].to_numpy(dtype=float)), axis=1)
+    counts = (~np.isnan(values)).sum(axis=1)
+    edges = _sorted_percentiles(values, np.maximum(counts, 1), np.linspace(0, 100, buckets + 1))
+    sketch_values, sketch_cdf = _ecdf_sketch(values, counts, sketch_size)
+    return {
+        'columns': list(numeric_features),
+        'n_rows': len(baseline_df),
+        'count': counts,
+        'edges': edges,
+        'bucket_counts': _batch_histogram(values, edges),
+        'sketch_values': sketch_values,
+        'sketch_cdf': sketch_cdf,
+    }
+
+def save_baseline_profile(profile, path):
+    np.savez_compressed(path, **profile)
+
+def load_baseline_profile(path):
+    with np.load(path) as data:
+        profile = {key: data[key] for key in data.files}
+    profile['columns'] = profile['columns'].tolist()
+    profile['n_rows'] = int(profile['n_rows'])
+    return profile
+
+def _ks_rows_sketch(sketch_values, sketch_cdf, n_baseline, current):
+    # two-sided KS of current rows against the baseline ECDF sketches
+    n_current = (~np.isnan(current)).sum(axis=1)
+    combined = np.concatenate([sketch_values, current], axis=1)
+    order = np.argsort(combined, axis=1)
+    values = np.sort(combined, axis=1)
+    knot_cdf = np.concatenate([np.nan_to_num(sketch_cdf), np.zeros(current.shape)], axis=1)
+    cdf1 = np.maximum.accumulate(np.take_along_axis(knot_cdf, order, axis=1), axis=1)
+    cdf2 = np.cumsum(order >= sketch_values.shape[1], axis=1) / n_current[:, None]
+    keep = ~np.isnan(values)
+    keep[:, :-1] &= values[:, :-1] != values[:, 1:]
+    cddiffs = np.where(keep, cdf1 - cdf2, 0.0)
+    d = np.maximum(cddiffs.max(axis=1), np.clip(-cddiffs.min(axis=1), 0, 1))
+    return _ks_pvalues(d, n_baseline, n_current)
+
+def check_drift_profile(profile, current_df, numeric_features=None, psi_threshold=0.1, ks_pvalue_threshold=0.05,
+                        block_size=256):
+    # check_drift against a baseline profile: only current_df is scanned
+    numeric_features = numeric_features or profile['columns']
+    position = {col: j for j, col in enumerate(profile['columns'])}
+    columns = np.array([position[col] for col in numeric_features], dtype=np.intp)
+    current = current_df[numeric_features].to_numpy(dtype=float).T
+    enough = (profile['count'][columns] >= 10) & ((~np.isnan(current)).sum(axis=1) >= 10)
+    psi = np.full(len(numeric_features), np.nan)
+    ks_stat = np.full(len(numeric_features), np.nan)
+    ks_pvalue = np.full(len(numeric_features), np.nan)
+    eligible = np.flatnonzero(enough)
+    for start in range(0, len(eligible), block_size):
+        idx = eligible[start:start + block_size]
+        cols = columns[idx]
+        c = np.ascontiguousarray(current[idx])
+        psi[idx] = _psi_from_counts(profile['bucket_counts'][cols], _batch_histogram(c, profile['edges'][cols]))
+        ks_stat[idx], ks_pvalue[idx] = _ks_rows_sketch(profile['sketch_values'][cols], profile['sketch_cdf'][cols],
+                                                       profile['count'][cols], c)
+    return _assemble_report(numeric_features, enough, psi, ks_stat, ks_pvalue, psi_threshold, ks_pvalue_threshold)
+
 if __name__ == '__main__':
     from utils import load_example_dataset, split
     df = load_example_dataset()
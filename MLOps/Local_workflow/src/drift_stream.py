@@ -0,0 +1,219 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from drift import _assemble_report, _batch_histogram, _ks_pvalues, _psi_from_counts
+
+# Chunked drift checks against a baseline profile (drift.build_baseline_profile).
+# Per column only the PSI bucket counts and, at every knot of the baseline ECDF
+# sketch, the number of current values below / at-or-below it are kept, so memory
+# is bounded by the chunk size and the profile, not by the size of the batch.
+# The counts are exact, so the report equals check_drift(profile, whole_batch).
+# All state is additive, so accumulators built on separate partitions merge
+# exactly (StreamingDrift.merge) and can be reduced in any order.
+
+
+class StreamingDrift:
+    def __init__(self, profile, numeric_features=None):
+        self.profile = profile
+        self.columns = list(numeric_features or profile['columns'])
+        position = {col: j for j, col in enumerate(profile['columns'])}
+        idx = np.array([position[col] for col in self.columns], dtype=np.intp)
+        self.edges = profile['edges'][idx]
+        self.baseline_counts = profile['bucket_counts'][idx]
+        self.baseline_n = profile['count'][idx]
+        self.knots = profile['sketch_values'][idx]
+        self.knot_cdf = profile['sketch_cdf'][idx]
+        self.n = np.zeros(len(self.columns), dtype=np.int64)
+        self.bucket_counts = np.zeros(self.baseline_counts.shape, dtype=np.int64)
+        self.below = np.zeros(self.knots.shape, dtype=np.int64)
+        self.at_or_below = np.zeros(self.knots.shape, dtype=np.int64)
+        self.rows = 0
+
+    def update(self, chunk_df):
+        values = np.sort(chunk_df[self.columns].to_numpy(dtype=float).T, axis=1)
+        valid = (~np.isnan(values)).sum(axis=1)
+        self.rows += len(chunk_df)
+        self.n += valid
+        self.bucket_counts += _batch_histogram(values, self.edges)
+        for j in range(len(self.columns)):
+            self.below[j] += np.searchsorted(values[j, :valid[j]], self.knots[j], side='left')
+            self.at_or_below[j] += np.searchsorted(values[j, :valid[j]], self.knots[j], side='right')
+        return self
+
+    def merge(self, other):
+        if self.columns != other.columns or not np.array_equal(self.edges, other.edges, equal_nan=True):
+            raise ValueError('can only merge accumulators built from the same profile and columns')
+        self.rows += other.rows
+        self.n += other.n
+        self.bucket_counts += other.bucket_counts
+        self.below += other.below
+        self.at_or_below += other.at_or_below
+        return self
+
+    def ks_statistic(self):
+        # sup |F_baseline - F_current| with the baseline ECDF a step function on the
+        # knots: F_current is only needed at each knot and just below it
+        n = np.maximum(self.n, 1)[:, None]
+        knot_cdf = np.nan_to_num(self.knot_cdf)
+        previous_cdf = np.concatenate([np.zeros((len(self.columns), 1)), knot_cdf[:, :-1]], axis=1)
+        padding = np.isnan(self.knots)
+        at_knot = np.where(padding, 0.0, knot_cdf - self.at_or_below / n)
+        below_knot = np.where(padding, 0.0, previous_cdf - self.below / n)
+        return np.maximum(np.abs(at_knot).max(axis=1, initial=0), np.abs(below_knot).max(axis=1, initial=0))
+
+    def report(self, psi_threshold=0.1, ks_pvalue_threshold=0.05):
+        enough = (self.baseline_n >= 10) & (self.n >= 10)
+        psi = np.full(len(self.columns), np.nan)
+        ks_stat = np.full(len(self.columns), np.nan)
+        ks_pvalue = np.full(len(self.columns), np.nan)
+        if enough.any():
+            psi[enough] = _psi_from_counts(self.baseline_counts[enough], self.bucket_counts[enough])
+            ks_stat[enough], ks_pvalue[enough] = _ks_pvalues(self.ks_statistic()[enough], self.baseline_n[enough],
+                                                             self.n[enough])
+        return _assemble_report(self.columns, enough, psi, ks_stat, ks_pvalue, psi_threshold, ks_pvalue_threshold)
+
+
+class KLLSketch:
+    # KLL quantile sketch (Karnin, Lang & Liberty 2016): compactors of geometrically
+    # shrinking capacity; items at level h stand for 2**h values. Rank queries are
+    # off by roughly n / k at most and sketches merge by concatenating levels.
+
+    def __init__(self, k=400, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            if len(self.compactors[level]) > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                items = np.sort(self.compactors[level])
+                even = len(items) - len(items) % 2
+                promoted = items[self._rng.integers(2):even:2]
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+                self.compactors[level] = items[even:]
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(c), 2 ** level, dtype=np.int64) for level, c in enumerate(self.compactors)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def rank(self, x, side='right'):
+        # estimated number of values <= x (side='right') or < x (side='left')
+        values, cumulative = self._weighted()
+        pos = np.searchsorted(values, x, side=side)
+        if not len(values):
+            return np.zeros(np.shape(pos), dtype=np.int64)
+        return np.where(pos > 0, cumulative[np.maximum(pos - 1, 0)], 0)
+
+    def quantile(self, q):
+        values, cumulative = self._weighted()
+        if not len(values):  # nothing seen yet (or only NaNs)
+            return np.full(np.shape(q), np.nan)
+        return values[np.minimum(np.searchsorted(cumulative, np.asarray(q) * cumulative[-1]), len(values) - 1)]
+
+
+class DriftSketch:
+    # Profile-independent summary of one partition: a KLL sketch per column.
+    # Workers summarise partitions without the baseline; the reducer merges the
+    # sketches and compares the result with any profile (against). PSI bucket and
+    # KS knot counts are then KLL rank estimates instead of exact counts.
+
+    def __init__(self, columns, k=400, seed=None):
+        self.columns = list(columns)
+        self.rows = 0
+        # independent compaction coin flips per column, still reproducible from seed
+        seeds = np.random.SeedSequence(seed).spawn(len(self.columns))
+        self.sketches = [KLLSketch(k, s) for s in seeds]
+
+    def update(self, chunk_df):
+        values = chunk_df[self.columns].to_numpy(dtype=float)
+        self.rows += len(chunk_df)
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(values[:, j])
+        return self
+
+    def merge(self, other):
+        if self.columns != other.columns:
+            raise ValueError('can only merge sketches of the same columns')
+        self.rows += other.rows
+        for mine, theirs in zip(self.sketches, other.sketches):
+            mine.merge(theirs)
+        return self
+
+    def against(self, profile):
+        acc = StreamingDrift(profile, self.columns)
+        acc.rows = self.rows
+        for j, sketch in enumerate(self.sketches):
+            acc.n[j] = sketch.n
+            below = sketch.rank(acc.edges[j], side='left')
+            below[-1] = sketch.rank(acc.edges[j, -1], side='right')
+            acc.bucket_counts[j] = np.diff(below)
+            acc.below[j] = sketch.rank(acc.knots[j], side='left')
+            acc.at_or_below[j] = sketch.rank(acc.knots[j], side='right')
+        return acc
+
+
+def iter_csv_chunks(paths, chunksize=100_000, usecols=None, dtype=None):
+    for path in paths:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols, dtype=dtype)
+
+
+def check_drift_stream(profile, chunks, numeric_features=None, psi_threshold=0.1, ks_pvalue_threshold=0.05):
+    acc = StreamingDrift(profile, numeric_features)
+    for chunk in chunks:
+        acc.update(chunk)
+    return acc.report(psi_threshold, ks_pvalue_threshold)
+
+
+def _summarise_partition(task):
+    summary, paths, chunksize = task
+    # only the summarised columns are parsed, straight to float64
+    dtype = dict.fromkeys(summary.columns, 'float64')
+    for chunk in iter_csv_chunks(paths, chunksize, usecols=summary.columns, dtype=dtype):
+        summary.update(chunk)
+    return summary
+
+
+def summarise_partitions(partitions, make_summary, chunksize=100_000, workers=None):
+    # map: one summary (StreamingDrift or DriftSketch) per partition, in a process
+    # pool; reduce: merge them. partitions is a list of lists of CSV paths; none
+    # at all gives an empty summary.
+    tasks = [(make_summary(), paths, chunksize) for paths in partitions]
+    if not tasks:
+        return make_summary()
+    if workers == 1:
+        summaries = [_summarise_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = list(pool.map(_summarise_partition, tasks))
+    return reduce(lambda a, b: a.merge(b), summaries)
@@ -1,10 +1,14 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
-from model import load_model
+from drift import build_baseline_profile, save_baseline_profile
+from model import load_flat_model, load_model
 from utils import load_example_dataset, split
 
 
 MODEL_PATH = 'artifacts/model.joblib'
+FLAT_MODEL_PATH = 'artifacts/model_flat.npz'
 
 
 def compute_feature_stats(df):
@@ -12,17 +16,37 @@ def compute_feature_stats(df):
     return df.describe().T[['mean', 'std', 'count']]
 
 
+def load_classifier(backend='sklearn', model_path=MODEL_PATH, flat_model_path=FLAT_MODEL_PATH):
+    # sklearn is the default: its Cython traversal has the best bulk throughput.
+    # The flat export (train.py --export-flat) is only used when asked for, and
+    # only if it was written after the model it was exported from.
+    if backend == 'sklearn':
+        return load_model(model_path)
+    if not os.path.exists(flat_model_path):
+        raise FileNotFoundError(f'{flat_model_path} not found; run train.py --export-flat')
+    if os.path.exists(model_path) and os.path.getmtime(flat_model_path) < os.path.getmtime(model_path):
+        raise ValueError(f'{flat_model_path} is older than {model_path}; re-run train.py --export-flat')
+    return load_flat_model(flat_model_path, backend=backend)
+
+
 if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--backend', choices=['sklearn', 'numpy', 'numba'], default='sklearn',
+                   help='predict with the sklearn model or the flat export (forest.FlatForest) on that backend')
+    args = p.parse_args()
     df = load_example_dataset()
     X_train, X_test, y_train, y_test = split(df)
     # compute baseline stats from train
     stats = compute_feature_stats(X_train)
     stats.to_csv('artifacts/baseline_feature_stats.csv')
     print('Saved baseline feature stats to artifacts/baseline_feature_stats.csv')
+    # drift checks compare new batches against this instead of rescanning the training data
+    save_baseline_profile(build_baseline_profile(X_train), 'artifacts/baseline_profile.npz')
+    print('Saved baseline drift profile to artifacts/baseline_profile.npz')
 
 
     # optional: load model and evaluate
-    clf = load_model(MODEL_PATH)
+    clf = load_classifier(args.backend)
     preds = clf.predict(X_test)
     from sklearn.metrics import accuracy_score
     print('Test accuracy:', accuracy_score(y_test, preds))
\ No newline at end of file
@@ -0,0 +1,134 @@
+import numpy as np
+
+try:
+    # optional compiled traversal; the NumPy one below is used without numba
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# A fitted RandomForestClassifier flattened into packed arrays, one entry per node
+# across all trees, with a batched traversal in place of sklearn's per-tree
+# dispatch: a NumPy traversal, or a numba kernel when asked for. Leaves point
+# to themselves (left[leaf] == leaf). Predictions are identical to clf.predict:
+# inputs are compared as float32 like sklearn does, leaf values are normalised the
+# way DecisionTreeClassifier.predict_proba does and trees are summed in order.
+
+
+def flatten_forest(clf):
+    feature, threshold, left, right, missing_left, value, roots = [], [], [], [], [], [], []
+    offset = 0
+    for est in clf.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        leaf = tree.children_left == -1
+        idx = np.arange(offset, offset + n)
+        roots.append(offset)
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        left.append(np.where(leaf, idx, tree.children_left + offset))
+        right.append(np.where(leaf, idx, tree.children_right + offset))
+        mgl = getattr(tree, 'missing_go_to_left', np.zeros(n, dtype=np.uint8))
+        missing_left.append(mgl.astype(bool) & ~leaf)
+        proba = tree.value[:, 0, :clf.n_classes_].astype(np.float64)
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value.append(proba / normalizer)
+        offset += n
+    return {
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'missing_left': np.concatenate(missing_left),
+        'value': np.concatenate(value),
+        'roots': np.array(roots, dtype=np.int32),
+        'depth': np.array(max(est.tree_.max_depth for est in clf.estimators_)),
+        'classes': clf.classes_,
+    }
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _accumulate_compiled(X, feature, threshold, left, right, missing_left, value, roots, out, block_rows):
+        # tree-major inside each block of rows keeps one tree's nodes in cache;
+        # blocks run in parallel and every row still sums trees in order
+        for b in prange((X.shape[0] + block_rows - 1) // block_rows):
+            stop = min((b + 1) * block_rows, X.shape[0])
+            for t in range(roots.shape[0]):
+                for i in range(b * block_rows, stop):
+                    node = roots[t]
+                    while left[node] != node:
+                        x = X[i, feature[node]]
+                        if x <= threshold[node] or (np.isnan(x) and missing_left[node]):
+                            node = left[node]
+                        else:
+                            node = right[node]
+                    for k in range(value.shape[1]):
+                        out[i, k] += value[node, k]
+
+
+class FlatForest:
+    def __init__(self, arrays, block_rows=2048, backend='numpy'):
+        if backend not in ('numpy', 'numba'):
+            raise ValueError(f'unknown backend {backend!r}')
+        self.arrays = arrays
+        self.block_rows = block_rows
+        self.backend = backend
+        if self.backend == 'numba' and njit is None:
+            raise ImportError('the numba backend needs numba installed')
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+        self.depth = int(self.depth)
+        self.is_leaf = self.left == np.arange(len(self.left))
+
+    @classmethod
+    def from_sklearn(cls, clf, **kwargs):
+        return cls(flatten_forest(clf), **kwargs)
+
+    def save(self, path):
+        np.savez(path, **self.arrays)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files}, **kwargs)
+
+    def _leaves(self, X):
+        # (rows, trees) leaf node ids. All (row, tree) pairs step down together;
+        # pairs that reached a leaf drop out of the active set, so the work is the
+        # total path length rather than rows * trees * max depth.
+        n_trees = len(self.roots)
+        flat_x = X.ravel()
+        node = np.tile(self.roots, len(X))
+        offset = np.repeat(np.arange(len(X), dtype=np.int64) * X.shape[1], n_trees)
+        check_missing = self.missing_left.any() and np.isnan(flat_x).any()
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_x[offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if check_missing:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            step = np.where(go_left, self.left[current], self.right[current])
+            node[active] = step
+            active = active[~self.is_leaf[step]]
+        return node.reshape(len(X), n_trees)
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        proba = np.zeros((len(X), self.value.shape[1]))
+        if self.backend == 'numba':
+            _accumulate_compiled(X, self.feature, self.threshold, self.left, self.right, self.missing_left,
+                                 self.value, self.roots, proba, self.block_rows)
+        else:
+            for start in range(0, len(X), self.block_rows):
+                block = slice(start, start + self.block_rows)
+                leaves = self._leaves(X[block])
+                out = proba[block]
+                for t in range(leaves.shape[1]):
+                    out += self.value[leaves[:, t]]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -1,5 +1,6 @@
 import joblib
 from sklearn.ensemble import RandomForestClassifier
+from forest import FlatForest
 
 
 def build_model(random_state=42):
@@ -11,4 +12,13 @@ def save_model(clf, path):
 
 
 def load_model(path):
-    return joblib.load(path)
\ No newline at end of file
+    return joblib.load(path)
+
+
+def save_flat_model(clf, path):
+    # packed-array copy of the forest for sklearn-free inference (forest.FlatForest)
+    FlatForest.from_sklearn(clf).save(path)
+
+
+def load_flat_model(path, backend='numpy'):
+    return FlatForest.load(path, backend=backend)
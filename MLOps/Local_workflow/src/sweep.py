@@ -0,0 +1,131 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+from utils import load_example_dataset, split
+
+# Hyperparameter sweep over RandomForestClassifier. The data is loaded and split
+# once and written to .npy files; workers open them with mmap_mode='r', so every
+# candidate shares the same pages instead of receiving a pickled copy. Candidates
+# are fitted in a process pool and logged as nested runs under one parent run.
+# Workers are spawned rather than forked: they only need the file paths, and a
+# fork after threaded native code has run (numba, BLAS) can deadlock the child.
+
+DEFAULT_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 4, 8],
+    'min_samples_leaf': [1, 3],
+}
+ARRAYS = ('X_train', 'X_test', 'y_train', 'y_test')
+
+_data = {}
+
+
+def share_split(folder):
+    df = load_example_dataset()
+    X_train, X_test, y_train, y_test = split(df)
+    for name, arr in zip(ARRAYS, (X_train, X_test, y_train, y_test)):
+        np.save(os.path.join(folder, f'{name}.npy'), np.ascontiguousarray(arr.to_numpy()))
+    return list(X_train.columns)
+
+
+def _open_split(folder):
+    for name in ARRAYS:
+        _data[name] = np.load(os.path.join(folder, f'{name}.npy'), mmap_mode='r')
+
+
+def _fit_candidate(params):
+    start = time.perf_counter()
+    clf = RandomForestClassifier(random_state=42, n_jobs=1, **params).fit(_data['X_train'], _data['y_train'])
+    fit_s = time.perf_counter() - start
+    acc = accuracy_score(_data['y_test'], clf.predict(_data['X_test']))
+    return params, float(acc), fit_s
+
+
+def search_space(grid=None, n_iter=None, seed=42):
+    grid = grid or DEFAULT_GRID
+    if n_iter:
+        return list(ParameterSampler(grid, n_iter=n_iter, random_state=seed))
+    return list(ParameterGrid(grid))
+
+
+def fit_candidates(folder, candidates, workers=None):
+    # returns ([(params, test_accuracy, fit_seconds)], wall-clock seconds)
+    start = time.perf_counter()
+    if workers == 1:
+        _open_split(folder)
+        results = [_fit_candidate(params) for params in candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_open_split, initargs=(folder,)) as pool:
+            results = list(pool.map(_fit_candidate, candidates))
+    return results, time.perf_counter() - start
+
+
+def run_sweep(candidates, workers=None, run_name='sweep'):
+    # imported here so spawned workers, which re-import this module, skip mlflow
+    import mlflow
+    import mlflow.sklearn
+    from train import MLFLOW_TRACKING_URI, SKOPS_KWARGS
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    mlflow.set_experiment("local_experiment")
+    with tempfile.TemporaryDirectory() as folder:
+        columns = share_split(folder)
+        results, wall_s = fit_candidates(folder, candidates, workers)
+        with mlflow.start_run(run_name=run_name) as parent:
+            for i, (params, acc, fit_s) in enumerate(results):
+                with mlflow.start_run(run_name=f'{run_name}-{i}', nested=True):
+                    mlflow.log_params(params)
+                    mlflow.log_metric('test_accuracy', acc)
+                    mlflow.log_metric('fit_seconds', fit_s)
+            best_params, best_acc, _ = max(results, key=lambda r: r[1])
+            mlflow.log_params({f'best_{k}': v for k, v in best_params.items()})
+            mlflow.log_metric('best_test_accuracy', best_acc)
+            mlflow.log_metric('candidates', len(results))
+            mlflow.log_metric('sweep_wall_seconds', wall_s)
+            # refit the winner once in the parent so the run carries a usable model
+            _open_split(folder)
+            best = RandomForestClassifier(random_state=42, **best_params).fit(_data['X_train'], _data['y_train'])
+            input_example = np.asarray(_data['X_train'][:5])
+            mlflow.sklearn.log_model(best, name='model', input_example=input_example, **SKOPS_KWARGS)
+            _data.clear()
+    print(f"Sweep saved: {parent.info.run_id} ({len(results)} candidates, best test_accuracy={best_acc:.4f}, "
+          f"{wall_s:.2f}s, features={columns})")
+    return results
+
+
+def scaling(candidates, max_workers=None):
+    # wall clock of the same sweep (no logging) at 1, 2, 4, ... max_workers processes
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)})
+    with tempfile.TemporaryDirectory() as folder:
+        share_split(folder)
+        timings = [(n, fit_candidates(folder, candidates, n)[1]) for n in counts]
+        _data.clear()
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    for n, seconds in timings:
+        print(f"{n:>8} {seconds:>9.2f} {timings[0][1] / seconds:>7.2f}x")
+    return timings
+
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser()
+    p.add_argument('--grid', type=json.loads, help='JSON search space, e.g. \'{"max_depth": [null, 4]}\'')
+    p.add_argument('--random', type=int, help='sample this many candidates from the space instead of the full grid')
+    p.add_argument('--workers', type=int, default=None)
+    p.add_argument('--scaling', action='store_true', help='report wall-clock scaling from 1 to --workers cores')
+    args = p.parse_args()
+    candidates = search_space(args.grid, args.random)
+    if args.scaling:
+        scaling(candidates, args.workers)
+    else:
+        run_sweep(candidates, args.workers)
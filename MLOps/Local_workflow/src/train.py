@@ -1,7 +1,10 @@
+import argparse
+import inspect
 import mlflow
 import mlflow.sklearn
 import os
-from model import build_model, save_model
+from batch_logging import BatchLogger
+from model import build_model, save_flat_model, save_model
 from utils import load_example_dataset, split
 
 
@@ -10,9 +13,13 @@ import os
 mlruns_path = os.path.join(os.getcwd(), "mlruns")  # absolute path to mlruns in current folder
 MLFLOW_TRACKING_URI = os.getenv('MLFLOW_TRACKING_URI', f"file:///{mlruns_path.replace(os.sep, '/')}")
 
+# newer mlflow serialises sklearn models with skops, which rejects tree internals unless trusted
+SKOPS_KWARGS = ({'skops_trusted_types': ['sklearn.tree._tree.Tree']}
+                if 'skops_trusted_types' in inspect.signature(mlflow.sklearn.log_model).parameters else {})
 
 
-def train_and_log(run_name='local-run'):
+
+def train_and_log(run_name='local-run', export_flat=False):
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
     mlflow.set_experiment("local_experiment")  # create/get experiment
     df = load_example_dataset()
@@ -22,20 +29,21 @@ def train_and_log(run_name='local-run'):
     clf = build_model()
 
 
-    with mlflow.start_run(run_name=run_name) as run:
+    # params/metrics go out in background log_batch calls, flushed when the block exits
+    with mlflow.start_run(run_name=run_name) as run, BatchLogger(run.info.run_id) as log:
         clf.fit(X_train, y_train)
         # log model
-        mlflow.sklearn.log_model(clf, name='model', input_example = input_example)
+        mlflow.sklearn.log_model(clf, name='model', input_example = input_example, **SKOPS_KWARGS)
         # log params
-        mlflow.log_param('model_type', 'RandomForest')
-        mlflow.log_metric('train_samples', len(X_train))
+        log.log_param('model_type', 'RandomForest')
+        log.log_metric('train_samples', len(X_train))
 
 
         # evaluate on test
         from sklearn.metrics import accuracy_score
         preds = clf.predict(X_test)
         acc = accuracy_score(y_test, preds)
-        mlflow.log_metric('test_accuracy', float(acc))
+        log.log_metric('test_accuracy', float(acc))
 
 
         # save a local copy too
@@ -43,8 +51,17 @@ def train_and_log(run_name='local-run'):
         save_model(clf, 'artifacts/model.joblib')
 
 
+        # optional sklearn-free export of the fitted forest
+        if export_flat:
+            save_flat_model(clf, 'artifacts/model_flat.npz')
+            mlflow.log_artifact('artifacts/model_flat.npz')
+
+
     print(f"Run saved: {run.info.run_id}")
 
 
 if __name__ == '__main__':
-    train_and_log()
\ No newline at end of file
+    p = argparse.ArgumentParser()
+    p.add_argument('--export-flat', action='store_true', help='also save artifacts/model_flat.npz (forest.FlatForest)')
+    args = p.parse_args()
+    train_and_log(export_flat=args.export_flat)
\ No newline at end of file
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from batch_logging import MAX_ENTITIES, MAX_PARAMS, BatchLogger
+
+
+class RecordingClient:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        if self.fail:
+            raise RuntimeError('tracking server down')
+        with self.lock:
+            self.batches.append((run_id, list(metrics), list(params), list(tags)))
+
+
+def test_everything_logged_is_sent_in_batches_within_limits():
+    client = RecordingClient()
+    with BatchLogger('run', flush_interval=60, client=client) as log:
+        log.log_params({f'p{i}': i for i in range(250)})
+        log.set_tag('stage', 'test')
+        for step in range(1500):
+            log.log_metric('loss', 1.0 / (step + 1), step=step)
+    metrics = [m for _, ms, _, _ in client.batches for m in ms]
+    params = [p for _, _, ps, _ in client.batches for p in ps]
+    assert [m.step for m in metrics] == list(range(1500))
+    assert sorted(p.key for p in params) == sorted(f'p{i}' for i in range(250))
+    assert [t.key for _, _, _, ts in client.batches for t in ts] == ['stage']
+    assert all(run_id == 'run' for run_id, _, _, _ in client.batches)
+    assert all(len(ps) <= MAX_PARAMS and len(ms) + len(ps) + len(ts) <= MAX_ENTITIES
+               for _, ms, ps, ts in client.batches)
+    assert len(client.batches) < 10
+
+
+def test_nothing_is_lost_while_the_logger_flushes_concurrently():
+    client = RecordingClient()
+    n_threads, per_thread = 8, 5000
+
+    def work(log, worker):
+        for step in range(per_thread):
+            log.log_metric(f'm{worker}', step, step=step)
+            if step % 100 == 0:
+                log.set_tag(f't{worker}-{step}', step)
+
+    with BatchLogger('run', flush_interval=0.001, client=client) as log:
+        threads = [threading.Thread(target=work, args=(log, w)) for w in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    metrics = [m for _, ms, _, _ in client.batches for m in ms]
+    tags = [t for _, _, _, ts in client.batches for t in ts]
+    assert len(metrics) == n_threads * per_thread
+    assert len(tags) == n_threads * per_thread // 100
+    for w in range(n_threads):
+        assert [m.step for m in metrics if m.key == f'm{w}'] == list(range(per_thread))
+    assert len(client.batches) > 1
+
+
+def test_flush_waits_for_buffered_entries():
+    client = RecordingClient()
+    log = BatchLogger('run', flush_interval=60, client=client)
+    log.log_metrics({'a': 1, 'b': 2})
+    log.flush()
+    assert sorted(m.key for _, ms, _, _ in client.batches for m in ms) == ['a', 'b']
+    log.close()
+
+
+def test_errors_surface_on_close():
+    log = BatchLogger('run', flush_interval=60, client=RecordingClient(fail=True))
+    log.log_metric('a', 1)
+    with pytest.raises(RuntimeError, match='tracking server down'):
+        log.close()
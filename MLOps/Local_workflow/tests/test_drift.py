@@ -1,8 +1,178 @@
-# from src.drift import population_stability_index
-# import numpy as np
-
-# def test_psi_same_distribution():
-#     a = np.random.normal(0, 1, size=1000)
-#     b = np.random.normal(0, 1, size=1000)
-#     psi = population_stability_index(a, b)
-#     assert psi < 0.2
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import drift
+
+from drift import (batch_ks_2samp, batch_psi, build_baseline_profile, check_drift, check_drift_batch, ks_test,
+                   load_baseline_profile, population_stability_index, save_baseline_profile)
+from drift_stream import (DriftSketch, KLLSketch, StreamingDrift, check_drift_stream, iter_csv_chunks,
+                          summarise_partitions)
+
+
+def make_frames(n_baseline=400, n_current=300, n_cols=12, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = [f'f{i}' for i in range(n_cols)]
+    baseline = pd.DataFrame(rng.normal(size=(n_baseline, n_cols)), columns=cols)
+    current = pd.DataFrame(rng.normal(0.2, 1.3, size=(n_current, n_cols)), columns=cols)
+    baseline.iloc[::7, 1] = np.nan
+    current.iloc[::3, 2] = np.nan
+    baseline['f3'] = rng.integers(0, 4, n_baseline)
+    current['f3'] = rng.integers(0, 5, n_current)
+    baseline['f4'] = baseline['f4'].round(1)
+    current['f4'] = current['f4'].round(1)
+    current.iloc[5:, 5] = np.nan
+    return baseline, current
+
+
+def test_psi_same_distribution():
+    rng = np.random.default_rng(0)
+    a = rng.normal(0, 1, size=1000)
+    b = rng.normal(0, 1, size=1000)
+    psi = population_stability_index(a, b)
+    assert psi < 0.2
+
+
+def test_batch_psi_matches_population_stability_index():
+    baseline, current = make_frames()
+    cols = ['f0', 'f3', 'f4']
+    psi = batch_psi(baseline[cols].values, current[cols].values)
+    for j, col in enumerate(cols):
+        assert psi[j] == population_stability_index(baseline[col], current[col])
+
+
+def test_batch_ks_matches_ks_test():
+    baseline, current = make_frames()
+    cols = ['f0', 'f3', 'f4']
+    stat, pvalue = batch_ks_2samp(baseline[cols].values, current[cols].values)
+    for j, col in enumerate(cols):
+        res = ks_test(baseline[col], current[col])
+        assert stat[j] == res.statistic
+        assert pvalue[j] == res.pvalue
+
+
+def test_batch_ks_matches_ks_test_without_the_scipy_helper(monkeypatch):
+    # the public ks_2samp on the column's samples stands in for the private helper
+    monkeypatch.setattr(drift, '_attempt_exact_2kssamp', None)
+    baseline, current = make_frames()
+    cols = ['f0', 'f3', 'f4']
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        stat, pvalue = batch_ks_2samp(baseline[cols].values, current[cols].values)
+    for j, col in enumerate(cols):
+        res = ks_test(baseline[col], current[col])
+        assert stat[j] == res.statistic
+        assert pvalue[j] == res.pvalue
+
+
+def test_profile_ks_warns_when_exact_pvalues_are_unavailable(monkeypatch):
+    monkeypatch.setattr(drift, '_attempt_exact_2kssamp', None)
+    baseline, current = make_frames()
+    profile = build_baseline_profile(baseline, sketch_size=1000)
+    with pytest.warns(RuntimeWarning, match='asymptotic'):
+        report, _ = check_drift(profile, current)
+    n = round(len(baseline) * len(current) / (len(baseline) + len(current)))
+    assert report['f0']['ks_pvalue'] == pytest.approx(stats.kstwo.sf(report['f0']['ks_stat'], n))
+
+
+def test_check_drift_batch_matches_check_drift():
+    for n_baseline, n_current in [(400, 300), (12000, 11000)]:
+        baseline, current = make_frames(n_baseline, n_current)
+        expected = check_drift(baseline, current)
+        assert check_drift_batch(baseline, current, block_size=5) == expected
+        assert expected[0]['f5'] == {'reason': 'not enough data'}
+
+
+def test_profile_matches_check_drift_when_baseline_fits_sketch(tmp_path):
+    baseline, current = make_frames()
+    save_baseline_profile(build_baseline_profile(baseline, sketch_size=1000), tmp_path / 'profile.npz')
+    profile = load_baseline_profile(tmp_path / 'profile.npz')
+    assert profile['n_rows'] == len(baseline)
+    assert check_drift(profile, current) == check_drift(baseline, current)
+
+
+def test_profile_sketch_bounds_ks_error():
+    baseline, current = make_frames(n_baseline=5000, n_current=2000)
+    sketch_size = 200
+    expected, _ = check_drift(baseline, current)
+    report, _ = check_drift(build_baseline_profile(baseline, sketch_size=sketch_size), current)
+    for col, entry in expected.items():
+        assert report[col].get('psi') == entry.get('psi')
+        if 'ks_stat' in entry:
+            assert abs(report[col]['ks_stat'] - entry['ks_stat']) <= 1 / sketch_size
+
+
+def test_streaming_matches_profile_check(tmp_path):
+    baseline, current = make_frames(n_baseline=3000, n_current=2500)
+    profile = build_baseline_profile(baseline, sketch_size=300)
+    paths = []
+    for i, start in enumerate(range(0, len(current), 1000)):
+        paths.append(tmp_path / f'part-{i}.csv')
+        current.iloc[start:start + 1000].to_csv(paths[-1], index=False)
+    chunks = iter_csv_chunks(paths, chunksize=128, usecols=profile['columns'])
+    streamed = check_drift_stream(profile, chunks)
+    expected = check_drift(profile, pd.concat(pd.read_csv(p) for p in paths))
+    assert streamed == expected
+
+
+def write_partitions(frame, folder, n_partitions):
+    partitions = []
+    for i, part in enumerate(np.array_split(np.arange(len(frame)), n_partitions)):
+        path = folder / f'part-{i}.csv'
+        frame.iloc[part].to_csv(path, index=False)
+        partitions.append([path])
+    return partitions
+
+
+def test_merged_accumulators_are_exact(tmp_path):
+    baseline, current = make_frames(n_baseline=3000, n_current=4000)
+    profile = build_baseline_profile(baseline, sketch_size=300)
+    partitions = write_partitions(current, tmp_path, 4)
+    merged = summarise_partitions(partitions, lambda: StreamingDrift(profile), chunksize=500, workers=2)
+    assert merged.rows == len(current)
+    assert merged.report() == check_drift(profile, current)
+
+
+def test_merged_kll_sketches_bound_error_against_check_drift(tmp_path):
+    baseline, current = make_frames(n_baseline=5000, n_current=20000)
+    profile = build_baseline_profile(baseline)
+    partitions = write_partitions(current, tmp_path, 5)
+    columns = profile['columns']
+    merged = summarise_partitions(partitions, lambda: DriftSketch(columns, seed=0), chunksize=1500, workers=1)
+    report, _ = merged.against(profile).report()
+    expected, _ = check_drift(baseline, current)
+    for col, entry in expected.items():
+        if 'ks_stat' not in entry:
+            continue
+        assert abs(report[col]['ks_stat'] - entry['ks_stat']) <= 0.02
+        assert abs(report[col]['psi'] - entry['psi']) <= 0.01
+
+
+def test_empty_kll_sketch_has_no_quantiles():
+    sketch = KLLSketch().update([np.nan])
+    assert np.isnan(sketch.quantile(0.5))
+    assert np.isnan(sketch.quantile([0.1, 0.9])).all()
+    assert sketch.rank([0.0, 1.0]).tolist() == [0, 0]
+
+
+def test_no_partitions_give_an_empty_summary():
+    baseline, _ = make_frames()
+    profile = build_baseline_profile(baseline)
+    for make_summary in [lambda: StreamingDrift(profile), lambda: DriftSketch(profile['columns'], seed=0)]:
+        summary = summarise_partitions([], make_summary)
+        assert summary.rows == 0
+        acc = summary if isinstance(summary, StreamingDrift) else summary.against(profile)
+        report, _ = acc.report()
+        assert all(entry == {'reason': 'not enough data'} for entry in report.values())
+
+
+def test_drift_sketch_columns_flip_independent_coins():
+    values = np.random.default_rng(0).normal(size=(5000, 1))
+    frame = pd.DataFrame(np.repeat(values, 2, axis=1), columns=['a', 'b'])
+    first, second = DriftSketch(['a', 'b'], k=50, seed=0).update(frame).sketches
+    assert not all(np.array_equal(x, y) for x, y in zip(first.compactors, second.compactors))
+    again = DriftSketch(['a', 'b'], k=50, seed=0).update(frame).sketches
+    assert all(np.array_equal(x, y) for x, y in zip(first.compactors, again[0].compactors))
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import forest
+from evaluate import load_classifier
+from forest import FlatForest, njit
+from model import build_model, load_flat_model, save_flat_model, save_model
+from utils import load_example_dataset, split
+
+BACKENDS = ['numpy', pytest.param('numba', marks=pytest.mark.skipif(njit is None, reason='numba not installed'))]
+
+
+def make_data(n_rows=3000, n_cols=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_cols))
+    y = (X[:, 0] + X[:, 1] ** 2 + rng.normal(size=n_rows) > 1).astype(int) + (X[:, 2] > 1)
+    return X, y
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_flat_forest_matches_sklearn_on_iris(backend, tmp_path):
+    X_train, X_test, y_train, y_test = split(load_example_dataset())
+    clf = build_model().fit(X_train, y_train)
+    save_flat_model(clf, tmp_path / 'model_flat.npz')
+    flat = load_flat_model(tmp_path / 'model_flat.npz', backend=backend)
+    assert np.array_equal(flat.predict_proba(X_test), clf.predict_proba(X_test))
+    assert np.array_equal(flat.predict(X_test), clf.predict(X_test))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_flat_forest_matches_sklearn_with_deep_trees_and_missing_values(backend):
+    X, y = make_data()
+    X[np.random.default_rng(1).random(X.shape) < 0.02] = np.nan
+    clf = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    X_new, _ = make_data(1000, seed=2)
+    X_new[np.random.default_rng(3).random(X_new.shape) < 0.05] = np.nan
+    flat = FlatForest.from_sklearn(clf, block_rows=128, backend=backend)
+    assert np.array_equal(flat.predict_proba(X_new), clf.predict_proba(X_new))
+    assert np.array_equal(flat.predict(X_new[:1]), clf.predict(X_new[:1]))
+
+
+def test_numba_backend_is_opt_in(monkeypatch):
+    X, y = make_data(200)
+    clf = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y)
+    assert FlatForest.from_sklearn(clf).backend == 'numpy'
+    monkeypatch.setattr(forest, 'njit', None)
+    with pytest.raises(ImportError, match='numba'):
+        FlatForest.from_sklearn(clf, backend='numba')
+    with pytest.raises(ValueError, match='unknown backend'):
+        FlatForest.from_sklearn(clf, backend='cuda')
+
+
+def test_evaluate_uses_sklearn_unless_asked_and_rejects_a_stale_export(tmp_path):
+    X, y = make_data(200)
+    clf = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y)
+    model_path, flat_path = tmp_path / 'model.joblib', tmp_path / 'model_flat.npz'
+    save_flat_model(clf, flat_path)
+    save_model(clf, model_path)
+    os.utime(flat_path, (0, 0))  # exported before the current model was saved
+    assert isinstance(load_classifier('sklearn', model_path, flat_path), RandomForestClassifier)
+    with pytest.raises(ValueError, match='older than'):
+        load_classifier('numpy', model_path, flat_path)
+    save_flat_model(clf, flat_path)
+    flat = load_classifier('numpy', model_path, flat_path)
+    assert flat.backend == 'numpy' and np.array_equal(flat.predict(X), clf.predict(X))
+    with pytest.raises(FileNotFoundError):
+        load_classifier('numpy', model_path, tmp_path / 'missing.npz')
@@ -0,0 +1,17 @@
+from sweep import fit_candidates, search_space, share_split
+
+
+def test_search_space_grid_and_random():
+    grid = {'n_estimators': [10, 20], 'max_depth': [None, 3, 5]}
+    assert len(search_space(grid)) == 6
+    sampled = search_space(grid, n_iter=4)
+    assert len(sampled) == 4 and all(c in search_space(grid) for c in sampled)
+
+
+def test_fit_candidates_same_results_in_process_and_in_pool(tmp_path):
+    share_split(tmp_path)
+    candidates = search_space({'n_estimators': [5, 10], 'max_depth': [2, None]})
+    sequential, _ = fit_candidates(tmp_path, candidates, workers=1)
+    pooled, _ = fit_candidates(tmp_path, candidates, workers=2)
+    assert [(p, acc) for p, acc, _ in sequential] == [(p, acc) for p, acc, _ in pooled]
+    assert [p for p, _, _ in pooled] == candidates